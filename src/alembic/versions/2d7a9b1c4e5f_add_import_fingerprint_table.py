@@ -0,0 +1,35 @@
+"""Add import fingerprint table
+
+Revision ID: 2d7a9b1c4e5f
+Revises: 8c3e2f4a6d1b
+Create Date: 2026-10-18 11:58:21.734906
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '2d7a9b1c4e5f'
+down_revision: Union[str, None] = '8c3e2f4a6d1b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'import_fingerprint',
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('fingerprint', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('entity', 'entity_id'),
+        schema='public',
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('import_fingerprint', schema='public')
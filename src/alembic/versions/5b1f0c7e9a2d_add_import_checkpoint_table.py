@@ -0,0 +1,38 @@
+"""Add import checkpoint table
+
+Revision ID: 5b1f0c7e9a2d
+Revises: a431792da233
+Create Date: 2026-10-18 09:12:40.118342
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1f0c7e9a2d'
+down_revision: Union[str, None] = 'a431792da233'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'import_checkpoint',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('importer', sa.String(), nullable=False),
+        sa.Column('params', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('cursor', sa.String(), nullable=True),
+        sa.Column('imported_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        schema='public',
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('import_checkpoint', schema='public')
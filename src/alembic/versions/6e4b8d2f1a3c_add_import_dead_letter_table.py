@@ -0,0 +1,39 @@
+"""Add import dead letter table
+
+Revision ID: 6e4b8d2f1a3c
+Revises: 2d7a9b1c4e5f
+Create Date: 2026-10-18 13:21:46.902117
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '6e4b8d2f1a3c'
+down_revision: Union[str, None] = '2d7a9b1c4e5f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'import_dead_letter',
+        sa.Column('importer', sa.String(), nullable=False),
+        sa.Column('object_id', sa.String(), nullable=False),
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('error', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('importer', 'object_id'),
+        schema='public',
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('import_dead_letter', schema='public')
@@ -0,0 +1,37 @@
+"""Add import watermark table
+
+Revision ID: 8c3e2f4a6d1b
+Revises: 5b1f0c7e9a2d
+Create Date: 2026-10-18 10:47:03.529184
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3e2f4a6d1b'
+down_revision: Union[str, None] = '5b1f0c7e9a2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'import_watermark',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('params', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('aktualisiert', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        schema='public',
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('import_watermark', schema='public')
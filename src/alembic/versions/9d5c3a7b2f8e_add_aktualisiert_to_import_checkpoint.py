@@ -0,0 +1,30 @@
+"""Add aktualisiert to import checkpoint
+
+Revision ID: 9d5c3a7b2f8e
+Revises: 6e4b8d2f1a3c
+Create Date: 2026-10-18 16:02:11.480352
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '9d5c3a7b2f8e'
+down_revision: Union[str, None] = '6e4b8d2f1a3c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'import_checkpoint',
+        sa.Column('aktualisiert', sa.DateTime(timezone=True), nullable=True),
+        schema='public',
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('import_checkpoint', 'aktualisiert', schema='public')
@@ -1,4 +1,5 @@
 """Configuration of Settings."""
+import typing as t
 
 import pydantic as pyd
 from pydantic_settings import BaseSettings
@@ -22,8 +23,31 @@ class Settings(BaseSettings):
         default="I9FKdCn.hbfefNWCY336dL6x62vfwNKpoN2RZ1gp21"
     )  # api key valid till end of may 2024
     DIP_BUNDESTAG_BASE_URL: str = pyd.Field(default="https://search.dip.bundestag.de")
+    DIP_BUNDESTAG_MAX_CONCURRENT_REQUESTS: int = pyd.Field(default=4)
+    DIP_BUNDESTAG_REQUESTS_PER_SECOND: float = pyd.Field(default=2.0)
 
     BUNDESTAG_ABSTIMMUNGEN_URL: str = pyd.Field(default="https://www.bundestag.de")
+    BUNDESTAG_REQUESTS_PER_SECOND: float = pyd.Field(default=3.0)
+    BUNDESTAG_MAX_CONCURRENT_REQUESTS: int = pyd.Field(default=4)
+
+    # Rate limiting
+    RATE_LIMIT_BURST: int = pyd.Field(default=2)
+    # directory for shared rate limiter state, set to coordinate the rate across processes
+    RATE_LIMIT_STATE_DIR: str | None = pyd.Field(default=None)
+
+    # HTTP response cache
+    HTTP_CACHE_ENABLED: bool = pyd.Field(default=True)
+    # defaults to folder "cache/http" in the data folder
+    HTTP_CACHE_DIR: str | None = pyd.Field(default=None)
+    HTTP_CACHE_MAX_SIZE_MB: int = pyd.Field(default=1024)
+    BUNDESTAG_CACHE_TTL_DAYS: int = pyd.Field(default=30)
+
+    # HTTP transport: "live", "record" (live and store responses) or "replay" (stored responses only)
+    HTTP_TRANSPORT_MODE: t.Literal['live', 'record', 'replay'] = pyd.Field(default='live')
+    # defaults to folder "archive" in the data folder
+    HTTP_TRANSPORT_ARCHIVE_DIR: str | None = pyd.Field(default=None)
+    HTTP_REPLAY_LATENCY_MS: float = pyd.Field(default=0.0)
+    HTTP_REPLAY_JITTER_MS: float = pyd.Field(default=0.0)
 
     # Proxy Lists
     PROXY_LIST_HTTP_URL: str = pyd.Field(
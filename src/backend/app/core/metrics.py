@@ -0,0 +1,244 @@
+"""In-process metrics, exportable in the Prometheus text format.
+
+Metrics are registered once at module level (see :data:`REGISTRY`) and updated with label values
+as keyword arguments, e.g. ``HTTP_REQUESTS.inc(facade='DIPBundestagFacade', status='200')``.
+"""
+import bisect
+import math
+import threading
+import typing as t
+
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+"""Default upper bounds of histograms of seconds."""
+
+LabelValues = tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: t.Sequence[str], values: t.Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+
+class Metric:
+    """Metric with a value per combination of label values."""
+
+    type_name: str = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: t.Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: t.Mapping[str, t.Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}.')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> t.Iterator[tuple[str, LabelValues, tuple[str, ...], float]]:
+        """Get samples as ``(suffix, label values, extra label names and values, value)``."""
+        raise NotImplementedError()
+
+    def snapshot(self) -> dict[LabelValues, t.Any]:
+        """Get the current values by label values."""
+        raise NotImplementedError()
+
+    def to_prometheus(self) -> str:
+        lines = [
+            f'# HELP {self.name} {_escape(self.documentation)}',
+            f'# TYPE {self.name} {self.type_name}',
+        ]
+        for suffix, values, extra, value in self.samples():
+            names = self.labelnames + extra[::2]
+            label_values = values + extra[1::2]
+            lines.append(
+                f'{self.name}{suffix}{_format_labels(names, label_values)} {_format_value(value)}'
+            )
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing value, e.g. a number of requests or seconds waited."""
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: t.Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, /, **labels: t.Any):
+        if amount < 0:
+            raise ValueError('Counters can only be increased.')
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for values, value in items:
+            yield '_total', values, (), value
+
+    def snapshot(self) -> dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class Gauge(Metric):
+    """Value which can go up and down, e.g. a concurrency limit.
+
+    With a ``callback``, the values are read from it (by label values) whenever collected.
+    """
+
+    type_name = 'gauge'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: t.Sequence[str] = (),
+        callback: t.Callable[[], t.Mapping[LabelValues, float]] | None = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, /, **labels: t.Any):
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def snapshot(self) -> dict[LabelValues, float]:
+        with self._lock:
+            values = dict(self._values)
+        if self.callback is not None:
+            values.update(self.callback())
+        return values
+
+    def samples(self):
+        for values, value in self.snapshot().items():
+            yield '', values, (), value
+
+
+class _HistogramValue:
+    def __init__(self, buckets: int):
+        self.bucket_counts = [0] * buckets
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(Metric):
+    """Distribution of observed values in buckets, e.g. request durations."""
+
+    type_name = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: t.Sequence[str] = (),
+        buckets: t.Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[LabelValues, _HistogramValue] = {}
+
+    def observe(self, value: float, /, **labels: t.Any):
+        key = self._label_values(labels)
+        with self._lock:
+            if (histogram := self._values.get(key)) is None:
+                histogram = self._values[key] = _HistogramValue(len(self.buckets))
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                histogram.bucket_counts[index] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def snapshot(self) -> dict[LabelValues, dict[str, t.Any]]:
+        """Get count, sum and the (non-cumulative) count per bucket by label values."""
+        with self._lock:
+            return {
+                values: {
+                    'count': histogram.count,
+                    'sum': histogram.sum,
+                    'buckets': dict(zip(self.buckets, histogram.bucket_counts)),
+                }
+                for values, histogram in self._values.items()
+            }
+
+    def samples(self):
+        for values, histogram in self.snapshot().items():
+            cumulative = 0
+            for bound, count in histogram['buckets'].items():
+                cumulative += count
+                yield '_bucket', values, ('le', _format_value(bound)), cumulative
+            yield '_bucket', values, ('le', '+Inf'), histogram['count']
+            yield '_sum', values, (), histogram['sum']
+            yield '_count', values, (), histogram['count']
+
+
+MetricType = t.TypeVar('MetricType', bound=Metric)
+
+
+class MetricsRegistry:
+    """Metrics of the process by name."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: MetricType) -> MetricType:
+        """Register a metric, returning the registered one if its name is taken already."""
+        with self._lock:
+            existing = self._metrics.setdefault(metric.name, metric)
+        if type(existing) is not type(metric):  # pylint: disable=unidiomatic-typecheck
+            raise ValueError(f'Metric {metric.name} is registered as {existing.type_name}.')
+        return t.cast(MetricType, existing)
+
+    def counter(self, name: str, documentation: str, labelnames: t.Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: t.Sequence[str] = (),
+        callback: t.Callable[[], t.Mapping[LabelValues, float]] | None = None,
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: t.Sequence[str] = (),
+        buckets: t.Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self) -> dict[str, dict[LabelValues, t.Any]]:
+        """Get the current values of all metrics, by name and label values."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def to_prometheus(self) -> str:
+        """Export all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return ''.join(metric.to_prometheus() + '\n' for metric in metrics)
+
+
+REGISTRY = MetricsRegistry()
+"""Registry of all metrics of the process."""
@@ -1,13 +1,25 @@
 """CRUD Operations Bundestag Abstimmung."""
 import datetime
 import logging
+import typing as t
+
+import sqlalchemy as sa
+from sqlalchemy.exc import OperationalError
 
 from backend.app.crud.base import CRUDBase
-from backend.app.models.bundestag.abstimmung_model import BTAbstimmung
+from backend.app.models.bundestag.abstimmung_model import BTAbstimmung, BTAbstimmungRedner
 
 _logger = logging.getLogger(__name__)
 
 
+class AbstimmungIndexEntry(t.NamedTuple):
+    """Columns of an imported Abstimmung needed to decide if it is imported again."""
+
+    abstimmung_date: datetime.date
+    updated_at: datetime.datetime
+    has_redner: bool
+
+
 class CRUDBundestagAbstimmung(CRUDBase[BTAbstimmung]):
     """Provides CRUD operations for bt.abstimmung table."""
 
@@ -17,5 +29,27 @@ class CRUDBundestagAbstimmung(CRUDBase[BTAbstimmung]):
         """
         super().__init__(model)
 
+    def read_index(self) -> dict[int, AbstimmungIndexEntry]:
+        """Read id, date, time of the last update and if Redner exist of all Abstimmungen.
+
+        Only these columns are scanned, no Abstimmung objects with their relationships are loaded.
+        """
+        statement = sa.select(
+            self.model.id,
+            self.model.abstimmung_date,
+            self.model.updated_at,
+            sa.exists()
+            .where(BTAbstimmungRedner.abstimmung_id == self.model.id)
+            .label('has_redner'),
+        )
+        try:
+            rows = CRUDBase.db.execute(statement).all()
+        except OperationalError as error:
+            # if database closed unexpectedly, OperationalError occurs
+            _logger.error("%s occured. Session will be rolled back.", error)
+            CRUDBase.db.rollback()
+            rows = CRUDBase.db.execute(statement).all()
+        return {row[0]: AbstimmungIndexEntry(*row[1:]) for row in rows}
+
 
 CRUD_BUNDESTAG_ABSTIMMUNG = CRUDBundestagAbstimmung(BTAbstimmung)
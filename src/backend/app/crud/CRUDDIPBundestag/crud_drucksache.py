@@ -1,30 +1,21 @@
 """CRUD Operations DIP Bundestag for Drucksache."""
+import array
 import datetime
 import logging
 
 import pytz
 import sqlalchemy as sa
-from pydantic import BaseModel
 from sqlalchemy import func, select
 from sqlalchemy.exc import OperationalError
 
 from backend.app.crud.base import CRUDBase
 from backend.app.facades.deutscher_bundestag.model import Zuordnung
-from backend.app.models.dip.drucksache_model import DIPDrucksache
+from backend.app.models.dip.drucksache_model import DIPDrucksache, DIPDrucksacheVorgangAssociation
+from backend.app.models.dip.vorgang_model import DIPVorgang
 
 _logger = logging.getLogger(__name__)
 
 
-class CountsPerWeek(BaseModel):
-    """Model for counts per week."""
-
-    year: int
-    week: int
-    week_start_date: datetime.date
-    week_end_date: datetime.date
-    drucksache_count: int
-
-
 class CRUDDIPDrucksache(CRUDBase[DIPDrucksache]):
     """Provides CRUD operations for dip.drucksache table."""
 
@@ -34,34 +25,92 @@ class CRUDDIPDrucksache(CRUDBase[DIPDrucksache]):
         """
         super().__init__(model)
 
-    def read_count_per_week(
+    @staticmethod
+    def _filter(
+        statement: sa.Select,
+        drucksachetyp_filter: list[str] | None,
+        vorgangstyp_filter: list[str] | None,
+    ) -> sa.Select:
+        """Restrict a select of drucksachen like the ``f.drucksachetyp`` and ``f.vorgangstyp``
+        filters of DIP, i.e. to drucksachen of a vorgang of the given types."""
+        if drucksachetyp_filter is not None:
+            statement = statement.where(DIPDrucksache.drucksachetyp.in_(drucksachetyp_filter))
+        if vorgangstyp_filter is not None:
+            statement = (
+                statement.join(
+                    DIPDrucksacheVorgangAssociation,
+                    DIPDrucksacheVorgangAssociation.drucksache_id == DIPDrucksache.id,
+                )
+                .join(DIPVorgang, DIPVorgang.id == DIPDrucksacheVorgangAssociation.vorgang_id)
+                .where(DIPVorgang.vorgangstyp.in_(vorgangstyp_filter))
+            )
+        return statement
+
+    def read_counts(
+        self,
+        date_ranges: list[tuple[datetime.date, datetime.date]],
+        drucksachetyp_filter: list[str] | None = None,
+        vorgangstyp_filter: list[str] | None = None,
+    ) -> list[int]:
+        """Read the number of drucksachen per ``(start, end)`` range of datum (both inclusive)
+        with one query."""
+        if not date_ranges:
+            return []
+
+        ranges = sa.values(
+            sa.column('position', sa.Integer),
+            sa.column('range_start', sa.Date),
+            sa.column('range_end', sa.Date),
+            name='ranges',
+        ).data([(position, start, end) for position, (start, end) in enumerate(date_ranges)])
+
+        count = self._filter(
+            select(func.count(sa.distinct(DIPDrucksache.id))).where(
+                DIPDrucksache.datum.between(ranges.c.range_start, ranges.c.range_end)
+            ),
+            drucksachetyp_filter,
+            vorgangstyp_filter,
+        )
+        statement = select(ranges.c.position, count.scalar_subquery()).order_by(ranges.c.position)
+
+        try:
+            rows = CRUDBase.db.execute(statement).all()
+        except OperationalError as error:
+            # if database closed unexpectedly, OperationalError occurs
+            _logger.error("%s occured. Session will be rolled back.", error)
+            CRUDBase.db.rollback()
+            rows = CRUDBase.db.execute(statement).all()
+        return [row[1] for row in rows]
+
+    def read_versions(
         self,
         start_date: datetime.date,
         end_date: datetime.date,
         drucksachetyp_filter: list[str] | None = None,
         vorgangstyp_filter: list[str] | None = None,
-    ) -> list[CountsPerWeek]:
-        """Read the number of drucksachen per week. Used to check for complete data"""
-        _logger.info("Read drucksachen-counts per week")
-        data = CRUDBase.db.execute(
-            sa.text(
-                """
-                    SELECT year, week, week_start_date, week_end_date, drucksache_count
-                    FROM COUNT_WEEKLY_DRUCKSACHE(:start_date, :end_date, :drucksachetyp_filter, :vorgangstyp_filter);"""
-            ),  # noqa: E501
-            {
-                "start_date": start_date,
-                "end_date": end_date,
-                "drucksachetyp_filter": drucksachetyp_filter,
-                "vorgangstyp_filter": vorgangstyp_filter,
-            },
-        ).all()
-
-        counts_per_week = []
-        for row in data:
-            counts_per_week.append(CountsPerWeek.model_validate(row._mapping))
-
-        return counts_per_week
+    ) -> tuple[array.array, array.array]:
+        """Read ids and ``aktualisiert`` (as POSIX timestamp) of the drucksachen of a datum range.
+
+        Both are returned as compact arrays sorted by id, instead of a row object per drucksache.
+        ``aktualisiert`` is stored without time zone in UTC, the time zone of the database session.
+        """
+        statement = self._filter(
+            select(DIPDrucksache.id, DIPDrucksache.aktualisiert)
+            .where(DIPDrucksache.datum.between(start_date, end_date))
+            .distinct()
+            .order_by(DIPDrucksache.id),
+            drucksachetyp_filter,
+            vorgangstyp_filter,
+        )
+
+        ids, aktualisiert = array.array('q'), array.array('d')
+        for chunk in CRUDBase.db.execute(statement.execution_options(yield_per=10000)).partitions():
+            for drucksache_id, drucksache_aktualisiert in chunk:
+                ids.append(drucksache_id)
+                aktualisiert.append(
+                    drucksache_aktualisiert.replace(tzinfo=datetime.timezone.utc).timestamp()
+                )
+        return ids, aktualisiert
 
 
 CRUD_DIP_DRUCKSACHE = CRUDDIPDrucksache(DIPDrucksache)
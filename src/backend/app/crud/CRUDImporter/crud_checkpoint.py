@@ -0,0 +1,69 @@
+"""CRUD Operations for import checkpoints."""
+import datetime
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import OperationalError
+
+from backend.app.crud.base import CRUDBase
+from backend.app.models.importer.checkpoint_model import ImportCheckpoint
+
+_logger = logging.getLogger(__name__)
+
+
+class CRUDImportCheckpoint(CRUDBase[ImportCheckpoint]):
+    """Provides CRUD operations for public.import_checkpoint table."""
+
+    def __init__(self, model: type):
+        """
+        Initialize CRUDImportCheckpoint.
+        """
+        super().__init__(model)
+
+    def save_checkpoint(
+        self,
+        fingerprint: str,
+        importer: str,
+        params: dict,
+        cursor: str | None,
+        imported_count: int,
+        aktualisiert: datetime.datetime | None = None,
+    ):
+        """Insert or update the checkpoint of an import run and commit it.
+
+        ``created_at`` is stored in UTC, independent of the time zone of the database session, as
+        it is compared with the start of the resumed run.
+        """
+        values = dict(
+            id=fingerprint,
+            importer=importer,
+            params=params,
+            cursor=cursor,
+            imported_count=imported_count,
+            aktualisiert=aktualisiert,
+            created_at=func.timezone('UTC', func.now()),
+        )
+        statement = insert(self.model).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.model.id],
+            set_=dict(
+                cursor=cursor,
+                imported_count=imported_count,
+                aktualisiert=aktualisiert,
+                updated_at=func.now(),
+            ),
+        )
+
+        try:
+            CRUDBase.db.execute(statement)
+            CRUDBase.db.commit()
+        except OperationalError as error:
+            # if database closed unexpectedly, OperationalError occurs
+            _logger.error("%s occured. Session will be rolled back.", error)
+            CRUDBase.db.rollback()
+            CRUDBase.db.execute(statement)
+            CRUDBase.db.commit()
+
+
+CRUD_IMPORT_CHECKPOINT = CRUDImportCheckpoint(ImportCheckpoint)
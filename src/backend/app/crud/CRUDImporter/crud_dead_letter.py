@@ -0,0 +1,96 @@
+"""CRUD Operations for dead letters of imports."""
+import json
+import logging
+
+import sqlalchemy as sa
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import OperationalError
+
+from backend.app.crud.base import CRUDBase
+from backend.app.db.database import Base
+from backend.app.models.importer.dead_letter_model import ImportDeadLetter
+
+_logger = logging.getLogger(__name__)
+
+
+class CRUDImportDeadLetter(CRUDBase[ImportDeadLetter]):
+    """Provides CRUD operations for public.import_dead_letter table."""
+
+    def __init__(self, model: type):
+        """
+        Initialize CRUDImportDeadLetter.
+        """
+        super().__init__(model)
+
+    def _execute_and_commit(self, statement):
+        try:
+            CRUDBase.db.execute(statement)
+            CRUDBase.db.commit()
+        except OperationalError as error:
+            # if database closed unexpectedly, OperationalError occurs
+            _logger.error("%s occured. Session will be rolled back.", error)
+            CRUDBase.db.rollback()
+            CRUDBase.db.execute(statement)
+            CRUDBase.db.commit()
+
+    @staticmethod
+    def get_object_id(obj: Base) -> str:
+        """Get the primary key of an object as string, joined by ``/`` if composite."""
+        state = sa.inspect(obj)
+        return '/'.join(
+            str(state.dict.get(state.mapper.get_property_by_column(column).key))
+            for column in state.mapper.primary_key
+        )
+
+    def save_rejected(self, importer: str, obj: Base, error: Exception):
+        """Insert a dead letter for an object rejected by the database and commit.
+
+        The payload holds the column values set on the object. If the object was rejected before,
+        the failed attempt is counted and payload and error are replaced.
+        """
+        state = sa.inspect(obj)
+        payload = {
+            prop.key: state.dict[prop.key]
+            for prop in state.mapper.column_attrs
+            if prop.key in state.dict
+        }
+        statement = insert(self.model).values(
+            importer=importer,
+            object_id=self.get_object_id(obj),
+            table_name=state.mapper.local_table.name,
+            payload=json.loads(json.dumps(payload, default=str)),
+            error=str(getattr(error, 'orig', None) or error),
+            attempts=1,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.model.importer, self.model.object_id],
+            set_=dict(
+                table_name=statement.excluded.table_name,
+                payload=statement.excluded.payload,
+                error=statement.excluded.error,
+                attempts=self.model.attempts + 1,
+                updated_at=func.now(),
+            ),
+        )
+        self._execute_and_commit(statement)
+
+    def read_object_ids(self, importer: str) -> list[str]:
+        """Read ids of the objects rejected by an importer."""
+        return list(
+            CRUDBase.db.scalars(
+                select(self.model.object_id).where(self.model.importer == importer)
+            ).all()
+        )
+
+    def delete_resolved(self, importer: str, object_ids: list[str]):
+        """Delete the dead letters of objects of an importer, e.g. after a successful retry."""
+        if object_ids:
+            self._execute_and_commit(
+                delete(self.model).where(
+                    self.model.importer == importer, self.model.object_id.in_(object_ids)
+                )
+            )
+
+
+CRUD_IMPORT_DEAD_LETTER = CRUDImportDeadLetter(ImportDeadLetter)
@@ -0,0 +1,87 @@
+"""CRUD Operations for content fingerprints of imported entities."""
+import logging
+import typing as t
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import OperationalError
+
+from backend.app.crud.base import CRUDBase
+from backend.app.db.database import SessionLocal
+from backend.app.models.importer.fingerprint_model import ImportFingerprint
+
+_logger = logging.getLogger(__name__)
+
+
+class CRUDImportFingerprint(CRUDBase[ImportFingerprint]):
+    """Provides CRUD operations for public.import_fingerprint table."""
+
+    def __init__(self, model: type):
+        """
+        Initialize CRUDImportFingerprint.
+        """
+        super().__init__(model)
+
+    def read_fingerprints(self, entity: str, entity_ids: t.Iterable[int]) -> dict[int, str]:
+        """Read stored fingerprints of entities by id with one query.
+
+        Fingerprints are read with a separate session, as pipelined imports fetch (and skip
+        unchanged entities) on another thread than the one persisting with the shared session.
+        """
+        statement = select(self.model.entity_id, self.model.fingerprint).where(
+            self.model.entity == entity, self.model.entity_id.in_(list(entity_ids))
+        )
+
+        with SessionLocal() as session:
+            try:
+                rows = session.execute(statement).all()
+            except OperationalError as error:
+                # if database closed unexpectedly, OperationalError occurs
+                _logger.error("%s occured. Session will be rolled back.", error)
+                session.rollback()
+                rows = session.execute(statement).all()
+        return {entity_id: fingerprint for entity_id, fingerprint in rows}
+
+    def save_fingerprints(self, entity: str, fingerprints: dict[int, str]):
+        """Insert or update fingerprints of entities by id and commit them."""
+        if not fingerprints:
+            return
+
+        statement = insert(self.model)
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.model.entity, self.model.entity_id],
+            set_=dict(fingerprint=statement.excluded.fingerprint, updated_at=func.now()),
+        )
+        rows = [
+            dict(entity=entity, entity_id=entity_id, fingerprint=fingerprint)
+            for entity_id, fingerprint in fingerprints.items()
+        ]
+
+        try:
+            CRUDBase.db.execute(statement, rows)
+            CRUDBase.db.commit()
+        except OperationalError as error:
+            # if database closed unexpectedly, OperationalError occurs
+            _logger.error("%s occured. Session will be rolled back.", error)
+            CRUDBase.db.rollback()
+            CRUDBase.db.execute(statement, rows)
+            CRUDBase.db.commit()
+
+    def delete_fingerprints(self, entity: str, entity_ids: t.Iterable[int]):
+        """Delete fingerprints of entities by id, e.g. of entities deleted in the source."""
+        statement = delete(self.model).where(
+            self.model.entity == entity, self.model.entity_id.in_(list(entity_ids))
+        )
+
+        try:
+            CRUDBase.db.execute(statement)
+            CRUDBase.db.commit()
+        except OperationalError as error:
+            # if database closed unexpectedly, OperationalError occurs
+            _logger.error("%s occured. Session will be rolled back.", error)
+            CRUDBase.db.rollback()
+            CRUDBase.db.execute(statement)
+            CRUDBase.db.commit()
+
+
+CRUD_IMPORT_FINGERPRINT = CRUDImportFingerprint(ImportFingerprint)
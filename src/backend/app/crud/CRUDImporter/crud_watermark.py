@@ -0,0 +1,55 @@
+"""CRUD Operations for import watermarks."""
+import datetime
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import OperationalError
+
+from backend.app.crud.base import CRUDBase
+from backend.app.models.importer.watermark_model import ImportWatermark
+
+_logger = logging.getLogger(__name__)
+
+
+class CRUDImportWatermark(CRUDBase[ImportWatermark]):
+    """Provides CRUD operations for public.import_watermark table."""
+
+    def __init__(self, model: type):
+        """
+        Initialize CRUDImportWatermark.
+        """
+        super().__init__(model)
+
+    def save_watermark(
+        self, fingerprint: str, entity: str, params: dict, aktualisiert: datetime.datetime
+    ):
+        """Insert or advance the watermark of an import and commit it.
+
+        A watermark never moves backwards, e.g. if an overlapping run completes later.
+        """
+        statement = insert(self.model).values(
+            id=fingerprint, entity=entity, params=params, aktualisiert=aktualisiert
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.model.id],
+            set_=dict(
+                aktualisiert=func.greatest(
+                    self.model.aktualisiert, statement.excluded.aktualisiert
+                ),
+                updated_at=func.now(),
+            ),
+        )
+
+        try:
+            CRUDBase.db.execute(statement)
+            CRUDBase.db.commit()
+        except OperationalError as error:
+            # if database closed unexpectedly, OperationalError occurs
+            _logger.error("%s occured. Session will be rolled back.", error)
+            CRUDBase.db.rollback()
+            CRUDBase.db.execute(statement)
+            CRUDBase.db.commit()
+
+
+CRUD_IMPORT_WATERMARK = CRUDImportWatermark(ImportWatermark)
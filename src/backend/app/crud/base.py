@@ -1,13 +1,18 @@
 """CRUDBase class with basic CRUD Operations."""
 import logging
-from typing import Any, Generic, TypeVar
+from typing import Any, Generic, Iterable, TypeVar
 
 from psycopg2 import IntegrityError
 from sqlalchemy import delete, select
+from sqlalchemy.exc import DataError
+from sqlalchemy.exc import IntegrityError as SQLIntegrityError
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 from sqlalchemy.sql.expression import desc
 
+from backend.app.crud.bulk_upsert import BulkUpserter
+from backend.app.crud.copy_loader import TextCopyLoader
+from backend.app.crud.identity_map import IdentityMap
 from backend.app.db.database import Base, SessionLocal
 
 _logger = logging.getLogger(__name__)
@@ -86,6 +91,79 @@ class CRUDBase(Generic[ModelType]):
             CRUDBase.db.commit()
         return obj_in_list
 
+    def bulk_upsert(
+        self, obj_in_list: list[ModelType], identity_map: IdentityMap | None = None
+    ) -> list[ModelType]:
+        """Insert or update multiple objects with their related objects set-based.
+
+        In contrast to ``create_or_update_multi``, objects are not merged into the session one by
+        one, but written with multi-row ``INSERT ... ON CONFLICT DO UPDATE`` statements, see
+        :class:`BulkUpserter`. Unchanged entities of an ``identity_map`` are not written. Errors are
+        raised after rolling back the session.
+        """
+        try:
+            BulkUpserter(CRUDBase.db, identity_map).upsert(obj_in_list)
+            CRUDBase.db.commit()
+        except OperationalError as error:
+            # if database closed unexpectedly, OperationalError occurs
+            _logger.error("%s occured. Session will be rolled back.", error)
+            CRUDBase.db.rollback()
+            if identity_map is not None:
+                identity_map.rollback()
+            BulkUpserter(CRUDBase.db, identity_map).upsert(obj_in_list)
+            CRUDBase.db.commit()
+        except Exception:
+            CRUDBase.db.rollback()
+            if identity_map is not None:
+                identity_map.rollback()
+            raise
+        if identity_map is not None:
+            identity_map.commit()
+        return obj_in_list
+
+    def bulk_upsert_isolating(
+        self, obj_in_list: list[ModelType], identity_map: IdentityMap | None = None
+    ) -> list[tuple[ModelType, Exception]]:
+        """Like ``bulk_upsert``, but isolate objects rejected by the database instead of losing
+        the whole batch.
+
+        If writing fails with an ``IntegrityError`` or ``DataError`` (e.g. a violated constraint or
+        a value too long), the batch is split in halves which are written separately, down to
+        single objects. All other objects are committed, so a batch with ``k`` rejected objects
+        costs about ``2 * k * log2(len(obj_in_list))`` additional attempts. Rejected objects are
+        returned together with their error, other errors are raised.
+        """
+        try:
+            self.bulk_upsert(obj_in_list, identity_map=identity_map)
+            return []
+        except (SQLIntegrityError, DataError) as error:
+            if len(obj_in_list) == 1:
+                _logger.warning(
+                    "Rejected %s %s: %s", self.model.__tablename__, obj_in_list[0], error.orig
+                )
+                return [(obj_in_list[0], error)]
+
+        middle = len(obj_in_list) // 2
+        return self.bulk_upsert_isolating(
+            obj_in_list[:middle], identity_map
+        ) + self.bulk_upsert_isolating(obj_in_list[middle:], identity_map)
+
+    def copy_texts(
+        self, text_model: type[Base], parent_key: str, rows: Iterable[tuple[Any, str | None]]
+    ) -> int:
+        """Load texts of objects of this model with ``COPY``, see :class:`TextCopyLoader`.
+
+        As the rows are streamed once, loading is not retried. Errors are raised after rolling
+        back the session.
+        """
+        try:
+            count = TextCopyLoader(CRUDBase.db, text_model, parent_key).load(rows)
+            CRUDBase.db.commit()
+        except Exception:
+            CRUDBase.db.rollback()
+            raise
+        return count
+
     def delete(self, id: Any):  # pylint: disable=redefined-builtin,invalid-name
         """Delete single object in database."""
         try:
@@ -98,6 +176,23 @@ class CRUDBase(Generic[ModelType]):
             CRUDBase.db.execute(delete(self.model).where(self.model.id == id))
             CRUDBase.db.commit()
 
+    def delete_multi(self, ids: list[Any]):
+        """Delete multiple objects by id in database, with their delete-orphan children."""
+        if not ids:
+            return
+        try:
+            BulkUpserter(CRUDBase.db).delete(self.model, self.model.id.in_(ids))
+            CRUDBase.db.commit()
+        except OperationalError as error:
+            # if database closed unexpectedly, OperationalError occurs
+            _logger.error("%s occured. Session will be rolled back.", error)
+            CRUDBase.db.rollback()
+            BulkUpserter(CRUDBase.db).delete(self.model, self.model.id.in_(ids))
+            CRUDBase.db.commit()
+        except Exception:
+            CRUDBase.db.rollback()
+            raise
+
     def delete_all(self):
         """Delete all objects of database table."""
         try:
@@ -0,0 +1,290 @@
+"""Set-based upserts of object graphs with PostgreSQL ``INSERT ... ON CONFLICT DO UPDATE``."""
+import collections
+import logging
+import typing as t
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Mapper, RelationshipProperty, Session
+from sqlalchemy.orm.interfaces import MANYTOMANY, MANYTOONE, ONETOMANY
+
+from backend.app.crud.identity_map import IdentityMap
+from backend.app.db.database import Base
+
+_logger = logging.getLogger(__name__)
+
+
+def _columns_expression(columns: t.Sequence[sa.ColumnElement]) -> sa.ColumnElement:
+    """Single column or tuple of columns, e.g. to compare a composite key with ``IN``."""
+    return columns[0] if len(columns) == 1 else sa.tuple_(*columns)
+
+
+def _key_values(keys: t.Iterable[tuple]) -> list:
+    """Values of keys as expected by :func:`_columns_expression` (scalars for single columns)."""
+    return [key[0] if len(key) == 1 else key for key in keys]
+
+
+class BulkUpserter:
+    """Writes objects together with their related objects using set-based statements.
+
+    Instead of merging every object into the session (a SELECT per object and relationship), all
+    objects of a table are written with one multi-row ``INSERT ... ON CONFLICT DO UPDATE`` on the
+    primary key, which returns generated values like ids. Relationships are followed like
+    ``merge`` cascades would:
+
+    * many-to-one targets (e.g. the Vorgang of an association) are upserted first, unless the
+      reverse relationship is a delete-orphan collection, i.e. the target is the owning parent,
+    * delete-orphan children (e.g. autoren, urheber, fundstelle) are upserted after their parents
+      and previous children not in the new collection are deleted set-based (their own children
+      first),
+    * other one-to-many children are upserted only if there is no reverse relationship, which is
+      followed from the other side.
+
+    Only relationships and columns set on an object are written, so that unset attributes keep
+    their value in the database. With an :class:`IdentityMap`, rows known to be unchanged and
+    instances written before in the same import are skipped. Errors are raised, the caller is
+    responsible for the rollback.
+    """
+
+    def __init__(self, session: Session, identity_map: IdentityMap | None = None):
+        self.session = session
+        self.identity_map = identity_map
+
+    def upsert(self, objects: t.Sequence[Base]):
+        """Upsert objects (of any mapped classes) with their related objects."""
+        objects_by_mapper: dict[Mapper, list[Base]] = collections.defaultdict(list)
+        for obj in objects:
+            objects_by_mapper[sa.inspect(obj).mapper].append(obj)
+
+        for mapper, mapper_objects in objects_by_mapper.items():
+            self._upsert(mapper, mapper_objects)
+
+    def delete(self, model: type[Base], condition: sa.ColumnElement[bool]):
+        """Delete rows of a model matching condition, together with their delete-orphan children."""
+        self._delete(sa.inspect(model), condition)
+
+    @staticmethod
+    def _values(obj: Base) -> dict[str, t.Any]:
+        """Attributes set on an object."""
+        return t.cast(dict[str, t.Any], sa.inspect(obj).dict)
+
+    @staticmethod
+    def _is_owned_by_target(relationship: RelationshipProperty) -> bool:
+        """If the target of a many-to-one relationship owns the object as delete-orphan child."""
+        if not relationship.back_populates:
+            return False
+        reverse = relationship.mapper.relationships[relationship.back_populates]
+        return reverse.cascade.delete_orphan
+
+    @staticmethod
+    def _column_pairs(
+        relationship: RelationshipProperty,
+    ) -> t.Sequence[tuple[sa.ColumnElement, sa.ColumnElement]]:
+        """Local and remote columns of a relationship, known once mappers are configured."""
+        assert relationship.local_remote_pairs is not None
+        return relationship.local_remote_pairs
+
+    @staticmethod
+    def _sync(
+        source: Base,
+        source_mapper: Mapper,
+        target: Base,
+        target_mapper: Mapper,
+        pairs: t.Iterable[tuple[sa.ColumnElement, sa.ColumnElement]],
+    ):
+        """Copy values of source columns to target columns, e.g. a primary key to a foreign key."""
+        for source_column, target_column in pairs:
+            setattr(
+                target,
+                target_mapper.get_property_by_column(target_column).key,
+                getattr(source, source_mapper.get_property_by_column(source_column).key),
+            )
+
+    def _upsert(self, mapper: Mapper, objects: t.Sequence[Base]):
+        objects = list({id(obj): obj for obj in objects}.values())
+        if self.identity_map is not None:
+            written = {id(obj): obj for obj in objects if self.identity_map.is_written(obj)}
+            if written:
+                self.identity_map.stage(mapper, {}, written.values())
+                objects = [obj for obj in objects if id(obj) not in written]
+
+        for relationship in mapper.relationships:
+            if relationship.direction is not MANYTOONE or self._is_owned_by_target(relationship):
+                continue
+
+            referencing = [
+                obj for obj in objects if self._values(obj).get(relationship.key) is not None
+            ]
+            if not referencing:
+                continue
+
+            self._upsert(
+                relationship.mapper,
+                [self._values(obj)[relationship.key] for obj in referencing],
+            )
+            for obj in referencing:
+                self._sync(
+                    self._values(obj)[relationship.key],
+                    relationship.mapper,
+                    obj,
+                    mapper,
+                    [(remote, local) for local, remote in self._column_pairs(relationship)],
+                )
+
+        self._write_rows(mapper, objects)
+
+        for relationship in mapper.relationships:
+            parents = [obj for obj in objects if relationship.key in self._values(obj)]
+            if not parents or relationship.direction is MANYTOONE:
+                continue
+            if relationship.direction is MANYTOMANY:
+                raise NotImplementedError(
+                    f'Bulk upsert of many-to-many relationship {relationship} is not supported.'
+                )
+
+            owned = relationship.cascade.delete_orphan
+            if not owned and relationship.back_populates:
+                continue
+
+            children = []
+            for parent in parents:
+                value = self._values(parent)[relationship.key]
+                for child in value if relationship.uselist else [value]:
+                    if child is None:
+                        continue
+                    self._sync(
+                        parent, mapper, child, relationship.mapper, self._column_pairs(relationship)
+                    )
+                    children.append(child)
+
+            if children:
+                self._upsert(relationship.mapper, children)
+            if owned:
+                self._delete_orphans(mapper, relationship, parents, children)
+
+    def _write_rows(self, mapper: Mapper, objects: t.Sequence[Base]):
+        """Insert or update the rows of objects and set generated values on them."""
+        table = t.cast(sa.Table, mapper.local_table)
+        primary_key = [column.key for column in mapper.primary_key]
+
+        rows: dict[tuple, dict[str, t.Any]] = {}
+        objects_by_row: dict[tuple, list[Base]] = collections.defaultdict(list)
+        for number, obj in enumerate(objects):
+            values = self._values(obj)
+            row = {
+                prop.columns[0].key: values[prop.key]
+                for prop in mapper.column_attrs
+                if prop.key in values
+            }
+            key = tuple(row.get(column) for column in primary_key)
+            if None in key:
+                # generated primary key, always a new row
+                key = ('new', number)
+                row = {column: value for column, value in row.items() if value is not None}
+            else:
+                key = ('pk', *key)
+                row = {**rows.get(key, {}), **row}
+            rows[key] = row
+            objects_by_row[key].append(obj)
+
+        if self.identity_map is not None:
+            for key, row in list(rows.items()):
+                if key[0] == 'pk' and self.identity_map.matches(mapper, row):
+                    # unchanged, only take over generated values like ids
+                    known_row = self.identity_map.get_row(mapper, row)
+                    self._set_row_values(mapper, objects_by_row[key], known_row)
+                    self.identity_map.stage(mapper, {}, objects_by_row[key])
+                    del rows[key]
+
+        row_keys_by_columns: dict[frozenset[str], list[tuple]] = collections.defaultdict(list)
+        for key, row in rows.items():
+            row_keys_by_columns[frozenset(row)].append(key)
+
+        for columns, row_keys in row_keys_by_columns.items():
+            statement = insert(table)
+            if primary_key[0] in columns:
+                update_columns: dict[str, t.Any] = {
+                    column: statement.excluded[column]
+                    for column in columns
+                    if column not in primary_key
+                }
+                if 'updated_at' in table.c and 'updated_at' not in columns:
+                    update_columns['updated_at'] = sa.func.now()
+                if not update_columns:
+                    # no-op update, so that the row is returned
+                    update_columns = {primary_key[0]: statement.excluded[primary_key[0]]}
+                statement = statement.on_conflict_do_update(
+                    index_elements=primary_key, set_=update_columns
+                )
+
+            result = self.session.execute(
+                statement.returning(*table.c, sort_by_parameter_order=True),
+                [rows[key] for key in row_keys],
+            )
+
+            for key, returned in zip(row_keys, result):
+                row = {column.key: returned._mapping[column] for column in table.c}
+                self._set_row_values(mapper, objects_by_row[key], row)
+                if self.identity_map is not None:
+                    # compare later objects with the values as written, e.g. timezone-aware
+                    self.identity_map.stage(mapper, {**row, **rows[key]}, objects_by_row[key])
+
+        _logger.debug(f'Upserted {len(rows)} rows into {table.name}.')
+
+    @classmethod
+    def _set_row_values(
+        cls, mapper: Mapper, objects: t.Iterable[Base], row: t.Mapping[str, t.Any] | None
+    ):
+        """Set values of a row (by column key) on objects, where they are not set yet."""
+        for obj in objects:
+            values = cls._values(obj)
+            for prop in mapper.column_attrs:
+                if values.get(prop.key) is None and row is not None:
+                    setattr(obj, prop.key, row[prop.columns[0].key])
+
+    def _delete_orphans(
+        self,
+        mapper: Mapper,
+        relationship: RelationshipProperty,
+        parents: t.Sequence[Base],
+        children: t.Sequence[Base],
+    ):
+        """Delete children of parents in the database, which are not in the new children."""
+        parent_columns, child_columns = zip(*self._column_pairs(relationship))
+        parent_keys = {
+            tuple(getattr(parent, mapper.get_property_by_column(c).key) for c in parent_columns)
+            for parent in parents
+        }
+        condition: sa.ColumnElement[bool] = _columns_expression(child_columns).in_(
+            _key_values(parent_keys)
+        )
+
+        child_mapper = relationship.mapper
+        if children:
+            child_keys = {
+                tuple(
+                    getattr(child, child_mapper.get_property_by_column(c).key)
+                    for c in child_mapper.primary_key
+                )
+                for child in children
+            }
+            condition = sa.and_(
+                condition,
+                _columns_expression(child_mapper.primary_key).not_in(_key_values(child_keys)),
+            )
+
+        self._delete(child_mapper, condition)
+
+    def _delete(self, mapper: Mapper, condition: sa.ColumnElement[bool]):
+        """Delete rows matching condition, after deleting their delete-orphan children."""
+        for relationship in mapper.relationships:
+            if relationship.direction is ONETOMANY and relationship.cascade.delete_orphan:
+                parent_columns, child_columns = zip(*self._column_pairs(relationship))
+                self._delete(
+                    relationship.mapper,
+                    _columns_expression(child_columns).in_(
+                        sa.select(*parent_columns).where(condition)
+                    ),
+                )
+
+        self.session.execute(sa.delete(t.cast(sa.Table, mapper.local_table)).where(condition))
@@ -0,0 +1,148 @@
+"""Streaming loader of large text rows with PostgreSQL ``COPY FROM STDIN``."""
+import itertools
+import logging
+import typing as t
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from backend.app.db.database import Base
+
+_logger = logging.getLogger(__name__)
+
+
+COPY_BUFFER_SIZE = 1024 * 1024
+"""Number of characters sent to the database per read of the ``COPY`` stream."""
+
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\n': '\\n', '\r': '\\r', '\t': '\\t', '\x00': None})
+"""Escapes of the ``COPY`` text format. NUL characters cannot be stored in text columns."""
+
+
+class CopyStream:
+    """File-like object reading the lines of an iterator, as expected by ``copy_expert``.
+
+    Lines are only pulled from the iterator when the database reads the next chunk, so the memory
+    used is one line (i.e. one text) plus one chunk.
+    """
+
+    def __init__(self, lines: t.Iterator[str]):
+        self._lines = lines
+        self._line = ''
+        self._offset = 0
+
+    def read(self, size: int = -1) -> str:
+        if size < 0:
+            size = COPY_BUFFER_SIZE
+
+        chunks: list[str] = []
+        remaining = size
+        while remaining > 0:
+            if self._offset >= len(self._line):
+                line = next(self._lines, None)
+                if line is None:
+                    break
+                self._line, self._offset = line, 0
+
+            chunk = self._line[self._offset : self._offset + remaining]
+            self._offset += len(chunk)
+            remaining -= len(chunk)
+            chunks.append(chunk)
+
+        return ''.join(chunks)
+
+
+class TextCopyLoader:
+    """Loads the texts of parent objects, e.g. of Drucksachen, with one ``COPY`` per call.
+
+    The rows are streamed into a temporary staging table and merged set-based into the table of
+    ``model``, which holds at most one text per parent:
+
+    * texts of parents with a text are updated if they changed, otherwise inserted,
+    * texts of parents passed with ``None`` are deleted.
+
+    The caller is responsible for the commit, the staging table is dropped with it.
+    """
+
+    def __init__(self, session: Session, model: type[Base], parent_key: str):
+        """
+        Args:
+            session: Session the texts are written with.
+            model: Model of the text table, with columns ``text`` and ``parent_key``.
+            parent_key: Name of the column referencing the parent.
+        """
+        self.session = session
+        self.table: sa.Table = model.__table__
+        self.parent_key = parent_key
+
+    def _quote(self, name: str) -> str:
+        return self.session.get_bind().dialect.identifier_preparer.quote(name)
+
+    def _execute_dml(self, statement: str) -> int:
+        """Execute an SQL statement and return the number of rows it changed."""
+        return t.cast(sa.CursorResult, self.session.execute(sa.text(statement))).rowcount
+
+    @staticmethod
+    def _format_rows(rows: t.Iterable[tuple[int, str | None]]) -> t.Iterator[str]:
+        for position, (parent_id, text) in enumerate(rows):
+            value = r'\N' if text is None else text.translate(_COPY_ESCAPES)
+            yield f'{position}\t{int(parent_id)}\t{value}\n'
+
+    def load(self, rows: t.Iterable[tuple[int, str | None]]) -> int:
+        """Load ``(parent id, text)`` rows and return the number of rows read.
+
+        If a parent occurs more than once, its last text is loaded.
+        """
+        preparer = self.session.get_bind().dialect.identifier_preparer
+        target = preparer.format_table(self.table)
+        parent = self._quote(self.parent_key)
+        staging = self._quote(f'staging_{self.table.name}')
+
+        self.session.execute(
+            sa.text(
+                f'CREATE TEMPORARY TABLE IF NOT EXISTS {staging} '
+                '(position bigint NOT NULL, parent_id bigint NOT NULL, text text) ON COMMIT DROP'
+            )
+        )
+        self.session.execute(sa.text(f'TRUNCATE {staging}'))
+
+        # counts the rows while they are streamed
+        counter = itertools.count()
+        lines = (line for line, _ in zip(self._format_rows(rows), counter))
+        cursor = self.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f'COPY {staging} (position, parent_id, text) FROM STDIN',
+                CopyStream(lines),
+                size=COPY_BUFFER_SIZE,
+            )
+        finally:
+            cursor.close()
+        count = next(counter)
+
+        # keep the last text per parent
+        self.session.execute(
+            sa.text(
+                f'DELETE FROM {staging} AS s USING {staging} AS later '
+                'WHERE later.parent_id = s.parent_id AND later.position > s.position'
+            )
+        )
+        deleted = self._execute_dml(
+            f'DELETE FROM {target} AS t USING {staging} AS s '
+            f'WHERE t.{parent} = s.parent_id AND s.text IS NULL'
+        )
+        updated = self._execute_dml(
+            f'UPDATE {target} AS t SET text = s.text, updated_at = now() FROM {staging} AS s '
+            f'WHERE t.{parent} = s.parent_id AND s.text IS NOT NULL '
+            'AND t.text IS DISTINCT FROM s.text'
+        )
+        inserted = self._execute_dml(
+            f'INSERT INTO {target} ({parent}, text) SELECT s.parent_id, s.text '
+            f'FROM {staging} AS s WHERE s.text IS NOT NULL AND NOT EXISTS '
+            f'(SELECT 1 FROM {target} AS t WHERE t.{parent} = s.parent_id)'
+        )
+
+        _logger.debug(
+            f'Loaded {count} rows into {self.table.name}: {inserted} inserted, {updated} updated, '
+            f'{deleted} deleted.'
+        )
+        return count
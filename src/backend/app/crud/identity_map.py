@@ -0,0 +1,181 @@
+"""Import-scoped identity map of entities shared by many imported objects."""
+import collections
+import logging
+import typing as t
+import weakref
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapper, Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.interfaces import ONETOMANY
+
+from backend.app.db.database import Base
+
+_logger = logging.getLogger(__name__)
+
+
+IDENTITY_MAP_SIZE = 50000
+"""Maximal number of entities (instances and database rows) kept by an identity map."""
+
+PRELOAD_BATCH_SIZE = 1000
+"""Number of keys loaded with a single ``IN`` query by :meth:`IdentityMap.preload`."""
+
+ModelType = t.TypeVar('ModelType', bound=Base)
+
+_Key = tuple[type, tuple]
+
+
+class IdentityMap:
+    """Entities by primary key (e.g. ``biography_url`` of a person, id of a Vorgang), together with
+    the column values of their rows in the database.
+
+    * Transforms get a single instance per entity with :meth:`add`, instead of building a new one
+      for every object referencing it.
+    * Rows are known from :meth:`preload` (one query for many keys) or from being written in this
+      import, so :class:`BulkUpserter` skips writing rows whose values did not change and instances
+      which were already written as they are, including their related objects.
+
+    Rows written in a transaction are only taken over by :meth:`commit`. Instances and rows are
+    evicted in least recently used order beyond ``max_size``. The map is not thread-safe, as
+    :meth:`add` and :meth:`commit` modify the shared instances. It must only be used by the thread
+    persisting, e.g. in ``persist_batch`` of a pipelined import.
+    """
+
+    def __init__(self, max_size: int = IDENTITY_MAP_SIZE):
+        self.max_size = max_size
+        self._instances: collections.OrderedDict[_Key, Base] = collections.OrderedDict()
+        self._rows: collections.OrderedDict[_Key, dict[str, t.Any]] = collections.OrderedDict()
+        self._written: weakref.WeakSet[Base] = weakref.WeakSet()
+        self._pending_rows: dict[_Key, dict[str, t.Any]] = {}
+        self._pending_written: list[Base] = []
+
+    @staticmethod
+    def _key(mapper: Mapper, values: t.Mapping[str, t.Any]) -> _Key | None:
+        key = tuple(values.get(column.key) for column in mapper.primary_key)
+        return None if None in key else (mapper.class_, key)
+
+    @staticmethod
+    def _evict(entries: collections.OrderedDict, max_size: int):
+        while len(entries) > max_size:
+            entries.popitem(last=False)
+
+    def add(self, obj: ModelType) -> ModelType:
+        """Get the instance of the entity of ``obj``, adding ``obj`` if the entity is new.
+
+        Column values set on ``obj`` are copied to an existing instance, i.e. the latest values
+        win.
+        """
+        state = sa.inspect(obj)
+        key = self._key(state.mapper, state.dict)
+        if key is None:
+            return obj
+
+        existing = self._instances.get(key)
+        if existing is None:
+            self._instances[key] = obj
+            self._evict(self._instances, self.max_size)
+            return obj
+
+        self._instances.move_to_end(key)
+        for prop in state.mapper.column_attrs:
+            if prop.key in state.dict and getattr(existing, prop.key) != state.dict[prop.key]:
+                setattr(existing, prop.key, state.dict[prop.key])
+        return t.cast(ModelType, existing)
+
+    def preload(self, session: Session, model: type[Base], keys: t.Iterable[t.Any]):
+        """Load the rows of entities not yet known in bulk, e.g. all persons of a batch.
+
+        Keys are primary key values, tuples for composite primary keys.
+        """
+        mapper: Mapper = sa.inspect(model)
+        table = t.cast(sa.Table, mapper.local_table)
+        primary_key = list(mapper.primary_key)
+
+        missing = [
+            key
+            for key in dict.fromkeys(k if isinstance(k, tuple) else (k,) for k in keys)
+            if (model, key) not in self._rows
+        ]
+
+        for start in range(0, len(missing), PRELOAD_BATCH_SIZE):
+            chunk = missing[start : start + PRELOAD_BATCH_SIZE]
+            condition = (
+                primary_key[0].in_([key[0] for key in chunk])
+                if len(primary_key) == 1
+                else sa.tuple_(*primary_key).in_(chunk)
+            )
+            rows = session.execute(sa.select(table).where(condition)).mappings().all()
+
+            for row in rows:
+                values = {column.key: row[column.key] for column in table.c}
+                if (key := self._key(mapper, values)) is not None:
+                    self._rows[key] = values
+            self._evict(self._rows, self.max_size)
+
+            _logger.debug(f'Preloaded {len(rows)} of {len(chunk)} rows of {table.name}.')
+
+    def get_row(self, mapper: Mapper, values: t.Mapping[str, t.Any]) -> dict[str, t.Any] | None:
+        """Get the known column values of the row with the primary key in ``values``."""
+        key = self._key(mapper, values)
+        if key is None:
+            return None
+        row = self._rows.get(key)
+        if row is not None:
+            self._rows.move_to_end(key)
+        return row
+
+    def matches(self, mapper: Mapper, values: t.Mapping[str, t.Any]) -> bool:
+        """If the known row has the given column values (by column key)."""
+        row = self.get_row(mapper, values)
+        return row is not None and all(
+            column in row and row[column] == value for column, value in values.items()
+        )
+
+    def is_written(self, obj: Base) -> bool:
+        """If ``obj`` itself was written in this import and its column values did not change."""
+        if obj not in self._written:
+            return False
+
+        state = sa.inspect(obj)
+        return self.matches(
+            state.mapper,
+            {
+                prop.columns[0].key: state.dict[prop.key]
+                for prop in state.mapper.column_attrs
+                if prop.key in state.dict
+            },
+        )
+
+    def stage(self, mapper: Mapper, row: dict[str, t.Any], objects: t.Iterable[Base]):
+        """Remember a written row and the instances written to it (or skipped as unchanged), until
+        :meth:`commit`."""
+        key = self._key(mapper, row)
+        if key is not None:
+            self._pending_rows[key] = row
+        self._pending_written.extend(objects)
+
+    def commit(self):
+        """Take over the rows written by a committed transaction."""
+        self._rows.update(self._pending_rows)
+        self._evict(self._rows, self.max_size)
+        written = list(self._pending_written)
+        for obj in written:
+            self._written.add(obj)
+        self._pending_rows.clear()
+        self._pending_written.clear()
+
+        # reused instances must not keep the referencing objects of previous batches alive, which
+        # are added to their back-populated collections, e.g. the votes of a person
+        for obj in written:
+            for relationship in sa.inspect(obj).mapper.relationships:
+                if (
+                    relationship.direction is ONETOMANY
+                    and relationship.back_populates
+                    and not relationship.cascade.delete_orphan
+                ):
+                    set_committed_value(obj, relationship.key, [])
+
+    def rollback(self):
+        """Forget the rows written by a transaction which was rolled back."""
+        self._pending_rows.clear()
+        self._pending_written.clear()
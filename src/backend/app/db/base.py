@@ -44,3 +44,15 @@ from backend.app.models.dip.vorgangsposition_model import (  # pylint: disable=u
     DIPVorgangspositionbezug,
 )
 from backend.app.models.example_model import ExampleModel  # pylint: disable=unused-import
+from backend.app.models.importer.checkpoint_model import (  # pylint: disable=unused-import
+    ImportCheckpoint,
+)
+from backend.app.models.importer.dead_letter_model import (  # pylint: disable=unused-import
+    ImportDeadLetter,
+)
+from backend.app.models.importer.fingerprint_model import (  # pylint: disable=unused-import
+    ImportFingerprint,
+)
+from backend.app.models.importer.watermark_model import (  # pylint: disable=unused-import
+    ImportWatermark,
+)
@@ -0,0 +1,125 @@
+"""Asyncio HTTP facade."""
+
+import asyncio
+import concurrent.futures
+import functools
+import http
+import logging
+import queue
+import threading
+import typing as t
+
+import requests
+
+from backend.app.facades.facade import HttpFacade
+
+_logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_CONCURRENCY = 4
+"""Default number of requests allowed to be in flight at the same time."""
+
+BLOCKING_ITERATION_BUFFER = 100
+"""Maximal number of items produced ahead of the consumer of :func:`iterate_blocking`."""
+
+R = t.TypeVar('R')
+
+FacadeType = t.TypeVar('FacadeType', bound=HttpFacade)  # pylint: disable=invalid-name
+
+
+class AsyncHttpFacade(t.Generic[FacadeType]):
+    """Asyncio variant of the :class:`HttpFacade`.
+
+    The blocking facade is wrapped and its requests are executed on a bounded thread pool, so that
+    up to ``max_concurrency`` requests are in flight at the same time. Every request still goes
+    through ``_send_request`` of the wrapped facade, i.e. all of them share its rate budget, auth
+    handling and retries.
+    """
+
+    def __init__(self, facade: FacadeType, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1.')
+
+        self.facade = facade
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix=type(self).__name__
+        )
+        self.facade.set_connection_pool_size(max_concurrency)
+
+    async def __aenter__(self) -> t.Self:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self):
+        """Shut down the thread pool used for requests."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run_blocking(self, callable_: t.Callable[..., R], *args, **kwargs) -> R:
+        """Run a blocking callable on the request pool, bounded by ``max_concurrency``."""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(callable_, *args, **kwargs)
+            )
+
+    async def do_request(
+        self, method: http.HTTPMethod, url_path: str, **kwargs: t.Any
+    ) -> requests.Response:
+        """Execute http request with the wrapped facade, see :meth:`HttpFacade.do_request`."""
+        return await self.run_blocking(self.facade.do_request, method, url_path, **kwargs)
+
+
+class _IterationError(t.NamedTuple):
+    exception: BaseException
+
+
+_ITERATION_DONE = object()
+
+
+def iterate_blocking(
+    create_iterator: t.Callable[[], t.AsyncIterator[R]],
+    buffer_size: int = BLOCKING_ITERATION_BUFFER,
+) -> t.Iterator[R]:
+    """Consume an async iterator from blocking code, e.g. from an importer.
+
+    The iterator is created and consumed by an event loop in a separate thread, producing up to
+    ``buffer_size`` items ahead. Exceptions of the async iterator are raised to the caller. If the
+    caller stops early, the async iterator is closed.
+    """
+    items: queue.Queue = queue.Queue(maxsize=buffer_size)
+    stopped = threading.Event()
+
+    async def put(item: t.Any):
+        while not stopped.is_set():
+            try:
+                items.put_nowait(item)
+                return
+            except queue.Full:
+                await asyncio.sleep(0.01)
+
+    async def pump():
+        try:
+            async for item in create_iterator():
+                await put(item)
+                if stopped.is_set():
+                    break
+        except Exception as e:  # pylint: disable=broad-except  # re-raised by consumer
+            await put(_IterationError(e))
+        else:
+            await put(_ITERATION_DONE)
+
+    thread = threading.Thread(target=asyncio.run, args=(pump(),), name='iterate_blocking')
+    thread.start()
+
+    try:
+        while (item := items.get()) is not _ITERATION_DONE:
+            if isinstance(item, _IterationError):
+                raise item.exception
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
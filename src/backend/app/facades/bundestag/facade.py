@@ -2,12 +2,12 @@
 import http
 import logging
 import re
-import time
 import typing as t
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from email.utils import parsedate
 from functools import partial
 from io import StringIO
+from pathlib import Path
 from typing import Callable, Literal, TypeVar
 
 import requests
@@ -39,13 +39,14 @@ from backend.app.facades.facade import (
     Page,
     PageCursor,
 )
+from backend.app.facades.response_cache import CachePolicy, ResponseCache
 from backend.app.facades.util import ProxyList
+from backend.app.utils import get_data_folder
 
 _logger = logging.getLogger(__name__)
 
 PAGE_SIZE = 30
 """Number of elements returned in a single paged response."""
-DELAY_BETWEEN_REQUESTS = 0.3
 RequestParams = TypeVar("RequestParams", bound=BaseModel)
 
 MONTH_GERMAN_TO_ENGLISH = {
@@ -83,13 +84,50 @@ class BundestagFacade(HttpFacade):
         )
 
         auth = Auth(auth_type=AuthType.NONE)
-        return cls(base_url=configuration.BUNDESTAG_ABSTIMMUNGEN_URL, auth=auth)
+        facade = cls(
+            base_url=configuration.BUNDESTAG_ABSTIMMUNGEN_URL,
+            auth=auth,
+            requests_per_second=configuration.BUNDESTAG_REQUESTS_PER_SECOND,
+            max_concurrency=configuration.BUNDESTAG_MAX_CONCURRENT_REQUESTS,
+            burst=configuration.RATE_LIMIT_BURST,
+            rate_limit_state_dir=configuration.RATE_LIMIT_STATE_DIR,
+            response_cache=cls.get_response_cache(configuration),
+        )
+        facade.configure_transport(configuration, 'bundestag')
+        return facade
+
+    @staticmethod
+    def get_response_cache(configuration: Settings) -> ResponseCache | None:
+        """Cache for abstimmung pages, name lists and subtitles, which rarely change once published.
+
+        The paginated list of abstimmungen is not cached, as it is used to discover new votes. When
+        recording or replaying requests, the cache is disabled to keep recordings complete.
+        """
+        if not configuration.HTTP_CACHE_ENABLED or configuration.HTTP_TRANSPORT_MODE != 'live':
+            return None
+
+        ttl = timedelta(days=configuration.BUNDESTAG_CACHE_TTL_DAYS)
+        directory = (
+            Path(configuration.HTTP_CACHE_DIR)
+            if configuration.HTTP_CACHE_DIR
+            else get_data_folder() / 'cache' / 'http'
+        )
+
+        return ResponseCache(
+            directory=directory / 'bundestag',
+            policies=[
+                CachePolicy(r'/parlament/plenum/abstimmung/abstimmung$', ttl=ttl),
+                CachePolicy(r'/apps/na/na/namensliste\.form$', ttl=ttl),
+                CachePolicy(r'/pservices/player/vtt$', ttl=ttl),
+            ],
+            max_size_bytes=configuration.HTTP_CACHE_MAX_SIZE_MB * 1024 * 1024,
+        )
 
     def unpack_page(
         self,
         paged_response: requests.Response,
         callable_parse_content: Callable[[BeautifulSoup], t.Iterable[dict]],
-    ) -> Page:
+    ) -> Page[dict]:
         response_text = paged_response.text
 
         soup = BeautifulSoup(response_text, "html.parser")
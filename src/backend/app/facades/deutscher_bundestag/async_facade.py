@@ -0,0 +1,353 @@
+"""Asyncio DIP Bundestag facade."""
+import asyncio
+import http
+import logging
+import time
+import typing as t
+
+import requests
+from pydantic import BaseModel, ValidationError
+
+from backend.app.core.config import Settings
+from backend.app.facades.async_facade import AsyncHttpFacade
+from backend.app.facades.deutscher_bundestag.facade import (
+    DIPBundestagFacade,
+    as_document,
+    validate_page,
+)
+from backend.app.facades.deutscher_bundestag.model import (
+    Drucksache,
+    DrucksacheText,
+    Plenarprotokoll,
+    PlenarprotokollText,
+    Vorgang,
+    Vorgangsposition,
+)
+from backend.app.facades.deutscher_bundestag.parameter_model import (
+    CommonParameter,
+    DrucksacheParameter,
+    PlenarprotokollParameter,
+    VorgangParameter,
+    VorgangspositionParameter,
+)
+from backend.app.facades.deutscher_bundestag.sharding import merge_windows, plan_date_windows
+from backend.app.facades.util import ProxyList
+
+_logger = logging.getLogger(__name__)
+
+ModelType = t.TypeVar('ModelType', bound=BaseModel)  # pylint: disable=invalid-name
+ParameterType = t.TypeVar('ParameterType', bound=CommonParameter)  # pylint: disable=invalid-name
+
+
+class DocumentsPage(t.NamedTuple):
+    """Documents of a single DIP page together with the cursor returned with it."""
+
+    documents: t.Sequence[dict | BaseModel]
+    cursor: str | None
+
+
+class AsyncDIPBundestagFacade(AsyncHttpFacade[DIPBundestagFacade]):
+    """Asyncio facade implementation for DIP Bundestag.
+
+    The DIP cursor of a single query is strictly sequential, so pages of one query are fetched one
+    after another, while the next page is already requested as soon as the current one arrived.
+    Independent queries (e.g. Vorgaenge of many Drucksachen) can be consumed concurrently, with at
+    most ``max_concurrency`` requests in flight and all of them sharing one rate budget.
+
+    All ``get_*`` methods return the same pydantic models as :class:`DIPBundestagFacade`.
+    """
+
+    @classmethod
+    def get_instance(cls, configuration: Settings, max_concurrency: int | None = None) -> t.Self:
+        return cls(
+            facade=DIPBundestagFacade.get_instance(configuration),
+            max_concurrency=max_concurrency or configuration.DIP_BUNDESTAG_MAX_CONCURRENT_REQUESTS,
+        )
+
+    def _fetch_page(
+        self,
+        url: str,
+        params: dict,
+        proxy_list: ProxyList | None,
+        content_identifier: str,
+        document_model: type[BaseModel] | None = None,
+    ) -> DocumentsPage:
+        """Fetch and decode a single page (blocking, executed on the request pool).
+
+        With a ``document_model``, the page is validated as a whole, see :func:`validate_page`.
+        """
+        while True:
+            proxy = proxy_list.get_proxy() if proxy_list else None
+            start = time.monotonic()
+            try:
+                response = self.facade.do_request(
+                    http.HTTPMethod.GET,
+                    url,
+                    params=params,
+                    proxy=proxy,
+                )
+                if proxy_list and proxy:
+                    proxy_list.record_result(proxy, time.monotonic() - start, response.ok)
+                response.raise_for_status()
+                break
+            except (
+                requests.exceptions.ReadTimeout,
+                requests.exceptions.ConnectionError,
+            ) as e:
+                if not proxy_list:
+                    raise e
+                _logger.warning(f"Could not get response. Trying again with new proxy. Error: {e}")
+                proxy_list.set_random_proxy(test=True)
+
+        if document_model is not None and content_identifier == 'documents':
+            page = validate_page(response.content, document_model)
+            if page is not None:
+                return DocumentsPage(page.documents, page.cursor)
+
+        json_response = response.json()
+        return DocumentsPage(json_response[content_identifier], json_response['cursor'])
+
+    async def _do_paginated_request(
+        self,
+        url: str,
+        *,
+        content_identifier: str = 'documents',
+        params: dict | None = None,
+        proxy_list: ProxyList | None = None,
+        response_limit: t.Optional[int] = None,
+        document_model: type[BaseModel] | None = None,
+    ) -> t.AsyncIterator[dict | BaseModel]:
+        """Helper to execute paginated request for REST API, prefetching the next page."""
+
+        params = dict(params) if params else {}
+        cursor = params.get('cursor')
+
+        def fetch(page_params: dict) -> asyncio.Task[DocumentsPage]:
+            return asyncio.ensure_future(
+                self.run_blocking(
+                    self._fetch_page,
+                    url,
+                    page_params,
+                    proxy_list,
+                    content_identifier,
+                    document_model,
+                )
+            )
+
+        pending: asyncio.Task[DocumentsPage] | None = None
+        if response_limit is None or response_limit > 0:
+            pending = fetch(dict(params))
+
+        try:
+            while pending is not None:
+                page = await pending
+                pending = None
+
+                if page.cursor == cursor:
+                    # DIP returns the request cursor again if there are no more pages
+                    _logger.debug('Reached end of pages.')
+                    break
+
+                cursor = page.cursor
+                _logger.debug('cursor: %s', cursor)
+
+                if response_limit is not None:
+                    response_limit -= 1
+
+                if cursor and (response_limit is None or response_limit > 0):
+                    pending = fetch({**params, 'cursor': cursor})
+
+                for document in page.documents:
+                    yield document
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def _get_documents(
+        self,
+        url: str,
+        model: type[ModelType],
+        params: BaseModel | None,
+        response_limit: t.Optional[int],
+        proxy_list: ProxyList | None,
+        raise_on_error: bool,
+    ) -> t.AsyncIterator[ModelType]:
+        """Fetch all documents of a DIP list endpoint and validate them as ``model``."""
+
+        param_dict = (
+            params.model_dump(mode='json', exclude_none=True, by_alias=True) if params else None
+        )
+
+        _logger.debug("Fetching %s with params %s.", url, param_dict)
+
+        try:
+            async for document in self._do_paginated_request(
+                url,
+                params=param_dict,
+                response_limit=response_limit,
+                proxy_list=proxy_list,
+                document_model=model,
+            ):
+                try:
+                    yield as_document(model, document)
+                except ValidationError as e:
+                    _logger.error(
+                        f"Validation error while validating a {model.__name__} with params {param_dict}: {e}."
+                    )
+                    if raise_on_error:
+                        raise e
+        except Exception as e:
+            _logger.error(f"Error while fetching {url} with params {param_dict}: {e}.")
+            raise e
+
+    async def _get_sharded(
+        self,
+        endpoint: str,
+        get_documents: t.Callable[[ParameterType], t.AsyncIterator[ModelType]],
+        params: ParameterType,
+        window_count: int | None,
+    ) -> t.AsyncIterator[ModelType]:
+        """Split query into date windows and merge their concurrently fetched documents."""
+        windows = await plan_date_windows(
+            self, endpoint, params, window_count or self.max_concurrency
+        )
+        async for document in merge_windows(get_documents, params, windows):
+            yield document
+
+    async def get_count(
+        self, endpoint: str, params: BaseModel | None = None, proxy_list=None
+    ) -> int:
+        """Get count of elements for a given endpoint."""
+        return await self.run_blocking(self.facade.get_count, endpoint, params, proxy_list)
+
+    def get_drucksachen(
+        self,
+        params: DrucksacheParameter | None = None,
+        response_limit: t.Optional[int] = None,
+        proxy_list: ProxyList | None = None,
+        raise_on_error: bool = False,
+    ) -> t.AsyncIterator[Drucksache]:
+        """Get Drucksachen, see :meth:`DIPBundestagFacade.get_drucksachen`."""
+        return self._get_documents(
+            '/api/v1/drucksache', Drucksache, params, response_limit, proxy_list, raise_on_error
+        )
+
+    def get_drucksachen_sharded(
+        self,
+        params: DrucksacheParameter | None = None,
+        window_count: int | None = None,
+        proxy_list: ProxyList | None = None,
+        raise_on_error: bool = False,
+    ) -> t.AsyncIterator[Drucksache]:
+        """Get all Drucksachen, fetching ``window_count`` date windows concurrently.
+
+        See :func:`~backend.app.facades.deutscher_bundestag.sharding.plan_date_windows`.
+        """
+        return self._get_sharded(
+            '/api/v1/drucksache',
+            lambda window_params: self.get_drucksachen(
+                window_params, None, proxy_list, raise_on_error
+            ),
+            params or DrucksacheParameter(),
+            window_count,
+        )
+
+    def get_drucksachen_text(
+        self,
+        params: DrucksacheParameter | None = None,
+        response_limit: t.Optional[int] = None,
+        proxy_list: ProxyList | None = None,
+        raise_on_error: bool = False,
+    ) -> t.AsyncIterator[DrucksacheText]:
+        """Get Drucksachen-Text, see :meth:`DIPBundestagFacade.get_drucksachen_text`."""
+        return self._get_documents(
+            '/api/v1/drucksache-text',
+            DrucksacheText,
+            params,
+            response_limit,
+            proxy_list,
+            raise_on_error,
+        )
+
+    def get_vorgange(
+        self,
+        params: VorgangParameter | None = None,
+        response_limit: t.Optional[int] = None,
+        proxy_list: ProxyList | None = None,
+        raise_on_error: bool = False,
+    ) -> t.AsyncIterator[Vorgang]:
+        """Get Vorgaenge, see :meth:`DIPBundestagFacade.get_vorgange`."""
+        return self._get_documents(
+            '/api/v1/vorgang', Vorgang, params, response_limit, proxy_list, raise_on_error
+        )
+
+    def get_vorgange_sharded(
+        self,
+        params: VorgangParameter | None = None,
+        window_count: int | None = None,
+        proxy_list: ProxyList | None = None,
+        raise_on_error: bool = False,
+    ) -> t.AsyncIterator[Vorgang]:
+        """Get all Vorgaenge, fetching ``window_count`` date windows concurrently.
+
+        See :func:`~backend.app.facades.deutscher_bundestag.sharding.plan_date_windows`.
+        """
+        return self._get_sharded(
+            '/api/v1/vorgang',
+            lambda window_params: self.get_vorgange(
+                window_params, None, proxy_list, raise_on_error
+            ),
+            params or VorgangParameter(),
+            window_count,
+        )
+
+    def get_vorgangspositionen(
+        self,
+        params: VorgangspositionParameter | None = None,
+        response_limit: t.Optional[int] = None,
+        proxy_list: ProxyList | None = None,
+        raise_on_error: bool = False,
+    ) -> t.AsyncIterator[Vorgangsposition]:
+        """Get Vorgangspositionen, see :meth:`DIPBundestagFacade.get_vorgangspositionen`."""
+        return self._get_documents(
+            '/api/v1/vorgangsposition',
+            Vorgangsposition,
+            params,
+            response_limit,
+            proxy_list,
+            raise_on_error,
+        )
+
+    def get_plenarprotokolle(
+        self,
+        params: PlenarprotokollParameter | None = None,
+        response_limit: int = 1000,
+        proxy_list: ProxyList | None = None,
+        raise_on_error: bool = False,
+    ) -> t.AsyncIterator[Plenarprotokoll]:
+        """Get Plenarprotokolle, see :meth:`DIPBundestagFacade.get_plenarprotokolle`."""
+        return self._get_documents(
+            '/api/v1/plenarprotokoll',
+            Plenarprotokoll,
+            params,
+            response_limit,
+            proxy_list,
+            raise_on_error,
+        )
+
+    def get_plenarprotokolle_text(
+        self,
+        params: PlenarprotokollParameter | None = None,
+        response_limit: int = 1000,
+        proxy_list: ProxyList | None = None,
+        raise_on_error: bool = False,
+    ) -> t.AsyncIterator[PlenarprotokollText]:
+        """Get Plenarprotokolle-Text, see :meth:`DIPBundestagFacade.get_plenarprotokolle_text`."""
+        return self._get_documents(
+            '/api/v1/plenarprotokoll-text',
+            PlenarprotokollText,
+            params,
+            response_limit,
+            proxy_list,
+            raise_on_error,
+        )
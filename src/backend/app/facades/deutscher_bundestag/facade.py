@@ -1,4 +1,6 @@
 """DIP Bundestag facade."""
+import datetime
+import functools
 import http
 import logging
 import typing as t
@@ -7,7 +9,7 @@ from typing import TypeVar
 
 import requests
 from black import Mode
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
 from backend.app.core.config import Settings
 from backend.app.facades.deutscher_bundestag.model import (
@@ -37,6 +39,7 @@ from backend.app.facades.facade import (
     Page,
     PageCursor,
 )
+from backend.app.facades.json_stream import STREAM_CHUNK_SIZE, JsonObjectStream
 from backend.app.facades.util import Proxy, ProxyList, call_with_retries
 
 _logger = logging.getLogger(__name__)
@@ -47,6 +50,39 @@ PAGE_SIZE = 100
 
 RequestParams = TypeVar("RequestParams", bound=BaseModel)
 
+DocumentType = TypeVar("DocumentType", bound=BaseModel)  # pylint: disable=invalid-name
+
+
+class ValidatedPage(BaseModel, t.Generic[DocumentType]):
+    """Documents and cursor of a DIP page, other fields of the page are ignored."""
+
+    documents: list[DocumentType]
+    cursor: str | None = None
+
+
+@functools.cache
+def _page_adapter(model: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(ValidatedPage[model])  # type: ignore[valid-type]
+
+
+def validate_page(content: bytes, model: type[DocumentType]) -> ValidatedPage[DocumentType] | None:
+    """Validate the raw JSON of a DIP page with all its documents in one call.
+
+    No intermediate dicts are built for the documents, which saves CPU time and memory for pages
+    of large texts. ``None`` is returned if any document of the page is invalid, so that the caller
+    can fall back to validating the documents one by one, skipping or raising on invalid ones.
+    """
+    try:
+        return t.cast(ValidatedPage[DocumentType], _page_adapter(model).validate_json(content))
+    except ValidationError as e:
+        _logger.debug(f'Validation of {model.__name__} page failed, validating documents: {e}.')
+        return None
+
+
+def as_document(model: type[DocumentType], document: dict | BaseModel) -> DocumentType:
+    """Get a document as ``model``, validating it unless it was validated with its page."""
+    return document if isinstance(document, model) else model.model_validate(document)
+
 
 class DIPBundestagFacade(HttpFacade):
     """Facade implementation for a DIP Bundestag.
@@ -56,10 +92,18 @@ class DIPBundestagFacade(HttpFacade):
     """
 
     cursor: str | None = None
+    """Cursor of the next page of the current paginated request."""
+
+    page_cursor: str | None = None
+    """Cursor with which the page currently being consumed was requested, ``None`` for the first
+    page. Requesting it again returns the same page, so it is used to resume interrupted imports."""
 
     def get_cursor(self) -> str | None:
         return self.cursor
 
+    def get_page_cursor(self) -> str | None:
+        return self.page_cursor
+
     # pylint: disable=duplicate-code  # overriding do_request is similar in every facade
     def do_request(
         self,
@@ -78,6 +122,7 @@ class DIPBundestagFacade(HttpFacade):
         timeout: int = HTTP_REQUEST_DEFAULT_TIMEOUT_SECS,
         disable_retry: bool = False,
         base_url: t.Optional[str] = None,
+        stream: bool = False,
     ) -> requests.Response:
         """Execute http requests to external services.
 
@@ -88,6 +133,8 @@ class DIPBundestagFacade(HttpFacade):
         In case the request fails, the method will attempt to retry. By default, only HTTP codes >=
         500 will be reattempted. Use ``final_http_codes`` and ``retry_http_codes`` to modify this
         behavior.
+        Retried requests fail fast with :class:`CircuitOpenError` while the circuit of the host is
+        open, see :func:`call_with_retries`.
 
         Args:
             method: The http verb which should be used for the request.
@@ -103,6 +150,8 @@ class DIPBundestagFacade(HttpFacade):
             retry_http_codes: Additional http return codes which will be retried.
             timeout: Optional timeout value to change the default set in HTTP_REQUEST_TIMEOUT_SECS
             disable_retry: Optional flag to disable any retry in case of failures with default False
+            stream: Optional flag to read the body of the response incrementally, e.g. with
+                ``iter_content``, instead of loading it at once.
         Returns:
             The response of the request
 
@@ -162,15 +211,19 @@ class DIPBundestagFacade(HttpFacade):
                 timeout=timeout,
                 proxies=proxy_dict,
                 verify=proxy is None,
+                stream=stream,
             )
         else:
             response = call_with_retries(
                 self._send_request,
                 request,
                 retval_ok=is_response_final,
+                circuit_breaker=self.get_circuit_breaker(request.url or base_url),
+                on_retry=functools.partial(self._record_retry, request.url or base_url),
                 timeout=timeout,
                 proxies=proxy_dict,
                 verify=proxy is None,
+                stream=stream,
             )
 
         return response
@@ -185,27 +238,90 @@ class DIPBundestagFacade(HttpFacade):
         params: dict | None = None,
         proxy_list: ProxyList | None = None,
         response_limit: t.Optional[int] = None,
+        document_model: type[DocumentType] | None = None,
+        stream: bool = False,
         **kwargs,
-    ) -> t.Iterator[dict]:
-        """Helper to execute paginated request for REST API."""
+    ) -> t.Iterator[dict | DocumentType]:
+        """Helper to execute paginated request for REST API.
+
+        A ``cursor`` in ``params`` starts the pagination at the page of this cursor. With a
+        ``document_model``, pages are validated as a whole (see :func:`validate_page`) and valid
+        pages yield models instead of dicts.
+
+        If ``stream`` is set, documents are parsed one by one while the body of a page is read (see
+        :class:`JsonObjectStream`), so memory scales with a single document instead of a page. As
+        DIP sends the cursor after the documents, the next page is known only once a page was
+        consumed.
+
+        The final response repeats the cursor and the documents of the last page. In both modes,
+        documents of the previous page are skipped, so that every document is yielded once.
+        """
 
-        self.cursor = kwargs["start_cursor"] if "start_cursor" in kwargs else None
+        self.cursor = params.get('cursor') if params else None
+        self.page_cursor = self.cursor
+        previous_ids: list[set[t.Any]] = [set()]
+
+        def new_documents(
+            documents: t.Iterable[dict | DocumentType],
+        ) -> t.Iterator[dict | DocumentType]:
+            ids = set()
+            for document in documents:
+                document_id = (
+                    document.get('id')
+                    if isinstance(document, dict)
+                    else getattr(document, 'id', None)
+                )
+                ids.add(document_id)
+                if document_id is None or document_id not in previous_ids[0]:
+                    yield document
+            previous_ids[0] = ids
+
+        def unpack_streamed_page(paged_response: requests.Response) -> Page[dict | DocumentType]:
+            self.page_cursor = self.cursor
+            page = JsonObjectStream(
+                paged_response.iter_content(STREAM_CHUNK_SIZE), content_identifier
+            )
+            next_cursor: list[str | None] = [None]
 
-        def unpack_page(paged_response: requests.Response) -> Page:
-            json_response = content = paged_response.json()
-            content = json_response[content_identifier]
-            new_cursor = json_response['cursor']
+            def documents() -> t.Iterator[dict | DocumentType]:
+                try:
+                    yield from new_documents(page)
+                finally:
+                    paged_response.close()
+
+                new_cursor = page.fields['cursor']
+                if self.cursor != new_cursor:
+                    next_cursor[0] = new_cursor
+                self.cursor = new_cursor
+                _logger.debug('cursor: %s', self.cursor)
+
+            return Page(lambda: next_cursor[0], documents())
+
+        def unpack_page(paged_response: requests.Response) -> Page[dict | DocumentType]:
+            content: t.Sequence[dict | DocumentType]
+            page = None
+            if document_model is not None and content_identifier == 'documents':
+                page = validate_page(paged_response.content, document_model)
+            if page is not None:
+                content, new_cursor = page.documents, page.cursor
+            else:
+                json_response = paged_response.json()
+                content = json_response[content_identifier]
+                new_cursor = json_response['cursor']
             has_next_page = self.cursor != new_cursor
+            self.page_cursor = self.cursor
             self.cursor = new_cursor
             _logger.debug('cursor: %s', self.cursor)
 
-            if has_next_page:
-                # return new cursor, and add new content
-                return Page(new_cursor, content)
-            # there is no new page, return none as now new cursor and [] as content is already in from last iteration
-            return Page(None, [])
+            # the final page repeats the content of the last one
+            return Page(new_cursor if has_next_page else None, list(new_documents(content)))
 
-        def get_next_page_cursor(cursor: bool) -> PageCursor | None:
+        def get_next_page_cursor(
+            cursor: str | t.Callable[[], str | None] | None
+        ) -> PageCursor | None:
+            if callable(cursor):
+                # cursor of a streamed page, known after its documents were consumed
+                cursor = cursor()
             if cursor:
                 return PageCursor('cursor', cursor)
             return None
@@ -213,12 +329,13 @@ class DIPBundestagFacade(HttpFacade):
         yield from self.do_paginated_request(
             method,
             url,
-            unpack_page=unpack_page,
+            unpack_page=unpack_streamed_page if stream else unpack_page,
             get_next_page_cursor=get_next_page_cursor,
             params=params,
             proxy_list=proxy_list,
             response_limit=response_limit,
             page_args_path=page_args_path,
+            stream=stream,
             **kwargs,
         )
 
@@ -229,7 +346,16 @@ class DIPBundestagFacade(HttpFacade):
         auth = Auth(
             auth_type=AuthType.DIPBUNDESTAG_API_TOKEN, token=configuration.DIP_BUNDESTAG_API_KEY
         )
-        return cls(base_url=configuration.DIP_BUNDESTAG_BASE_URL, auth=auth)
+        facade = cls(
+            base_url=configuration.DIP_BUNDESTAG_BASE_URL,
+            auth=auth,
+            requests_per_second=configuration.DIP_BUNDESTAG_REQUESTS_PER_SECOND,
+            max_concurrency=configuration.DIP_BUNDESTAG_MAX_CONCURRENT_REQUESTS,
+            burst=configuration.RATE_LIMIT_BURST,
+            rate_limit_state_dir=configuration.RATE_LIMIT_STATE_DIR,
+        )
+        facade.configure_transport(configuration, 'dip_bundestag')
+        return facade
 
     def get_count(self, endpoint, params: BaseModel | None = None, proxy_list=None) -> int:
         """Helper to get count of elements for a given endpoint."""
@@ -263,6 +389,37 @@ class DIPBundestagFacade(HttpFacade):
             f"Response does not contain '{count_key}' for {endpoint} with params {param_dict}."
         )
 
+    def get_document_versions(
+        self,
+        endpoint: str,
+        params: BaseModel | None = None,
+        response_limit: t.Optional[int] = None,
+        proxy_list: ProxyList | None = None,
+    ) -> t.Iterator[tuple[int, datetime.datetime]]:
+        """Get id and ``aktualisiert`` of the documents of a list endpoint, e.g. to compare them
+        with the imported documents.
+
+        DIP does not allow selecting fields, so pages are streamed and only id and ``aktualisiert``
+        of each document are kept, without validating the documents.
+        """
+        param_dict = (
+            params.model_dump(mode='json', exclude_none=True, by_alias=True) if params else None
+        )
+
+        _logger.debug("Fetching versions of %s with params %s.", endpoint, param_dict)
+
+        for document in self._do_paginated_request(
+            http.HTTPMethod.GET,
+            endpoint,
+            page_args_path=PAGINATION_CONTENT_ARGS_REST,
+            content_identifier='documents',
+            params=param_dict,
+            response_limit=response_limit,
+            proxy_list=proxy_list,
+            stream=True,
+        ):
+            yield int(document['id']), datetime.datetime.fromisoformat(document['aktualisiert'])
+
     def get_drucksachen(
         self,
         params: DrucksacheParameter | None = None,
@@ -297,9 +454,10 @@ class DIPBundestagFacade(HttpFacade):
                 params=param_dict,
                 response_limit=response_limit,
                 proxy_list=proxy_list,
+                document_model=Drucksache,
             ):
                 try:
-                    yield Drucksache.model_validate(drucksache)
+                    yield as_document(Drucksache, drucksache)
                 except ValidationError as e:
                     _logger.error(
                         f"Validation error while validating a DRUCKSACHE with params {param_dict} at cursor {self.cursor}: {e}."
@@ -316,6 +474,7 @@ class DIPBundestagFacade(HttpFacade):
         response_limit: t.Optional[int] = None,
         proxy_list: ProxyList | None = None,
         raise_on_error: bool = False,
+        stream: bool = False,
     ) -> t.Iterator[DrucksacheText]:
         """Get Drucksachen-Text.
         https://search.dip.bundestag.de/api/v1/swagger-ui/#/Drucksachen/getDrucksacheTextList
@@ -323,6 +482,8 @@ class DIPBundestagFacade(HttpFacade):
         Args:
             since_datetime
                 Updated later than since_date, in format YYYY-MM-DDTHH:mm:ss, e.g.2023-11-14T04:28:00.
+            stream
+                Parse Drucksachen one by one while a page is read, to save memory.
 
         Returns:
             drucksachen_text (Iterator[DrucksacheText]): An iterator of DrucksacheText objects.
@@ -343,9 +504,11 @@ class DIPBundestagFacade(HttpFacade):
                 params=param_dict,
                 response_limit=response_limit,
                 proxy_list=proxy_list,
+                document_model=None if stream else DrucksacheText,
+                stream=stream,
             ):
                 try:
-                    yield DrucksacheText.model_validate(drucksache_text)
+                    yield as_document(DrucksacheText, drucksache_text)
                 except ValidationError as e:
                     _logger.error(
                         f"Validation error while validating a DRUCKSACHE_TEXT with params {param_dict} at cursor {self.cursor}: {e}."
@@ -388,9 +551,10 @@ class DIPBundestagFacade(HttpFacade):
                 params=param_dict,
                 response_limit=response_limit,
                 proxy_list=proxy_list,
+                document_model=Vorgang,
             ):
                 try:
-                    yield Vorgang.model_validate(vorgang)
+                    yield as_document(Vorgang, vorgang)
                 except ValidationError as e:
                     _logger.error(
                         f"Validation error while validating a VORGANG with params {param_dict} at cursor {self.cursor}: {e}."
@@ -466,9 +630,10 @@ class DIPBundestagFacade(HttpFacade):
                 params=param_dict,
                 response_limit=response_limit,
                 proxy_list=proxy_list,
+                document_model=Vorgangsposition,
             ):
                 try:
-                    yield Vorgangsposition.model_validate(vorgangsposition)
+                    yield as_document(Vorgangsposition, vorgangsposition)
                 except ValidationError as e:
                     _logger.error(
                         f"Validation error while validating a VORGANGSPOSITION with params {param_dict} at cursor {self.cursor}: {e}."
@@ -515,9 +680,10 @@ class DIPBundestagFacade(HttpFacade):
                 params=param_dict,
                 response_limit=response_limit,
                 proxy_list=proxy_list,
+                document_model=Plenarprotokoll,
             ):
                 try:
-                    yield Plenarprotokoll.model_validate(plenarprotokoll)
+                    yield as_document(Plenarprotokoll, plenarprotokoll)
                 except ValidationError as e:
                     _logger.error(
                         f"Validation error while validating a PLENARPROTOKOLL with params {param_dict} at cursor {self.cursor}: {e}."
@@ -534,6 +700,7 @@ class DIPBundestagFacade(HttpFacade):
         response_limit: int = 1000,
         proxy_list: ProxyList | None = None,
         raise_on_error: bool = False,
+        stream: bool = False,
     ) -> t.Iterator[PlenarprotokollText]:
         """Get Plenarprotokolle-Text.
         https://search.dip.bundestag.de/api/v1/swagger-ui/#/Plenarprotokolle/getPlenarprotokollTextList
@@ -544,6 +711,8 @@ class DIPBundestagFacade(HttpFacade):
             zuordnung (str):
                 Possible values are, BT, BR, BV, EK. Default is BT for Bundestag.
                 (For now only the only part we are interested, that's why BT set as default.)
+            stream (bool):
+                Parse Plenarprotokolle one by one while a page is read, to save memory.
         Returns:
             plenarprotokolle_text (Iterator[PlenarprotokollText]):
                 An iterator of Plenarprotokoll-Text objects.
@@ -564,9 +733,11 @@ class DIPBundestagFacade(HttpFacade):
                 params=param_dict,
                 response_limit=response_limit,
                 proxy_list=proxy_list,
+                document_model=None if stream else PlenarprotokollText,
+                stream=stream,
             ):
                 try:
-                    yield PlenarprotokollText.model_validate(plenarprotokoll_text)
+                    yield as_document(PlenarprotokollText, plenarprotokoll_text)
                 except ValidationError as e:
                     _logger.error(
                         f"Validation error while validating a PLENARPROTOKOLL_TEXT with params {param_dict} at cursor {self.cursor}: {e}."
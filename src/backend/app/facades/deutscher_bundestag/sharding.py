@@ -0,0 +1,163 @@
+"""Sharding of DIP list queries into date windows, which are fetched concurrently.
+
+The cursor of a DIP query is strictly sequential, so one query is fetched one page at a time. A
+query over a long ``aktualisiert`` range is therefore split into windows of roughly equal numbers
+of documents (using the ``numFound`` count of DIP), whose cursor chains run concurrently.
+"""
+import asyncio
+import dataclasses
+import datetime
+import logging
+import math
+import typing as t
+
+from pydantic import BaseModel
+
+from backend.app.facades.deutscher_bundestag.parameter_model import CommonParameter
+
+if t.TYPE_CHECKING:
+    from backend.app.facades.deutscher_bundestag.async_facade import AsyncDIPBundestagFacade
+
+_logger = logging.getLogger(__name__)
+
+
+DIP_EPOCH = datetime.datetime(1949, 9, 7)
+"""Start of the 1st Bundestag, used as start of a range without ``aktualisiert_start``."""
+
+MIN_WINDOW = datetime.timedelta(seconds=1)
+"""Windows are not split further than this, as DIP filters ``aktualisiert`` with seconds."""
+
+SPLIT_FACTOR = 4
+"""Windows are bisected down to ``1 / SPLIT_FACTOR`` of their target size before being merged."""
+
+MERGE_QUEUE_SIZE = 1000
+"""Maximal number of documents fetched ahead of the consumer of a sharded query."""
+
+ParameterType = t.TypeVar('ParameterType', bound=CommonParameter)
+ModelType = t.TypeVar('ModelType', bound=BaseModel)
+
+
+@dataclasses.dataclass(frozen=True)
+class DateWindow:
+    """Window of ``aktualisiert`` dates (both inclusive) with the number of documents in it."""
+
+    start: datetime.datetime
+    end: datetime.datetime
+    count: int
+
+    def apply(self, params: ParameterType) -> ParameterType:
+        """Get copy of params restricted to this window."""
+        return params.model_copy(
+            update={'aktualisiert_start': self.start, 'aktualisiert_end': self.end, 'cursor': None}
+        )
+
+
+async def plan_date_windows(
+    facade: 'AsyncDIPBundestagFacade',
+    endpoint: str,
+    params: ParameterType,
+    window_count: int,
+    min_window: datetime.timedelta = MIN_WINDOW,
+) -> list[DateWindow]:
+    """Split the ``aktualisiert`` range of params into windows of roughly equal size.
+
+    The range is bisected until no window holds more than a fraction of the target size (all
+    documents divided by ``window_count``), counting both halves of a window concurrently.
+    Afterwards, adjacent windows are merged again up to the target size. Windows holding more
+    documents, but not being longer than ``min_window``, are not split further.
+
+    Args:
+        facade: Facade used to count the documents of a window.
+        endpoint: DIP list endpoint, e.g. ``/api/v1/drucksache``.
+        params: Parameters of the query. A missing start or end of the range is replaced by
+            :data:`DIP_EPOCH` and the current time.
+        window_count: Desired number of windows.
+        min_window: Minimal length of a window.
+    """
+    if window_count < 1:
+        raise ValueError('window_count must be at least 1.')
+
+    end = params.aktualisiert_end or datetime.datetime.now(
+        params.aktualisiert_start.tzinfo if params.aktualisiert_start else None
+    )
+    start = params.aktualisiert_start or DIP_EPOCH.replace(tzinfo=end.tzinfo)
+
+    async def count(window_start: datetime.datetime, window_end: datetime.datetime) -> DateWindow:
+        window = DateWindow(window_start, window_end, 0)
+        return dataclasses.replace(
+            window, count=await facade.get_count(endpoint, window.apply(params))
+        )
+
+    total = await count(start, end)
+    target = max(1, math.ceil(total.count / window_count))
+    split_target = max(1, target // SPLIT_FACTOR)
+
+    async def bisect(window: DateWindow) -> list[DateWindow]:
+        if window.count <= split_target or window.end - window.start <= min_window:
+            return [window]
+
+        middle = (window.start + (window.end - window.start) / 2).replace(microsecond=0)
+        halves = await asyncio.gather(count(window.start, middle), count(middle, window.end))
+        results = await asyncio.gather(*(bisect(half) for half in halves if half.count > 0))
+        return [leaf for result in results for leaf in result]
+
+    windows: list[DateWindow] = []
+    for leaf in await bisect(total):
+        previous = windows[-1] if windows else None
+        if previous is not None and previous.count + leaf.count <= target:
+            windows[-1] = DateWindow(previous.start, leaf.end, previous.count + leaf.count)
+        else:
+            windows.append(leaf)
+
+    _logger.debug(
+        f'Split {endpoint} from {start} to {end} ({total.count} documents) into '
+        f'{len(windows)} windows: {[window.count for window in windows]}.'
+    )
+    return windows
+
+
+_WINDOW_DONE = object()
+
+
+async def merge_windows(
+    get_documents: t.Callable[[ParameterType], t.AsyncIterator[ModelType]],
+    params: ParameterType,
+    windows: t.Sequence[DateWindow],
+) -> t.AsyncIterator[ModelType]:
+    """Fetch all windows concurrently and merge them into one stream of unique documents.
+
+    Documents are yielded in the order they arrive. As windows share their boundaries, documents
+    updated at a boundary are returned by two windows, so duplicates are dropped by their ``id``.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=MERGE_QUEUE_SIZE)
+
+    async def produce(window: DateWindow):
+        try:
+            async for document in get_documents(window.apply(params)):
+                await queue.put(document)
+        except Exception as e:  # pylint: disable=broad-except  # re-raised by consumer
+            await queue.put(e)
+        else:
+            await queue.put(_WINDOW_DONE)
+
+    tasks = [asyncio.ensure_future(produce(window)) for window in windows]
+    seen_ids: set[int] = set()
+    remaining = len(tasks)
+
+    try:
+        while remaining:
+            item = await queue.get()
+            if item is _WINDOW_DONE:
+                remaining -= 1
+                continue
+            if isinstance(item, Exception):
+                raise item
+
+            if item.id in seen_ids:
+                continue
+            seen_ids.add(item.id)
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -3,17 +3,40 @@
 import collections.abc
 import dataclasses
 import enum
+import functools
 import http
 import logging
+import re
 import time
 import typing as t
 import urllib.parse
 
 import pydantic as pyd
 import requests
+import requests.adapters
 
 from backend.app.core.config import Settings
-from backend.app.facades.util import Proxy, ProxyList, call_with_retries
+from backend.app.core.metrics import REGISTRY
+from backend.app.facades.rate_limiter import (
+    DEFAULT_BURST,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_REQUESTS_PER_SECOND,
+    AdaptiveConcurrencyLimiter,
+    TokenBucket,
+    get_concurrency_limiter,
+    get_concurrency_limits,
+    get_rate_limiter,
+)
+from backend.app.facades.response_cache import ResponseCache
+from backend.app.facades.transport import SessionTransport, Transport, get_transport
+from backend.app.facades.util import (
+    CircuitBreaker,
+    Proxy,
+    ProxyList,
+    call_with_retries,
+    get_circuit_breaker,
+    get_retry_after,
+)
 
 _logger = logging.getLogger(__name__)
 
@@ -24,16 +47,49 @@ LIMIT_PAGES = 10
 HTTP_REQUEST_DEFAULT_TIMEOUT_SECS = 30
 """Maximum time before an HTTP request times out."""
 
-DELAY_BETWEEN_REQUESTS = 0.5
-"""Default delay between requests to avoid overstraining the API."""
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds',
+    'Seconds from sending an HTTP request until its response (headers) arrived.',
+    ('facade', 'endpoint'),
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    'http_requests', 'HTTP requests sent, by status code.', ('facade', 'endpoint', 'status')
+)
+HTTP_RESPONSE_BYTES = REGISTRY.histogram(
+    'http_response_bytes',
+    'Size of HTTP response bodies.',
+    ('facade', 'endpoint'),
+    buckets=(1e3, 1e4, 1e5, 1e6, 1e7, 1e8),
+)
+HTTP_RETRIES = REGISTRY.counter('http_retries', 'Retried HTTP requests.', ('facade', 'endpoint'))
+HTTP_LIMITER_WAIT_SECONDS = REGISTRY.counter(
+    'http_limiter_wait_seconds',
+    'Seconds waited for the rate or concurrency limit of a host.',
+    ('facade', 'host', 'limiter'),
+)
+HTTP_PAGE_DOCUMENTS = REGISTRY.histogram(
+    'http_page_documents',
+    'Number of documents of a page of a paginated request.',
+    ('facade', 'endpoint'),
+    buckets=(0, 1, 10, 25, 50, 100, 250, 500, 1000),
+)
+HTTP_CONCURRENCY_LIMIT = REGISTRY.gauge(
+    'http_concurrency_limit',
+    'Current adaptive concurrency limit of a host.',
+    ('host',),
+    callback=lambda: {(host,): limit for host, limit in get_concurrency_limits().items()},
+)
+
+
+ItemType = t.TypeVar('ItemType')  # pylint: disable=invalid-name
 
 
 @dataclasses.dataclass
-class Page:
+class Page(t.Generic[ItemType]):
     """Page of a paginated request with content consisting of the elements in current page."""
 
     page_info: t.Any
-    content: t.Iterable[dict]
+    content: t.Iterable[ItemType]
 
 
 @dataclasses.dataclass
@@ -91,27 +147,90 @@ class HttpFacade:
     magic and only needs the request specific parameters like url path and so on.
     """
 
+    response_limit_reached: bool = False
+    """If the last paginated request stopped at its ``response_limit`` before the last page."""
+
     def __init__(
-        self, base_url: str, auth: Auth, delay_between_requests: float = DELAY_BETWEEN_REQUESTS
+        self,
+        base_url: str,
+        auth: Auth,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        burst: float = DEFAULT_BURST,
+        rate_limit_state_dir: str | None = None,
+        response_cache: ResponseCache | None = None,
+        transport: Transport | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
     ):
         self.base_url = base_url
         self.auth = auth
         self._session = requests.Session()
-        self.last_request = None
-        self.delay_between_requests = delay_between_requests
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.rate_limit_state_dir = rate_limit_state_dir
+        self.max_concurrency = max_concurrency
+        self.response_cache = response_cache
+        self.transport = transport or SessionTransport(self._session)
 
     @classmethod
     def get_instance(cls, settings: Settings):
         raise NotImplementedError()
 
-    def _wait_delay(self):
-        """Wait for delay between requests."""
-        if self.delay_between_requests:
-            if self.last_request:
-                time_since_last_request = time.time() - self.last_request
-                if time_since_last_request < self.delay_between_requests:
-                    time.sleep(self.delay_between_requests - time_since_last_request)
-        self.last_request = time.time()
+    def configure_transport(self, configuration: Settings, name: str):
+        """Use the transport configured in settings (live, record or replay), see get_transport."""
+        self.transport = get_transport(configuration, self._session, name)
+
+    def set_connection_pool_size(self, pool_size: int):
+        """Resize the connection pool of the session to allow ``pool_size`` parallel requests."""
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    def get_rate_limiter(self, url: str) -> TokenBucket:
+        """Get the rate limiter of the host of ``url``, shared by all facades of the process."""
+        return get_rate_limiter(
+            urllib.parse.urlsplit(url).netloc,
+            rate=self.requests_per_second,
+            capacity=self.burst,
+            state_dir=self.rate_limit_state_dir,
+        )
+
+    def get_concurrency_limiter(self, url: str) -> AdaptiveConcurrencyLimiter:
+        """Get the adaptive concurrency limiter of the host of ``url``, shared by all facades of the
+        process."""
+        return get_concurrency_limiter(
+            urllib.parse.urlsplit(url).netloc, max_limit=self.max_concurrency
+        )
+
+    def _metric_labels(self, url: str) -> dict[str, str]:
+        """Labels of request metrics, with ids in the path replaced to bound their number."""
+        return {
+            'facade': type(self).__name__,
+            'endpoint': re.sub(r'\d+', '{id}', urllib.parse.urlsplit(url).path),
+        }
+
+    def _record_request(
+        self, url: str, seconds: float, response: requests.Response | None, stream: bool
+    ):
+        """Record duration, status and size of a request sent to the network (or replayed)."""
+        labels = self._metric_labels(url)
+        HTTP_REQUEST_SECONDS.observe(seconds, **labels)
+        HTTP_REQUESTS.inc(
+            **labels, status=str(response.status_code) if response is not None else 'error'
+        )
+
+        if response is None:
+            return
+        if not stream:
+            HTTP_RESPONSE_BYTES.observe(len(response.content), **labels)
+        elif (content_length := response.headers.get('Content-Length', '')).isdigit():
+            HTTP_RESPONSE_BYTES.observe(int(content_length), **labels)
+
+    def _record_retry(self, url: str):
+        HTTP_RETRIES.inc(**self._metric_labels(url))
+
+    def get_circuit_breaker(self, url: str) -> CircuitBreaker:
+        """Get the circuit breaker of the host of ``url``, shared by all facades of the process."""
+        return get_circuit_breaker(urllib.parse.urlsplit(url).netloc)
 
     def _send_request(
         self,
@@ -119,19 +238,91 @@ class HttpFacade:
         timeout: int = HTTP_REQUEST_DEFAULT_TIMEOUT_SECS,
         proxies: dict | None = None,
         verify: bool = True,
+        stream: bool = False,
     ) -> requests.Response:
-        """Send request with session."""
-        self._wait_delay()
+        """Send request, served from the response cache if possible.
+
+        Fresh cache entries are returned without contacting the server. Expired entries are
+        revalidated with a conditional request, if the server sent an ETag or Last-Modified header.
+        Responses stored in the cache are read completely, even if ``stream`` is set.
+        """
+        cache = self.response_cache
+        policy = cache.policy_for(request.method, request.url) if cache else None
 
-        _logger.debug(f'Sending request to {request.url}. Timer: {self.last_request}.')
+        if cache is None or policy is None:
+            return self._send_uncached_request(request, timeout, proxies, verify, stream)
 
-        return self._session.send(
-            request=request,
-            timeout=timeout,
-            proxies=proxies,
-            verify=verify,
-            allow_redirects=False,
-        )
+        entry = cache.get(request)
+        if entry is not None and entry.is_fresh(policy):
+            if cached_response := cache.read_response(entry, request):
+                _logger.debug(f'Serving {request.url} from response cache.')
+                return cached_response
+
+        if entry is not None and policy.revalidate:
+            request.headers.update(entry.validator_headers())
+
+        response = self._send_uncached_request(request, timeout, proxies, verify, stream)
+
+        if response.status_code == http.HTTPStatus.NOT_MODIFIED and entry is not None:
+            cache.refresh(entry, response)
+            if cached_response := cache.read_response(entry, request):
+                _logger.debug(f'Revalidated {request.url} in response cache.')
+                return cached_response
+
+        if response.status_code == http.HTTPStatus.OK:
+            cache.store(request, response)
+
+        return response
+
+    def _send_uncached_request(
+        self,
+        request: requests.PreparedRequest,
+        timeout: int,
+        proxies: dict | None,
+        verify: bool,
+        stream: bool = False,
+    ) -> requests.Response:
+        """Send request with transport, after waiting for the rate and concurrency limit of the
+        target host.
+
+        The outcome of live requests adapts the concurrency limit of the host, see
+        :class:`AdaptiveConcurrencyLimiter`. Duration, status and size of all requests as well as
+        the time waited for the limits are recorded as metrics.
+        """
+        url = request.url or self.base_url
+        concurrency_limiter = None
+        if self.transport.is_live:
+            wait_labels = {
+                'facade': type(self).__name__,
+                'host': urllib.parse.urlsplit(url).netloc,
+            }
+            concurrency_limiter = self.get_concurrency_limiter(url)
+            concurrency_waited = concurrency_limiter.acquire()
+            HTTP_LIMITER_WAIT_SECONDS.inc(concurrency_waited, **wait_labels, limiter='concurrency')
+
+        started = time.monotonic()
+        try:
+            if concurrency_limiter is not None:
+                rate_waited = self.get_rate_limiter(url).acquire()
+                HTTP_LIMITER_WAIT_SECONDS.inc(rate_waited, **wait_labels, limiter='rate')
+                _logger.debug(
+                    f'Sending request to {request.url}. Waited '
+                    f'{concurrency_waited + rate_waited:.2f}s for rate and concurrency limit.'
+                )
+                started = time.monotonic()
+            response = self.transport.send(request, timeout, proxies, verify, stream)
+        except Exception:
+            latency = time.monotonic() - started
+            if concurrency_limiter is not None:
+                concurrency_limiter.release(latency, None)
+            self._record_request(url, latency, None, stream)
+            raise
+
+        latency = time.monotonic() - started
+        if concurrency_limiter is not None:
+            concurrency_limiter.release(latency, response.status_code, get_retry_after(response))
+        self._record_request(url, latency, response, stream)
+        return response
 
     def do_request(
         self,
@@ -150,6 +341,7 @@ class HttpFacade:
         timeout: int = HTTP_REQUEST_DEFAULT_TIMEOUT_SECS,
         disable_retry: bool = False,
         base_url: t.Optional[str] = None,
+        stream: bool = False,
     ) -> requests.Response:
         """Execute http requests to external services.
 
@@ -160,6 +352,8 @@ class HttpFacade:
         In case the request fails, the method will attempt to retry. By default, only HTTP codes >=
         500 will be reattempted. Use ``final_http_codes`` and ``retry_http_codes`` to modify this
         behavior.
+        Retried requests fail fast with :class:`CircuitOpenError` while the circuit of the host is
+        open, see :func:`call_with_retries`.
 
         Args:
             method: The http verb which should be used for the request.
@@ -175,6 +369,8 @@ class HttpFacade:
             retry_http_codes: Additional http return codes which will be retried.
             timeout: Optional timeout value to change the default set in HTTP_REQUEST_TIMEOUT_SECS
             disable_retry: Optional flag to disable any retry in case of failures with default False
+            stream: Optional flag to read the body of the response incrementally, e.g. with
+                ``iter_content``, instead of loading it at once.
             base_url: Optional base url to be used instead of the one defined in the instance.
         Returns:
             The response of the request
@@ -233,16 +429,23 @@ class HttpFacade:
 
         if disable_retry:
             response = self._send_request(
-                request=request, timeout=timeout, proxies=proxy_dict, verify=proxy is None
+                request=request,
+                timeout=timeout,
+                proxies=proxy_dict,
+                verify=proxy is None,
+                stream=stream,
             )
         else:
             response = call_with_retries(
                 self._send_request,
                 request,
                 retval_ok=is_response_final,
+                circuit_breaker=self.get_circuit_breaker(request.url or base_url),
+                on_retry=functools.partial(self._record_retry, request.url or base_url),
                 timeout=timeout,
                 proxies=proxy_dict,
                 verify=proxy is None,
+                stream=stream,
             )
 
         return response
@@ -250,14 +453,14 @@ class HttpFacade:
     def do_paginated_request(
         self,
         *args,
-        unpack_page: t.Callable[[requests.Response], Page],
+        unpack_page: t.Callable[[requests.Response], Page[ItemType]],
         get_next_page_cursor: t.Callable[[t.Any], t.Optional[PageCursor]],
         page_args_path: tuple[str, ...] = PAGINATION_ARGS_REST,
         params: t.Optional[dict],
         proxy_list: t.Optional[ProxyList] = None,
         response_limit: t.Optional[int] = None,
         **kwargs,
-    ) -> collections.abc.Iterator[dict]:
+    ) -> collections.abc.Iterator[ItemType]:
         """Execute paginated http requests to external services.
 
         Preparation of a paginated request includes defining callables to unpack the response, get
@@ -279,10 +482,12 @@ class HttpFacade:
                 Optional params of request
 
             proxy_list:
-                Optional proxy list to be used for the request.
+                Optional proxy list to be used for the request. The outcome of each request is
+                recorded in the health of the proxy, see :meth:`ProxyList.record_result`.
 
             response_limit:
                 Optional limit of requests to be executed. If not given, all pages are returned.
+                If pages are left, :attr:`response_limit_reached` is set after the last one.
 
         Returns:
             Yields the unpacked content of each page.
@@ -291,15 +496,20 @@ class HttpFacade:
         if params is None:
             params = {}
 
+        self.response_limit_reached = False
         reached_end = False
         while not reached_end and (response_limit is None or response_limit > 0):
+            proxy = proxy_list.get_proxy() if proxy_list else None
+            start = time.monotonic()
             try:
                 response = self.do_request(
                     *args,
                     **kwargs,
                     params=params,
-                    proxy=proxy_list.get_proxy() if proxy_list else None,
+                    proxy=proxy,
                 )
+                if proxy_list and proxy:
+                    proxy_list.record_result(proxy, time.monotonic() - start, response.ok)
                 response.raise_for_status()
             except (
                 requests.exceptions.ReadTimeout,
@@ -314,10 +524,15 @@ class HttpFacade:
 
             page = unpack_page(response)
 
-            if isinstance(page.content, collections.abc.Sequence) or isinstance(
-                page.content, t.Generator
-            ):
+            if isinstance(page.content, collections.abc.Sequence):
+                HTTP_PAGE_DOCUMENTS.observe(len(page.content), **self._metric_labels(response.url))
                 yield from page.content
+            elif isinstance(page.content, t.Generator):
+                documents = 0
+                for document in page.content:
+                    documents += 1
+                    yield document
+                HTTP_PAGE_DOCUMENTS.observe(documents, **self._metric_labels(response.url))
             else:
                 raise NotImplementedError(f'Unexpected page content type {type(page.content)}.')
 
@@ -330,3 +545,5 @@ class HttpFacade:
 
             if response_limit is not None:
                 response_limit -= 1
+
+        self.response_limit_reached = not reached_end
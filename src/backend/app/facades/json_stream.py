@@ -0,0 +1,123 @@
+"""Incremental parsing of JSON responses with a large array, e.g. DIP pages of full texts."""
+import codecs
+import json
+import re
+import typing as t
+
+STREAM_CHUNK_SIZE = 64 * 1024
+"""Number of bytes read from a streamed response at once."""
+
+_WHITESPACE = ' \t\n\r'
+
+_VALUE_END = re.compile(r'[ \t\n\r,\]}]')
+"""Characters which may follow a complete value within an object or array."""
+
+
+class JsonObjectStream:
+    """Parses a JSON object from chunks of bytes, yielding the items of one of its arrays.
+
+    Only the item currently being parsed is kept in memory, instead of the whole document. Items
+    are decoded with :meth:`json.JSONDecoder.raw_decode` once they are complete, the other fields
+    of the object are available in :attr:`fields` once the object was parsed completely, i.e. after
+    iterating all items.
+
+    Example: ``{"numFound": 2, "documents": [{...}, {...}], "cursor": "..."}`` with ``array_key``
+    ``'documents'`` yields both documents, ``fields`` is ``{'numFound': 2, 'cursor': '...'}``.
+    """
+
+    def __init__(self, chunks: t.Iterable[bytes], array_key: str):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._position = 0
+        self._exhausted = False
+        self.array_key = array_key
+        self.fields: dict[str, t.Any] = {}
+
+    def _read(self, min_size: int = 1) -> bool:
+        """Append at least ``min_size`` characters to the buffer and return if any were read."""
+        self._buffer = self._buffer[self._position :]
+        self._position = 0
+        read = 0
+        while read < min_size and not self._exhausted:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._exhausted = True
+                text = self._decoder.decode(b'', final=True)
+            else:
+                text = self._decoder.decode(chunk)
+            self._buffer += text
+            read += len(text)
+        return read > 0
+
+    def _peek(self) -> str:
+        """Get the next character which is not whitespace, without consuming it."""
+        while True:
+            while self._position < len(self._buffer):
+                if self._buffer[self._position] not in _WHITESPACE:
+                    return self._buffer[self._position]
+                self._position += 1
+            if not self._read():
+                raise json.JSONDecodeError('Unexpected end of data', self._buffer, self._position)
+
+    def _expect(self, characters: str) -> str:
+        character = self._peek()
+        if character not in characters:
+            raise json.JSONDecodeError(
+                f'Expected one of {characters!r}', self._buffer, self._position
+            )
+        self._position += 1
+        return character
+
+    def _value(self) -> t.Any:
+        """Decode the next complete value, reading more data until it is complete.
+
+        The data read is doubled on every incomplete attempt, so a large value is decoded a
+        logarithmic number of times.
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if not self._read(max(len(self._buffer), 1)):
+                    raise
+                continue
+
+            if (
+                not self._exhausted
+                and type(value) in (int, float)  # pylint: disable=unidiomatic-typecheck
+                and not _VALUE_END.match(self._buffer, end)
+            ):
+                # a number not followed by a delimiter may continue in the next chunk, e.g. "-6."
+                self._read()
+                continue
+
+            self._position = end
+            return value
+
+    def __iter__(self) -> t.Iterator[t.Any]:
+        self._expect('{')
+        if self._peek() == '}':
+            self._position += 1
+            return
+
+        while True:
+            key = self._value()
+            self._expect(':')
+
+            if key == self.array_key:
+                self._expect('[')
+                if self._peek() == ']':
+                    self._position += 1
+                else:
+                    while True:
+                        yield self._value()
+                        if self._expect(',]') == ']':
+                            break
+            else:
+                self.fields[key] = self._value()
+
+            if self._expect(',}') == '}':
+                return
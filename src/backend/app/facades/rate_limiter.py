@@ -0,0 +1,295 @@
+"""Rate and concurrency limiting of requests to upstream hosts.
+
+* :class:`TokenBucket` limits the request rate to a fixed ceiling.
+* :class:`AdaptiveConcurrencyLimiter` limits the requests in flight and adapts the limit to the
+  health of the host.
+"""
+
+import fcntl
+import logging
+import os
+import re
+import struct
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+"""Default sustained request rate per upstream host."""
+
+DEFAULT_BURST = 2
+"""Default number of requests which may be sent back to back after an idle period."""
+
+DEFAULT_MAX_CONCURRENCY = 4
+"""Default maximal number of requests in flight per upstream host."""
+
+ADDITIVE_INCREASE = 1.0
+"""Increase of the concurrency limit per round of ``limit`` healthy responses."""
+
+MULTIPLICATIVE_DECREASE = 0.5
+"""Factor applied to the concurrency limit if the host is overloaded."""
+
+LATENCY_TOLERANCE = 2.0
+"""Factor by which the smoothed latency may exceed the baseline before it counts as rising."""
+
+LATENCY_SMOOTHING = 0.2
+"""Weight of a new latency in the smoothed latency."""
+
+BASELINE_SMOOTHING = 0.02
+"""Weight of a new latency in the baseline latency, which therefore adapts slowly."""
+
+MAX_RETRY_AFTER_SECONDS = 300.0
+"""Maximal number of seconds requests to a host are paused for a ``Retry-After`` header."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    The bucket is refilled with ``rate`` tokens per second up to ``capacity`` tokens. Each request
+    takes one token. If no token is available, the caller reserves the next one in advance and
+    sleeps until it is due, so that waiting callers are served in order and the bucket never
+    exceeds the configured rate.
+    """
+
+    def __init__(self, rate: float, capacity: float = DEFAULT_BURST):
+        if rate <= 0:
+            raise ValueError('rate must be positive.')
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1.')
+
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens: float, updated: float, amount: float, now: float) -> tuple[float, float]:
+        """Refill bucket state up to ``now``, take ``amount`` tokens and return new tokens and wait."""
+        tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate) - amount
+        wait = -tokens / self.rate if tokens < 0 else 0.0
+        return tokens, wait
+
+    def _reserve(self, amount: float) -> float:
+        """Reserve ``amount`` tokens and return the number of seconds to wait for them."""
+        with self._lock:
+            now = time.time()
+            self._tokens, wait = self._take(self._tokens, self._updated, amount, now)
+            self._updated = now
+            return wait
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Block until ``amount`` tokens are available and return the number of seconds waited."""
+        wait = self._reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class FileTokenBucket(TokenBucket):
+    """Token bucket whose state is shared by all processes using the same state file.
+
+    The state (tokens and time of last update) is stored in a small binary file, which is locked
+    exclusively with ``flock`` while a reservation is made. Therefore several worker processes can
+    share one quota of an upstream host.
+    """
+
+    _STATE_FORMAT = '!dd'
+
+    def __init__(self, rate: float, state_file: str, capacity: float = DEFAULT_BURST):
+        super().__init__(rate=rate, capacity=capacity)
+        self.state_file = state_file
+        os.makedirs(os.path.dirname(state_file) or '.', exist_ok=True)
+
+    def _reserve(self, amount: float) -> float:
+        # thread lock first, as flock is held per open file description and not per thread:
+        with self._lock:
+            with open(self.state_file, 'a+b') as file:
+                fcntl.flock(file, fcntl.LOCK_EX)
+                try:
+                    now = time.time()
+                    file.seek(0)
+                    data = file.read(struct.calcsize(self._STATE_FORMAT))
+
+                    tokens, updated = self.capacity, now
+                    if len(data) == struct.calcsize(self._STATE_FORMAT):
+                        tokens, updated = struct.unpack(self._STATE_FORMAT, data)
+
+                    tokens, wait = self._take(tokens, updated, amount, now)
+
+                    file.seek(0)
+                    file.truncate()
+                    file.write(struct.pack(self._STATE_FORMAT, tokens, max(now, updated)))
+                    file.flush()
+                finally:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+        return wait
+
+
+class AdaptiveConcurrencyLimiter:
+    """Thread-safe concurrency limit of an upstream host, adapted by additive increase and
+    multiplicative decrease (AIMD).
+
+    Callers :meth:`acquire` a slot before sending a request and :meth:`release` it with the outcome
+    of the request. Each healthy response raises the limit by ``ADDITIVE_INCREASE / limit``, i.e.
+    by one per round of ``limit`` responses, up to ``max_limit``. The limit is multiplied by
+    ``MULTIPLICATIVE_DECREASE`` (down to ``min_limit``) on
+
+    * responses with status 429 or 5xx and requests failing without response, e.g. timeouts,
+    * rising latency, i.e. a smoothed latency of more than ``LATENCY_TOLERANCE`` times the baseline
+      latency. The baseline follows the latency slowly, so that a host which stays slower is
+      probed upwards again eventually.
+
+    Only requests started after the last decrease can decrease the limit again, so that a burst of
+    failures of concurrent requests counts as a single overload. A ``Retry-After`` pauses all new
+    requests to the host until it passed. The limit is per process.
+    """
+
+    def __init__(
+        self,
+        max_limit: int = DEFAULT_MAX_CONCURRENCY,
+        min_limit: int = 1,
+        initial_limit: float | None = None,
+    ):
+        if min_limit < 1:
+            raise ValueError('min_limit must be at least 1.')
+        if max_limit < min_limit:
+            raise ValueError('max_limit must be at least min_limit.')
+
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self._limit = float(initial_limit if initial_limit is not None else min_limit)
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._latency: float | None = None
+        self._baseline: float | None = None
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> float:
+        """Current concurrency limit, its integer part is the number of requests in flight."""
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> float:
+        """Block until a request may be sent and return the number of seconds waited."""
+        start = time.monotonic()
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    self._condition.wait(self._paused_until - now)
+                elif self._in_flight >= int(self._limit):
+                    self._condition.wait()
+                else:
+                    break
+            self._in_flight += 1
+        return time.monotonic() - start
+
+    def release(
+        self, latency: float, status_code: int | None, retry_after: float | None = None
+    ) -> None:
+        """Release the slot of a request and adapt the limit to its outcome.
+
+        Args:
+            latency: Seconds from sending the request until its response (headers) arrived.
+            status_code: Status code of the response, ``None`` if the request failed without one.
+            retry_after: Seconds to pause requests for, from a ``Retry-After`` header.
+        """
+        now = time.monotonic()
+        with self._condition:
+            self._in_flight -= 1
+
+            if retry_after:
+                self._paused_until = max(
+                    self._paused_until, now + min(retry_after, MAX_RETRY_AFTER_SECONDS)
+                )
+
+            overloaded = status_code is None or status_code == 429 or status_code >= 500
+            if not overloaded:
+                self._latency = (
+                    latency
+                    if self._latency is None
+                    else self._latency + LATENCY_SMOOTHING * (latency - self._latency)
+                )
+                if self._baseline is None:
+                    self._baseline = latency
+                overloaded = self._latency > self._baseline * LATENCY_TOLERANCE
+                self._baseline += BASELINE_SMOOTHING * (latency - self._baseline)
+
+            if overloaded:
+                if now - latency >= self._last_decrease:
+                    previous = self._limit
+                    self._limit = max(self.min_limit, self._limit * MULTIPLICATIVE_DECREASE)
+                    self._last_decrease = now
+                    _logger.info(
+                        'Decreased concurrency limit from %.2f to %.2f (status %s, latency %.2fs).',
+                        previous,
+                        self._limit,
+                        status_code,
+                        latency,
+                    )
+            else:
+                self._limit = min(self.max_limit, self._limit + ADDITIVE_INCREASE / self._limit)
+
+            self._condition.notify_all()
+
+
+_rate_limiters: dict[str, TokenBucket] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    host: str,
+    rate: float = DEFAULT_REQUESTS_PER_SECOND,
+    capacity: float = DEFAULT_BURST,
+    state_dir: str | None = None,
+) -> TokenBucket:
+    """Get the rate limiter of an upstream host, which is shared by all facades of the process.
+
+    The limiter is created by the first caller, i.e. ``rate``, ``capacity`` and ``state_dir`` of
+    later calls for the same host are ignored. If ``state_dir`` is given, the bucket state is kept
+    in a file within this directory to coordinate the rate across processes.
+    """
+    with _rate_limiters_lock:
+        if (limiter := _rate_limiters.get(host)) is None:
+            if state_dir:
+                state_file = os.path.join(state_dir, re.sub(r'[^\w.-]', '_', host) + '.bucket')
+                limiter = FileTokenBucket(rate=rate, state_file=state_file, capacity=capacity)
+            else:
+                limiter = TokenBucket(rate=rate, capacity=capacity)
+
+            _logger.debug('Created rate limiter for %s with %.2f requests/s.', host, rate)
+            _rate_limiters[host] = limiter
+        return limiter
+
+
+_concurrency_limiters: dict[str, AdaptiveConcurrencyLimiter] = {}
+
+
+def get_concurrency_limiter(
+    host: str, max_limit: int = DEFAULT_MAX_CONCURRENCY
+) -> AdaptiveConcurrencyLimiter:
+    """Get the adaptive concurrency limiter of an upstream host, shared by all facades of the
+    process.
+
+    The limiter is created by the first caller, i.e. ``max_limit`` of later calls for the same host
+    is ignored.
+    """
+    with _rate_limiters_lock:
+        if (limiter := _concurrency_limiters.get(host)) is None:
+            limiter = AdaptiveConcurrencyLimiter(max_limit=max_limit)
+            _logger.debug('Created concurrency limiter for %s with limit %d.', host, max_limit)
+            _concurrency_limiters[host] = limiter
+        return limiter
+
+
+def get_concurrency_limits() -> dict[str, float]:
+    """Get the current concurrency limit per upstream host, e.g. to report it as metric."""
+    with _rate_limiters_lock:
+        return {host: limiter.limit for host, limiter in _concurrency_limiters.items()}
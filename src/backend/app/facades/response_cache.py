@@ -0,0 +1,232 @@
+"""Persistent on-disk cache of HTTP responses."""
+
+import contextlib
+import dataclasses
+import datetime
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import typing as t
+import urllib.parse
+from pathlib import Path
+
+import requests
+import requests.structures
+import requests.utils
+
+_logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_SIZE_BYTES = 1024 * 1024 * 1024
+"""Default maximal size of all cached response bodies."""
+
+EVICTION_TARGET_RATIO = 0.9
+"""Eviction removes least recently used entries until the cache is below this ratio of its size."""
+
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Date')
+"""Response headers kept in the cache."""
+
+
+@dataclasses.dataclass(frozen=True)
+class CachePolicy:
+    """Caching policy of all URLs whose path matches ``url_pattern``.
+
+    Attributes:
+        url_pattern: Regular expression searched in the path of the requested URL.
+        ttl: Time an entry is used without asking the server again, ``None`` for no expiry.
+        revalidate: If expired entries are revalidated with ETag/Last-Modified (conditional
+            request) instead of being downloaded again.
+    """
+
+    url_pattern: str
+    ttl: datetime.timedelta | None = None
+    revalidate: bool = True
+
+    def matches(self, url: str) -> bool:
+        return re.search(self.url_pattern, urllib.parse.urlsplit(url).path) is not None
+
+
+@dataclasses.dataclass
+class CacheEntry:
+    """Metadata of a cached response, the body is stored next to it."""
+
+    key: str
+    method: str
+    url: str
+    status_code: int
+    headers: dict[str, str]
+    stored_at: float
+
+    def is_fresh(self, policy: CachePolicy) -> bool:
+        return policy.ttl is None or time.time() - self.stored_at < policy.ttl.total_seconds()
+
+    def validator_headers(self) -> dict[str, str]:
+        """Headers of a conditional request revalidating this entry."""
+        headers = {}
+        if etag := self.headers.get('ETag'):
+            headers['If-None-Match'] = etag
+        if last_modified := self.headers.get('Last-Modified'):
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+
+class ResponseCache:
+    """Content-addressed cache of successful GET responses in a local directory.
+
+    Entries are keyed by a hash of method and URL including its (sorted) query parameters. Only
+    URLs matching one of the given policies are cached. Reading an entry updates its modification
+    time, which is used to evict the least recently used entries once the bodies exceed
+    ``max_size_bytes``.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        policies: t.Sequence[CachePolicy],
+        max_size_bytes: int = DEFAULT_MAX_SIZE_BYTES,
+    ):
+        self.directory = directory
+        self.policies = list(policies)
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._size = sum(path.stat().st_size for path in self._body_files())
+
+    def policy_for(self, method: str | None, url: str | None) -> CachePolicy | None:
+        """Get the policy for a request or ``None`` if its response is not cached."""
+        if method != 'GET' or not url:
+            return None
+        return next((policy for policy in self.policies if policy.matches(url)), None)
+
+    @staticmethod
+    def get_key(method: str, url: str) -> str:
+        """Key of a request, independent of the order of its query parameters."""
+        parts = urllib.parse.urlsplit(url)
+        query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, True)))
+        canonical_url = urllib.parse.urlunsplit(parts._replace(query=query, fragment=''))
+        return hashlib.sha256(f'{method} {canonical_url}'.encode()).hexdigest()
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        folder = self.directory / key[:2]
+        return folder / f'{key}.json', folder / f'{key}.body'
+
+    def _body_files(self) -> t.Iterator[Path]:
+        return self.directory.glob('*/*.body')
+
+    def get(self, request: requests.PreparedRequest) -> CacheEntry | None:
+        """Get cache entry of a request, or ``None`` if it is not cached."""
+        key = self.get_key(str(request.method), str(request.url))
+        meta_path, body_path = self._paths(key)
+
+        try:
+            entry = CacheEntry(**json.loads(meta_path.read_text()))
+            os.utime(body_path)
+        except (OSError, ValueError, TypeError):
+            return None
+
+        return entry
+
+    def read_response(
+        self, entry: CacheEntry, request: requests.PreparedRequest
+    ) -> requests.Response | None:
+        """Build a response from a cache entry, or ``None`` if the body vanished meanwhile."""
+        _, body_path = self._paths(entry.key)
+        try:
+            body = body_path.read_bytes()
+        except OSError:
+            return None
+
+        return build_response(entry.status_code, entry.headers, entry.url, body, request)
+
+    def store(self, request: requests.PreparedRequest, response: requests.Response) -> CacheEntry:
+        """Store a response in the cache."""
+        key = self.get_key(str(request.method), str(request.url))
+        entry = CacheEntry(
+            key=key,
+            method=str(request.method),
+            url=str(request.url),
+            status_code=response.status_code,
+            headers={h: response.headers[h] for h in CACHED_HEADERS if h in response.headers},
+            stored_at=time.time(),
+        )
+        meta_path, body_path = self._paths(key)
+        meta_path.parent.mkdir(exist_ok=True)
+
+        previous_size = body_path.stat().st_size if body_path.exists() else 0
+        self._write_atomic(body_path, response.content)
+        self._write_atomic(meta_path, json.dumps(dataclasses.asdict(entry)).encode())
+
+        with self._lock:
+            self._size += len(response.content) - previous_size
+            exceeded = self._size > self.max_size_bytes
+
+        if exceeded:
+            self.evict()
+
+        return entry
+
+    def refresh(self, entry: CacheEntry, response: requests.Response):
+        """Mark entry as fresh again after the server confirmed it with 304 Not Modified."""
+        entry.stored_at = time.time()
+        for header in ('ETag', 'Last-Modified', 'Date'):
+            if header in response.headers:
+                entry.headers[header] = response.headers[header]
+
+        meta_path, _ = self._paths(entry.key)
+        self._write_atomic(meta_path, json.dumps(dataclasses.asdict(entry)).encode())
+
+    def evict(self):
+        """Remove least recently used entries until the cache is below its size limit."""
+        with self._lock:
+            files = []
+            for body_path in self._body_files():
+                with contextlib.suppress(FileNotFoundError):
+                    stat = body_path.stat()
+                    files.append((stat.st_mtime, stat.st_size, body_path))
+
+            files.sort()
+            self._size = sum(size for _, size, _ in files)
+            target = self.max_size_bytes * EVICTION_TARGET_RATIO
+
+            evicted = 0
+            for _, size, body_path in files:
+                if self._size <= target:
+                    break
+                with contextlib.suppress(FileNotFoundError):
+                    body_path.with_suffix('.json').unlink()
+                    body_path.unlink()
+                    self._size -= size
+                    evicted += 1
+
+        _logger.info('Evicted %d entries from response cache %s.', evicted, self.directory)
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as file:
+            file.write(data)
+        os.replace(file.name, path)
+
+
+def build_response(
+    status_code: int,
+    headers: dict[str, str],
+    url: str,
+    body: bytes,
+    request: requests.PreparedRequest,
+) -> requests.Response:
+    """Build a response which was not received from the network, e.g. from a cache."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers = requests.structures.CaseInsensitiveDict(headers)
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.url = url
+    response.reason = 'OK' if status_code == 200 else ''
+    response.request = request
+    response._content = body  # pylint: disable=protected-access  # response is built manually
+    return response
@@ -0,0 +1,209 @@
+"""Pluggable transports sending the prepared requests of a facade."""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import typing as t
+from pathlib import Path
+
+import requests
+
+from backend.app.core.config import Settings
+from backend.app.facades.response_cache import ResponseCache, build_response
+from backend.app.utils import get_data_folder
+
+_logger = logging.getLogger(__name__)
+
+
+TransportMode = t.Literal['live', 'record', 'replay']
+"""Modes of the transport used by the facades, configured by ``HTTP_TRANSPORT_MODE``."""
+
+
+class ReplayMissError(Exception):
+    """Raised when a request to be replayed was never recorded."""
+
+
+class Transport:
+    """Sends a prepared request and returns its response."""
+
+    is_live: bool = True
+    """If requests go to the network, i.e. are subject to rate limiting."""
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        timeout: int,
+        proxies: dict | None,
+        verify: bool,
+        stream: bool = False,
+    ) -> requests.Response:
+        raise NotImplementedError()
+
+
+class SessionTransport(Transport):
+    """Transport sending requests to the network with a requests session."""
+
+    def __init__(self, session: requests.Session):
+        self.session = session
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        timeout: int,
+        proxies: dict | None,
+        verify: bool,
+        stream: bool = False,
+    ) -> requests.Response:
+        return self.session.send(
+            request=request,
+            timeout=timeout,
+            proxies=proxies,
+            verify=verify,
+            stream=stream,
+            allow_redirects=False,
+        )
+
+
+class TransportArchive:
+    """Directory of recorded request/response pairs.
+
+    A request is identified by its method, URL (with sorted query parameters) and a hash of its
+    body. Recording the same request again overwrites the previous response.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def get_key(request: requests.PreparedRequest) -> str:
+        body = request.body.encode() if isinstance(request.body, str) else request.body or b''
+        return hashlib.sha256(
+            ResponseCache.get_key(str(request.method), str(request.url)).encode() + body
+        ).hexdigest()
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.directory / f'{key}.json', self.directory / f'{key}.body'
+
+    def store(self, request: requests.PreparedRequest, response: requests.Response):
+        """Store request and response in the archive."""
+        meta_path, body_path = self._paths(self.get_key(request))
+        meta = {
+            'method': request.method,
+            'url': request.url,
+            'status_code': response.status_code,
+            'headers': dict(response.headers),
+            'response_url': response.url,
+        }
+        for path, data in ((body_path, response.content), (meta_path, json.dumps(meta).encode())):
+            with tempfile.NamedTemporaryFile(dir=self.directory, delete=False) as file:
+                file.write(data)
+            os.replace(file.name, path)
+
+    def load(self, request: requests.PreparedRequest) -> requests.Response:
+        """Load the recorded response of a request."""
+        meta_path, body_path = self._paths(self.get_key(request))
+        try:
+            meta = json.loads(meta_path.read_text())
+            body = body_path.read_bytes()
+        except OSError as e:
+            raise ReplayMissError(f'No recorded response for {request.method} {request.url}.') from e
+
+        return build_response(
+            meta['status_code'], meta['headers'], meta['response_url'], body, request
+        )
+
+
+class RecordingTransport(Transport):
+    """Transport sending requests with another transport and recording them into an archive."""
+
+    def __init__(self, transport: Transport, archive: TransportArchive):
+        self.transport = transport
+        self.archive = archive
+        self.is_live = transport.is_live
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        timeout: int,
+        proxies: dict | None,
+        verify: bool,
+        stream: bool = False,
+    ) -> requests.Response:
+        response = self.transport.send(request, timeout, proxies, verify, stream)
+        self.archive.store(request, response)
+        return response
+
+
+class ReplayTransport(Transport):
+    """Transport serving responses from an archive without any network access.
+
+    Optionally, a synthetic latency of ``latency`` seconds plus a uniformly distributed jitter of
+    up to ``jitter`` seconds is added to every response. The jitter is drawn from a seeded random
+    generator, so that replays are deterministic.
+    """
+
+    is_live = False
+
+    def __init__(
+        self, archive: TransportArchive, latency: float = 0.0, jitter: float = 0.0, seed: int = 0
+    ):
+        self.archive = archive
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        timeout: int,
+        proxies: dict | None,
+        verify: bool,
+        stream: bool = False,
+    ) -> requests.Response:
+        response = self.archive.load(request)
+
+        with self._lock:
+            delay = self.latency + self._random.uniform(0.0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        return response
+
+
+def get_transport(configuration: Settings, session: requests.Session, name: str) -> Transport:
+    """Get transport of a facade as configured by ``HTTP_TRANSPORT_MODE``.
+
+    Args:
+        configuration: Settings with transport mode and archive location.
+        session: Session used for live requests.
+        name: Name of the facade, used as folder of its recordings within the archive.
+    """
+    transport = SessionTransport(session)
+    mode: TransportMode = configuration.HTTP_TRANSPORT_MODE
+
+    if mode == 'live':
+        return transport
+
+    directory = (
+        Path(configuration.HTTP_TRANSPORT_ARCHIVE_DIR)
+        if configuration.HTTP_TRANSPORT_ARCHIVE_DIR
+        else get_data_folder() / 'archive'
+    )
+    archive = TransportArchive(directory / name)
+    _logger.info('Using %s transport with archive %s.', mode, archive.directory)
+
+    if mode == 'record':
+        return RecordingTransport(transport, archive)
+
+    return ReplayTransport(
+        archive,
+        latency=configuration.HTTP_REPLAY_LATENCY_MS / 1000,
+        jitter=configuration.HTTP_REPLAY_JITTER_MS / 1000,
+    )
@@ -1,7 +1,12 @@
 """Facade util functions."""
+import concurrent.futures
 import contextlib
+import dataclasses
+import datetime
+import email.utils
 import logging
 import random
+import threading
 import time
 import traceback
 import typing as t
@@ -13,13 +18,62 @@ import requests
 _logger = logging.getLogger(__name__)
 
 ATTEMPT_AFTER_SECONDS = (0, 15, 30)
-"""Number of seconds to wait before next attempt to call with retries."""
+"""Number of seconds to wait before next attempt to call with retries. A longer ``Retry-After`` of
+the failed attempt is honoured instead."""
+
+MAX_RETRY_AFTER_SECONDS = 300
+"""Maximal number of seconds to wait for a ``Retry-After`` header."""
+
+CIRCUIT_FAILURE_THRESHOLD = 5
+"""Number of consecutive failed attempts to a host after which its circuit opens."""
+
+CIRCUIT_OPEN_SECONDS = 30.0
+"""Number of seconds a circuit stays open before a single probe request is let through."""
+
+CIRCUIT_MAX_OPEN_SECONDS = 600.0
+"""Maximal number of seconds a circuit stays open, the open time doubles with every failed probe."""
+
+PROXY_CHECK_TIMEOUT_SECONDS = 5.0
+"""Timeout of a request checking the health of a proxy."""
+
+PROXY_CHECK_CONCURRENCY = 16
+"""Number of proxies checked at the same time."""
+
+PROXY_CHECK_BATCH_SIZE = 32
+"""Number of unchecked proxies checked together when looking for a healthy one."""
+
+PROXY_REPROBE_SECONDS = 300.0
+"""Number of seconds after which checked proxies are checked again in the background."""
+
+PROXY_MIN_SUCCESS_RATE = 0.5
+"""Smoothed success rate below which a proxy is not selected."""
+
+PROXY_ROTATE_LATENCY_FACTOR = 3.0
+"""Factor by which the current proxy may be slower than the fastest healthy one before rotating."""
+
+PROXY_STATS_SMOOTHING = 0.3
+"""Weight of a new result in the success rate and latency of a proxy."""
+
+RETRY_BUDGET_RATIO = 0.2
+"""Number of retries earned by every first attempt, i.e. retries are at most 20% of requests."""
+
+RETRY_BUDGET_MIN_RETRIES = 10
+"""Number of retries always available, e.g. at the start of an import."""
 
 
 class ProxyListEmptyError(Exception):
     """Raised when proxy list is empty."""
 
 
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f'Circuit of {host} is open, retry after {retry_after:.0f}s.')
+        self.host = host
+        self.retry_after = retry_after
+
+
 class ProxyMethod(Enum):
     """Proxy methods."""
 
@@ -44,8 +98,60 @@ class Proxy(pyd.BaseModel):
         }
 
 
+@dataclasses.dataclass
+class ProxyStats:
+    """Health of a proxy, from health checks and the requests sent through it."""
+
+    success_rate: float = 1.0
+    """Smoothed share of successful checks and requests."""
+
+    latency: float | None = None
+    """Smoothed seconds of successful checks and requests."""
+
+    checked_at: float | None = None
+    """Time of the last health check, from :func:`time.monotonic`."""
+
+    results: int = 0
+    """Number of recorded checks and requests."""
+
+    def record(self, success: bool, latency: float | None = None):
+        if self.results == 0:
+            self.success_rate = float(success)
+        else:
+            self.success_rate += PROXY_STATS_SMOOTHING * (float(success) - self.success_rate)
+        self.results += 1
+        if success and latency is not None:
+            self.latency = (
+                latency
+                if self.latency is None
+                else self.latency + PROXY_STATS_SMOOTHING * (latency - self.latency)
+            )
+
+    @property
+    def healthy(self) -> bool:
+        return self.success_rate >= PROXY_MIN_SUCCESS_RATE
+
+    @property
+    def score(self) -> float:
+        """Weight of the proxy when selecting one, favouring reliable and fast proxies."""
+        return self.success_rate**2 / max(self.latency or PROXY_CHECK_TIMEOUT_SECONDS, 0.01)
+
+
 class ProxyList:
-    """The list of proxies to be used."""
+    """Pool of proxies to be used, selected by their health.
+
+    Candidates are health-checked concurrently, in batches of ``PROXY_CHECK_BATCH_SIZE``, before
+    they are used. Success rate and latency of checks and requests (see :meth:`record_result`) are
+    kept per proxy, and proxies are selected randomly weighted by their :attr:`ProxyStats.score`.
+    If the current proxy becomes unhealthy or much slower than the best alternative, another one
+    is selected proactively. If ``reprobe_interval`` is set (e.g. to ``PROXY_REPROBE_SECONDS``),
+    checked proxies are re-checked in the background every ``reprobe_interval`` seconds once a
+    proxy was selected, so that failed proxies can recover. The background thread runs until
+    :meth:`close`, so such a list should be used as context manager::
+
+        with ProxyList(proxies, reprobe_interval=PROXY_REPROBE_SECONDS) as proxy_list:
+            importer.import_data(params, proxy_list=proxy_list)
+    """
 
     original_proxies: list[Proxy]
     proxies: list[Proxy]
@@ -54,9 +160,23 @@ class ProxyList:
 
     sample_test_domains: list[str] = ["www.google.com", "dip.bundestag.de"]
 
-    def __init__(self, proxies: list[Proxy]):
+    def __init__(self, proxies: list[Proxy], reprobe_interval: float | None = None):
         self.original_proxies = proxies.copy()
         self.proxies = proxies.copy()
+        self.reprobe_interval = reprobe_interval
+        self._stats: dict[tuple[str, str], ProxyStats] = {}
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._probing_thread: threading.Thread | None = None
+
+    @staticmethod
+    def _key(proxy: Proxy) -> tuple[str, str]:
+        return proxy.method.value, proxy.ip
+
+    def get_stats(self, proxy: Proxy) -> ProxyStats:
+        """Get the health of a proxy."""
+        with self._lock:
+            return self._stats.setdefault(self._key(proxy), ProxyStats())
 
     # from https://github.com/TheSpeedX/socker/blob/master/proxy_tester_menu.py
     def _test_proxy(self, domain: str, proxy: Proxy) -> bool:
@@ -64,8 +184,13 @@ class ProxyList:
         proxies = proxy.to_dict()
 
         with contextlib.suppress(requests.RequestException):
-            print(f"Testing https://{domain}, proxy: {proxies}")
-            response = requests.get(f"http://{domain}", proxies=proxies, timeout=10, verify=False)
+            _logger.debug(f"Testing https://{domain}, proxy: {proxies}")
+            response = requests.get(
+                f"http://{domain}",
+                proxies=proxies,
+                timeout=PROXY_CHECK_TIMEOUT_SECONDS,
+                verify=False,
+            )
             if response.status_code >= 200 and response.status_code < 300:
                 return True
         return False
@@ -76,23 +201,85 @@ class ProxyList:
                 return False
         return True
 
+    def check_proxy(self, proxy: Proxy) -> bool:
+        """Test a proxy and record the result in its health."""
+        start = time.monotonic()
+        success = self.test_sample_domains(proxy)
+        latency = (time.monotonic() - start) / len(self.sample_test_domains)
+
+        with self._lock:
+            stats = self.get_stats(proxy)
+            stats.record(success, latency)
+            stats.checked_at = time.monotonic()
+            return stats.healthy
+
+    def check_proxies(self, proxies: t.Sequence[Proxy]) -> list[Proxy]:
+        """Test proxies concurrently and return the healthy ones."""
+        if not proxies:
+            return []
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(len(proxies), PROXY_CHECK_CONCURRENCY),
+            thread_name_prefix=type(self).__name__,
+        ) as executor:
+            healthy = [
+                proxy
+                for proxy, is_healthy in zip(proxies, executor.map(self.check_proxy, proxies))
+                if is_healthy
+            ]
+
+        _logger.info(f'{len(healthy)} of {len(proxies)} checked proxies are healthy.')
+        return healthy
+
+    def _candidates(self, test: bool, exclude: Proxy | None = None) -> list[Proxy]:
+        with self._lock:
+            return [
+                proxy
+                for proxy in self.proxies
+                if (stats := self.get_stats(proxy)).healthy
+                and (stats.checked_at is not None or not test)
+                and proxy != exclude
+            ]
+
+    def _choose(self, candidates: t.Sequence[Proxy]) -> Proxy:
+        return random.choices(
+            candidates, weights=[self.get_stats(proxy).score for proxy in candidates]
+        )[0]
+
     def set_random_proxy(self, drop_previous: bool = True, test: bool = True):
-        """Get a randomly sampled proxy from the list and test if it works."""
+        """Select a proxy from the healthy ones, weighted by score.
+
+        If ``drop_previous`` is set, the current proxy failed and is not selected again. If ``test``
+        is set, only checked proxies are selected and unchecked ones are checked in batches until a
+        healthy one is found.
+        """
 
         if len(self.proxies) == 0:
             raise ProxyListEmptyError('No proxies available.')
 
-        if drop_previous and self.current_proxy:
-            self.proxies.remove(self.current_proxy)
+        with self._lock:
+            previous = self.current_proxy if drop_previous else None
+            if previous is not None:
+                self.get_stats(previous).record(False)
 
-        new_proxy = random.choice(self.proxies)
+            candidates = self._candidates(test, exclude=previous)
+            unchecked = [
+                proxy for proxy in self.proxies if self.get_stats(proxy).checked_at is None
+            ]
 
-        while test and not self.test_sample_domains(new_proxy):
-            print(f"Proxy {new_proxy} failed test, removing from list.")
-            self.proxies.remove(new_proxy)
-            new_proxy = random.choice(self.proxies)
-        print(f"Proxy {new_proxy} passed test.")
-        self.current_proxy = new_proxy
+        while test and not candidates and unchecked:
+            batch = random.sample(unchecked, min(len(unchecked), PROXY_CHECK_BATCH_SIZE))
+            unchecked = [proxy for proxy in unchecked if proxy not in batch]
+            candidates = [proxy for proxy in self.check_proxies(batch) if proxy != previous]
+
+        if not candidates:
+            raise ProxyListEmptyError('No healthy proxy available.')
+
+        with self._lock:
+            self.current_proxy = self._choose(candidates)
+        _logger.info(f"Using proxy {self.current_proxy.ip}.")
+
+        self._start_probing()
 
     def get_proxy(self, test: bool = True) -> Proxy:
         """Get the current proxy from the list."""
@@ -106,6 +293,68 @@ class ProxyList:
 
         return self.current_proxy
 
+    def record_result(self, proxy: Proxy, latency: float, success: bool):
+        """Record the outcome of a request through a proxy.
+
+        If the proxy is the current one and became unhealthy or ``PROXY_ROTATE_LATENCY_FACTOR``
+        times slower than the best checked alternative, another proxy is selected.
+        """
+        with self._lock:
+            stats = self.get_stats(proxy)
+            stats.record(success, latency)
+            if proxy != self.current_proxy:
+                return
+
+            alternatives = self._candidates(test=True, exclude=proxy)
+            fastest = min(
+                (self.get_stats(p).latency or float('inf') for p in alternatives),
+                default=float('inf'),
+            )
+            slow = (
+                stats.latency is not None and stats.latency > fastest * PROXY_ROTATE_LATENCY_FACTOR
+            )
+            if alternatives and (not stats.healthy or slow):
+                self.current_proxy = self._choose(alternatives)
+                _logger.info(
+                    f'Rotated proxy from {proxy.ip} (success rate {stats.success_rate:.2f}, '
+                    f'latency {stats.latency or 0:.2f}s) to {self.current_proxy.ip}.'
+                )
+
+    def _start_probing(self):
+        """Start re-checking proxies in the background, unless already started."""
+        with self._lock:
+            if self.reprobe_interval is None or self._probing_thread is not None:
+                return
+            self._probing_thread = threading.Thread(
+                target=self._probe,
+                args=(self.reprobe_interval,),
+                name=f'{type(self).__name__}-probe',
+                daemon=True,
+            )
+            self._probing_thread.start()
+
+    def _probe(self, interval: float):
+        while not self._stopped.wait(interval):
+            now = time.monotonic()
+            with self._lock:
+                due = [
+                    proxy
+                    for proxy in self.proxies
+                    if (checked_at := self.get_stats(proxy).checked_at) is not None
+                    and now - checked_at >= interval
+                ]
+            self.check_proxies(due)
+
+    def close(self):
+        """Stop re-checking proxies in the background."""
+        self._stopped.set()
+
+    def __enter__(self) -> t.Self:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     def __len__(self) -> int:
         """Get the length of the list."""
         return len(self.proxies)
@@ -115,14 +364,163 @@ class ProxyList:
         return self.proxies[index]
 
     @classmethod
-    def from_url(cls, proxy_url: str, method: ProxyMethod = ProxyMethod.SOCKS5) -> t.Self:
+    def from_url(
+        cls,
+        proxy_url: str,
+        method: ProxyMethod = ProxyMethod.SOCKS5,
+        reprobe_interval: float | None = None,
+    ) -> t.Self:
         """Get a proxy list instance from a url."""
         proxies = []
         with requests.get(proxy_url) as response:
             for line in response.iter_lines():
                 if line:
                     proxies.append(Proxy(ip=line.decode('utf-8'), method=method))
-        return cls(proxies)
+        return cls(proxies, reprobe_interval=reprobe_interval)
+
+
+class CircuitState(Enum):
+    """States of a :class:`CircuitBreaker`."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker of an upstream host.
+
+    The circuit is closed while requests succeed. After ``failure_threshold`` consecutive failures
+    it opens, and requests fail fast with :class:`CircuitOpenError` instead of being sent. Once
+    ``open_seconds`` passed, the circuit is half-open: a single probe request is let through, which
+    closes the circuit if it succeeds. A failed probe opens the circuit again for twice as long, up
+    to ``max_open_seconds``.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        open_seconds: float = CIRCUIT_OPEN_SECONDS,
+        max_open_seconds: float = CIRCUIT_MAX_OPEN_SECONDS,
+    ):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._current_open_seconds = open_seconds
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            if self._state is CircuitState.OPEN and self._retry_after() <= 0:
+                return CircuitState.HALF_OPEN
+            return self._state
+
+    def _retry_after(self) -> float:
+        return self._opened_at + self._current_open_seconds - time.monotonic()
+
+    def before_call(self):
+        """Raise :class:`CircuitOpenError` if a request must not be sent now."""
+        with self._lock:
+            if self._state is CircuitState.CLOSED:
+                return
+
+            if self._state is CircuitState.OPEN:
+                if (retry_after := self._retry_after()) > 0:
+                    raise CircuitOpenError(self.host, retry_after)
+                self._state = CircuitState.HALF_OPEN
+
+            if self._probing:
+                raise CircuitOpenError(self.host, self._current_open_seconds)
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            if self._state is not CircuitState.CLOSED:
+                _logger.info('Circuit of %s closed.', self.host)
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+            self._current_open_seconds = self.open_seconds
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state is CircuitState.HALF_OPEN:
+                self._current_open_seconds = min(
+                    self._current_open_seconds * 2, self.max_open_seconds
+                )
+            elif self._state is not CircuitState.CLOSED or self._failures < self.failure_threshold:
+                return
+
+            self._state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+            self._probing = False
+            _logger.warning(
+                'Circuit of %s opened for %.0fs after %d failed attempts.',
+                self.host,
+                self._current_open_seconds,
+                self._failures,
+            )
+
+    def release(self):
+        """Let another probe through, if the outcome of a probe says nothing about the host, e.g.
+        after a proxy error."""
+        with self._lock:
+            self._probing = False
+
+
+class RetryBudget:
+    """Thread-safe budget limiting retries to a share of all requests.
+
+    Every first attempt earns ``ratio`` retries, every retry spends one. As long as requests
+    succeed, the budget fills up, so that isolated failures are retried. During an outage, the
+    budget is spent quickly and requests fail after their first attempt instead of multiplying the
+    load on the host with retries.
+    """
+
+    def __init__(
+        self, ratio: float = RETRY_BUDGET_RATIO, min_retries: int = RETRY_BUDGET_MIN_RETRIES
+    ):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self._max_tokens = max(min_retries, 1) * 10.0
+        self._tokens = float(min_retries)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """Earn retries for a first attempt."""
+        with self._lock:
+            self._tokens = min(self._max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Spend a retry and return if it is within the budget."""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+RETRY_BUDGET = RetryBudget()
+"""Retry budget shared by all requests of the process."""
+
+_circuit_breakers: dict[str, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(host: str) -> CircuitBreaker:
+    """Get the circuit breaker of an upstream host, shared by all facades of the process."""
+    with _circuit_breakers_lock:
+        if (breaker := _circuit_breakers.get(host)) is None:
+            breaker = _circuit_breakers[host] = CircuitBreaker(host)
+        return breaker
 
 
 R = t.TypeVar('R')
@@ -132,17 +530,28 @@ def call_with_retries(
     callable_: t.Callable[..., R],
     *args,
     retval_ok: t.Callable[[t.Any], bool] = lambda _: True,
+    circuit_breaker: CircuitBreaker | None = None,
+    retry_budget: RetryBudget | None = RETRY_BUDGET,
+    on_retry: t.Callable[[], t.Any] | None = None,
     **kwargs,
 ) -> R:
     """Invoke a callable robustly with delayed retries.
 
     Failure of the invoked callable is indicated by a raised exception or if the return code does
     not pass the optional `retval_ok` predicate. If all retries failed, either the last erroneous
-    return code or the last exception is propagated to caller.
+    return code or the last exception is propagated to caller. If the response of a failed attempt
+    has a ``Retry-After`` header, the next attempt waits at least as long.
+
+    Retries are only made within the ``retry_budget``. With a ``circuit_breaker``, attempts are
+    recorded by it and :class:`CircuitOpenError` is raised instead of an attempt while the circuit
+    is open, e.g. so that an importer can pause until the host recovers.
 
     Args:
         callable_: Callable to be invoked with retries.
         retval_ok: Optional evaluation function indicating that the return value is OK.
+        circuit_breaker: Optional circuit breaker of the called host.
+        retry_budget: Optional budget of retries, the one shared by the process by default.
+        on_retry: Optional callback invoked before each retry, e.g. to count retries.
         args: Optional positional arguments passed to callable.
         kwargs: Optional keyword arguments passed to callable.
 
@@ -150,27 +559,29 @@ def call_with_retries(
         Last returned value of the callable.
     """
     num_attempts = len(ATTEMPT_AFTER_SECONDS)
+    retry_after: float | None = None
+    last_error: Exception | None = None
+    last_retval: t.Any = None
 
-    for attempt, delay in enumerate(ATTEMPT_AFTER_SECONDS, start=1):
-        try:
-            time.sleep(delay)
-            retval = callable_(*args, **kwargs)
+    if retry_budget is not None:
+        retry_budget.deposit()
 
-            if retval_ok(retval):
-                # successful invocation, just propagate result:
-                return retval
+    for attempt, delay in enumerate(ATTEMPT_AFTER_SECONDS, start=1):
+        if attempt > 1 and retry_budget is not None and not retry_budget.withdraw():
+            _logger.warning('Retry budget exhausted, not retrying.')
+            break
+        if attempt > 1 and on_retry is not None:
+            on_retry()
 
-            _logger.warning(
-                'Attempt %d failed, %d left. Return value: %r',
-                attempt,
-                num_attempts - attempt,
-                retval,
-            )
+        time.sleep(max(delay, min(retry_after or 0, MAX_RETRY_AFTER_SECONDS)))
+        if circuit_breaker is not None:
+            circuit_breaker.before_call()
 
-            if attempt >= num_attempts:
-                _logger.error('All attempts failed.')
-                return retval
+        try:
+            retval = callable_(*args, **kwargs)
         except requests.exceptions.ProxyError as ex:
+            if circuit_breaker is not None:
+                circuit_breaker.release()
             text = get_http_exception_text(ex)
             _logger.warning(
                 'Attempt failed due to proxy error, %d left. %s: %s',
@@ -182,6 +593,9 @@ def call_with_retries(
             raise
         # want to catch all other exceptions but also print it to log:
         except Exception as ex:  # pylint: disable=broad-except  # catch-all clause intended
+            if circuit_breaker is not None:
+                circuit_breaker.record_failure()
+            retry_after = get_retry_after(getattr(ex, 'response', None))
             text = get_http_exception_text(ex)
             _logger.warning(
                 'Attempt %d failed, %d left. %s: %s',
@@ -193,9 +607,36 @@ def call_with_retries(
             if attempt >= num_attempts:
                 _logger.error('All attempts failed.')
                 raise
-
-    # this is never reached, but make pylint happy:
-    raise NotImplementedError()
+            last_error = ex
+            continue
+
+        if retval_ok(retval):
+            # successful invocation, just propagate result:
+            if circuit_breaker is not None:
+                circuit_breaker.record_success()
+            return retval
+
+        if circuit_breaker is not None:
+            circuit_breaker.record_failure()
+        retry_after = get_retry_after(retval)
+        last_error = None
+        last_retval = retval
+
+        _logger.warning(
+            'Attempt %d failed, %d left. Return value: %r',
+            attempt,
+            num_attempts - attempt,
+            retval,
+        )
+
+        if attempt >= num_attempts:
+            _logger.error('All attempts failed.')
+            return retval
+
+    # retry budget exhausted, propagate the last failure:
+    if last_error is not None:
+        raise last_error
+    return t.cast(R, last_retval)
 
 
 @contextlib.contextmanager
@@ -224,3 +665,26 @@ def get_http_exception_text(exc: Exception) -> str | None | t.Any:
         if (text := getattr(response, 'text', None)) is not None:
             return text
     return None
+
+
+def get_retry_after(response: t.Any) -> float | None:
+    """Get the number of seconds to wait from the ``Retry-After`` header of a response, if any.
+
+    The header is either a number of seconds or an HTTP date.
+    """
+    headers = getattr(response, 'headers', None)
+    if not isinstance(headers, t.Mapping) or not (value := headers.get('Retry-After')):
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
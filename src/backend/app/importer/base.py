@@ -1,14 +1,24 @@
 """Base class for HTTP-Imports."""
 
+import datetime
+import hashlib
+import json
 import logging
+import sys
+import time
 from typing import Any, Generic, Iterator, MutableMapping, Optional, TypeVar
 
 from pydantic import BaseModel
 
 from backend.app.core.config import Settings
 from backend.app.crud.base import Base, CRUDBase
+from backend.app.crud.CRUDImporter.crud_checkpoint import CRUD_IMPORT_CHECKPOINT
+from backend.app.crud.CRUDImporter.crud_dead_letter import CRUD_IMPORT_DEAD_LETTER
+from backend.app.crud.CRUDImporter.crud_watermark import CRUD_IMPORT_WATERMARK
+from backend.app.crud.identity_map import IdentityMap
 from backend.app.facades.deutscher_bundestag.facade import HttpFacade
-from backend.app.facades.util import ProxyList
+from backend.app.facades.util import CircuitOpenError, ProxyList
+from backend.app.importer.pipeline import StageStats, run_stage
 
 _logger = logging.getLogger(__name__)
 
@@ -27,7 +37,10 @@ SQLModelType = TypeVar("SQLModelType", bound=Base)  # pylint: disable=invalid-na
 
 ParamMapping = MutableMapping
 
-DELAY_BETWEEN_REQUESTS = 0.5
+_WATERMARK_EXCLUDE = {'cursor', 'aktualisiert_start', 'aktualisiert_end'}
+
+MAX_CIRCUIT_PAUSE_SECONDS = 1800.0
+"""Maximal number of seconds an import pauses in total while the circuit of its host is open."""
 
 
 class HttpImporter(
@@ -35,11 +48,16 @@ class HttpImporter(
 ):
     """Class for HTTP Imports."""
 
+    resumable: bool = False
+    """If the importer can resume from a checkpoint, see :meth:`get_resume_cursor`."""
+
+    entity_type: str | None = None
+    """Entity type of the imported objects, used to store watermarks and fingerprints."""
+
     def __init__(
         self,
         crud: CRUDBase[SQLModelType],
         facade: FacadeType,
-        delay_between_requests: float = DELAY_BETWEEN_REQUESTS,
     ):
         """
         Initialize DIPImporter.
@@ -47,7 +65,8 @@ class HttpImporter(
         self.crud = crud
         self.imported_count = 0
         self.facade = facade
-        self.delay_between_requests = delay_between_requests
+        self.identity_map: IdentityMap | None = None
+        self.rejected_ids: set[str] = set()
 
     def get_imported_count(self) -> int:
         """Get count of imported data."""
@@ -75,16 +94,105 @@ class HttpImporter(
         """Fetch count."""
         raise NotImplementedError
 
-    def batch_upsert(
+    def is_resumable(self, **kwargs: Any) -> bool:
+        """If a run with the given ``fetch_data`` kwargs can be checkpointed and resumed."""
+        return self.resumable
+
+    def get_resume_cursor(self) -> str | None:
+        """Get cursor of the page the most recently fetched object belongs to.
+
+        Fetching again with this cursor must return this page again, so that an import can be
+        resumed after all objects fetched so far were committed. Only used if ``resumable``.
+        """
+        raise NotImplementedError
+
+    def get_next_cursor(self) -> str | None:
+        """Get cursor of the page after the last one fetched.
+
+        Used to continue an incremental import which stopped at ``response_limit`` with the next
+        run. Only used if ``resumable``.
+        """
+        raise NotImplementedError
+
+    def with_cursor(
+        self, params: Optional[PydanticParameterModelType], cursor: str
+    ) -> PydanticParameterModelType:
+        """Get copy of params starting the fetch at ``cursor``. Only used if ``resumable``."""
+        raise NotImplementedError
+
+    def with_watermark(
+        self, params: Optional[PydanticParameterModelType], watermark: datetime.datetime
+    ) -> PydanticParameterModelType:
+        """Get copy of params fetching objects updated since ``watermark``.
+
+        Only used if ``entity_type`` is set.
+        """
+        raise NotImplementedError
+
+    def get_aktualisiert(self, obj: SQLModelType) -> datetime.datetime | None:
+        """Get time of the last update of an imported object, used to advance the watermark."""
+        aktualisiert = getattr(obj, 'aktualisiert', None)
+        if isinstance(aktualisiert, str):
+            aktualisiert = datetime.datetime.fromisoformat(aktualisiert)
+        if aktualisiert is not None and aktualisiert.tzinfo is None:
+            aktualisiert = aktualisiert.astimezone()
+        return aktualisiert
+
+    @staticmethod
+    def _dump_params(
+        params: Optional[PydanticParameterModelType], exclude: set[str]
+    ) -> dict[str, Any]:
+        return params.model_dump(mode='json', exclude_none=True, exclude=exclude) if params else {}
+
+    @staticmethod
+    def _fingerprint(*values: Any) -> str:
+        return hashlib.sha256(json.dumps(values, sort_keys=True).encode()).hexdigest()
+
+    def get_checkpoint_id(self, params: Optional[PydanticParameterModelType]) -> str:
+        """Get fingerprint of importer and params (without cursor) identifying an import run."""
+        return self._fingerprint(self._get_importer_name(), self._dump_params(params, {'cursor'}))
+
+    def get_watermark_id(self, params: Optional[PydanticParameterModelType]) -> str:
+        """Get fingerprint of entity type and params (without cursor and update range)."""
+        return self._fingerprint(self.entity_type, self._dump_params(params, _WATERMARK_EXCLUDE))
+
+    def _get_importer_name(self) -> str:
+        module = type(self).__module__
+        if module == '__main__' and (spec := sys.modules['__main__'].__spec__) is not None:
+            # same name whether the importer module is run as script or imported
+            module = spec.name
+        return f'{module}.{type(self).__qualname__}'
+
+    def _save_checkpoint(
         self,
-        params: Optional[PydanticParameterModelType] = None,
-        response_limit: int = 1000,
-        proxy_list: ProxyList | None = None,
-        upsert_batch_size: int = 100,
-        **kwargs: Any,
+        checkpoint_id: str,
+        params: Optional[PydanticParameterModelType],
+        cursor: str | None,
+        aktualisiert: datetime.datetime | None = None,
     ):
+        CRUD_IMPORT_CHECKPOINT.save_checkpoint(
+            checkpoint_id,
+            importer=self._get_importer_name(),
+            params=self._dump_params(params, {'cursor'}),
+            cursor=cursor,
+            imported_count=self.imported_count,
+            aktualisiert=aktualisiert,
+        )
+
+    def iter_batches(
+        self,
+        params: Optional[PydanticParameterModelType],
+        response_limit: int,
+        proxy_list: ProxyList | None,
+        upsert_batch_size: int,
+        **kwargs: Any,
+    ) -> Iterator[tuple[list[SQLModelType], str | None]]:
+        """Fetch data in batches, together with the cursor to resume after the batch.
+
+        The cursor is taken when the batch is complete, as fetching may move on while the batch is
+        persisted. It is ``None`` for the final batch and for importers which are not resumable.
+        """
         batch: list[SQLModelType] = []
-        batch_number = 0
         for db_model in self.fetch_data(
             params=params,
             response_limit=response_limit,
@@ -94,22 +202,202 @@ class HttpImporter(
             batch.append(db_model)
 
             if len(batch) >= upsert_batch_size:
+                yield batch, self.get_resume_cursor() if self.resumable else None
+                batch = []
+
+        if batch:
+            yield batch, None
+
+    def write_batch(self, batch: list[SQLModelType]) -> list[SQLModelType]:
+        """Write a batch of fetched objects and return the ones committed.
+
+        Objects rejected by the database are isolated (see ``CRUDBase.bulk_upsert_isolating``)
+        and saved as dead letters of this importer, so that the other objects are committed and
+        the rejected ones can be retried with :meth:`retry_dead_letters`.
+        """
+        rejected = self.crud.bulk_upsert_isolating(batch, identity_map=self.identity_map)
+        if not rejected:
+            return batch
+
+        importer = self._get_importer_name()
+        for obj, error in rejected:
+            CRUD_IMPORT_DEAD_LETTER.save_rejected(importer, obj, error)
+            self.rejected_ids.add(CRUD_IMPORT_DEAD_LETTER.get_object_id(obj))
+        _logger.warning(f'{len(rejected)} of {len(batch)} objects were saved as dead letters.')
+
+        rejected_objects = {id(obj) for obj, _ in rejected}
+        return [obj for obj in batch if id(obj) not in rejected_objects]
+
+    def persist_batch(self, batch: list[SQLModelType]):
+        """Persist and commit a batch of fetched objects, raising if it cannot be committed."""
+        self.write_batch(batch)
+
+    def params_for_ids(self, object_ids: list[str]) -> Iterator[PydanticParameterModelType]:
+        """Get params fetching the objects with the given ids, see :meth:`retry_dead_letters`."""
+        raise NotImplementedError
+
+    def retry_dead_letters(self, proxy_list: ProxyList | None = None, **kwargs: Any):
+        """Fetch and import the objects saved as dead letters of this importer again.
+
+        Dead letters of objects imported successfully (or not returned anymore) are deleted,
+        objects rejected again keep their dead letter with an increased number of attempts.
+        """
+        importer = self._get_importer_name()
+        object_ids = CRUD_IMPORT_DEAD_LETTER.read_object_ids(importer)
+        if not object_ids:
+            return
+
+        _logger.info(f'Retrying {len(object_ids)} dead letters of {importer}.')
+        rejected_ids: set[str] = set()
+        for params in self.params_for_ids(object_ids):
+            self.batch_upsert(params=params, proxy_list=proxy_list, resume=False, **kwargs)
+            rejected_ids |= self.rejected_ids
+
+        CRUD_IMPORT_DEAD_LETTER.delete_resolved(
+            importer, [object_id for object_id in object_ids if object_id not in rejected_ids]
+        )
+
+    def batch_upsert(
+        self,
+        params: Optional[PydanticParameterModelType] = None,
+        response_limit: int = 1000,
+        proxy_list: ProxyList | None = None,
+        upsert_batch_size: int = 100,
+        resume: bool = True,
+        incremental: bool = False,
+        pipelined: bool = False,
+        **kwargs: Any,
+    ):
+        """Fetch data and upsert it in batches.
+
+        Objects are persisted with an import-scoped :class:`IdentityMap`, see :meth:`persist_batch`.
+        Objects rejected by the database are saved as dead letters, see :meth:`write_batch`.
+        If ``pipelined`` is set, batches are fetched (and transformed) on a separate thread while
+        the previous batch is persisted, see :func:`run_stage`. This is only safe for importers
+        whose transforms do not share ORM instances across batches, e.g. persons by identity map
+        or Vorgaenge of a resolver, as the persisting thread reads them at the same time. The
+        throughput of both stages is logged at the end.
+
+        For resumable runs (see :meth:`is_resumable`), the cursor of the last committed batch is
+        saved as checkpoint of this run. If ``resume`` is set, a run with the same importer and
+        params continues from the checkpoint of a previous, interrupted run. The checkpoint is
+        removed once the run completes.
+
+        If ``incremental`` is set, only objects updated since the watermark of the entity type and
+        params are fetched. Once the run completes, the watermark is advanced to the latest
+        ``aktualisiert`` committed, but not past the start of the run, as objects updated during
+        the run may have been missed. The first incremental run fetches ``params`` unchanged.
+        If the run stopped at ``response_limit`` before the last page (see
+        :attr:`HttpFacade.response_limit_reached`), the watermark is not advanced. Instead, the
+        checkpoint of a resumable run is kept with the cursor of the next page and the latest
+        ``aktualisiert`` committed, so that the next incremental run continues there and advances
+        the watermark once it reaches the last page.
+        """
+        watermark_id = None
+        if incremental:
+            if self.entity_type is None:
+                raise ValueError(f'{type(self).__name__} does not support incremental imports.')
+            watermark_id = self.get_watermark_id(params)
+            watermark = CRUD_IMPORT_WATERMARK.read(watermark_id)
+            if watermark is not None:
+                _logger.info(
+                    f'Importing {self.entity_type} updated since {watermark.aktualisiert}.'
+                )
+                params = self.with_watermark(params, watermark.aktualisiert)
+        run_start = datetime.datetime.now(datetime.timezone.utc)
+        latest_aktualisiert: datetime.datetime | None = None
+
+        checkpoint_id = self.get_checkpoint_id(params) if self.is_resumable(**kwargs) else None
+
+        if checkpoint_id is not None and resume:
+            checkpoint = CRUD_IMPORT_CHECKPOINT.read(checkpoint_id)
+            if checkpoint is not None and checkpoint.cursor:
+                _logger.info(
+                    f'Resuming {self._get_importer_name()} at cursor {checkpoint.cursor} after '
+                    f'{checkpoint.imported_count} imported objects.'
+                )
+                params = self.with_cursor(params, checkpoint.cursor)
+                self.imported_count = checkpoint.imported_count
+                # the resumed run started before its first checkpoint was saved (stored in UTC)
+                run_start = min(
+                    run_start, checkpoint.created_at.replace(tzinfo=datetime.timezone.utc)
+                )
+                latest_aktualisiert = checkpoint.aktualisiert
+
+        # entities shared by many objects are written once per import, unless they change
+        self.identity_map = IdentityMap()
+        self.rejected_ids = set()
+
+        fetch_stats = StageStats('fetch')
+        persist_stats = StageStats('persist')
+        batches = self.iter_batches(params, response_limit, proxy_list, upsert_batch_size, **kwargs)
+        if pipelined:
+            batches = run_stage(batches, fetch_stats, weight=lambda batch: len(batch[0]))
+
+        batch_number = 0
+        try:
+            while True:
+                start = time.perf_counter()
+                batch, cursor = next(batches, ([], None))
+                if pipelined:
+                    persist_stats.blocked_seconds += time.perf_counter() - start
+                else:
+                    fetch_stats.busy_seconds += time.perf_counter() - start
+                    fetch_stats.items += len(batch)
+                if not batch:
+                    break
+
+                if watermark_id is not None:
+                    for db_model in batch:
+                        if aktualisiert := self.get_aktualisiert(db_model):
+                            latest_aktualisiert = max(
+                                latest_aktualisiert or aktualisiert, aktualisiert
+                            )
+
                 _logger.debug(
-                    f'Upserting batch {batch_number} into {db_model.__tablename__}-Table.'
+                    f'Upserting batch {batch_number} into {batch[0].__tablename__}-Table.'
                 )
-                self.crud.create_or_update_multi(batch)
-                batch = []
+                start = time.perf_counter()
+                self.persist_batch(batch)
+                persist_stats.busy_seconds += time.perf_counter() - start
+                persist_stats.items += len(batch)
                 batch_number += 1
-                self.imported_count += upsert_batch_size
+                self.imported_count += len(batch)
 
-        if batch:
-            _logger.debug(
-                f'Upserting final batch ({batch_number}) into {batch[0].__tablename__}-Table.'
+                if checkpoint_id is not None and cursor is not None:
+                    self._save_checkpoint(checkpoint_id, params, cursor, latest_aktualisiert)
+        finally:
+            # stops the fetch stage if persisting failed
+            batches.close()  # type: ignore[attr-defined]
+            self.identity_map = None
+
+        if watermark_id is not None and self.facade.response_limit_reached:
+            # objects of the pages not fetched would be skipped by the next incremental run
+            _logger.warning(
+                f'Not advancing watermark of {self.entity_type}, as the import stopped at '
+                f'response_limit {response_limit}.'
+            )
+            watermark_id = None
+            if checkpoint_id is not None:
+                # the next run with the same watermark continues after the last page fetched
+                self._save_checkpoint(
+                    checkpoint_id, params, self.get_next_cursor(), latest_aktualisiert
+                )
+                checkpoint_id = None
+
+        if checkpoint_id is not None:
+            CRUD_IMPORT_CHECKPOINT.delete(checkpoint_id)
+
+        if watermark_id is not None and latest_aktualisiert is not None:
+            CRUD_IMPORT_WATERMARK.save_watermark(
+                watermark_id,
+                entity=self.entity_type,  # type: ignore[arg-type]
+                params=self._dump_params(params, _WATERMARK_EXCLUDE),
+                aktualisiert=min(latest_aktualisiert, run_start),
             )
-            self.crud.create_or_update_multi(batch)
-            self.imported_count += len(batch)
 
         _logger.debug(f'Imported {self.imported_count} {self.crud.model.__tablename__}.')
+        _logger.info(f'Import stages of {type(self).__name__}: {fetch_stats}; {persist_stats}.')
 
     def import_data(
         self,
@@ -117,14 +405,39 @@ class HttpImporter(
         response_limit: int = 1000,
         proxy_list: ProxyList | None = None,
         upsert_batch_size: int = 100,
+        resume: bool = True,
+        incremental: bool = False,
+        pipelined: bool = False,
+        max_circuit_pause: float = MAX_CIRCUIT_PAUSE_SECONDS,
         **kwargs,
     ):
-        """Import data."""
+        """Import data.
 
-        self.batch_upsert(
-            params=params,
-            response_limit=response_limit,
-            proxy_list=proxy_list,
-            upsert_batch_size=upsert_batch_size,
-            **kwargs,
-        )
+        If the circuit of the host opens (see :class:`CircuitOpenError`), the checkpoint of the last
+        committed batch is kept. ``resumable`` importers pause until the circuit lets requests
+        through again and resume from the checkpoint, for at most ``max_circuit_pause`` seconds in
+        total. Otherwise the error is raised, so that a later run resumes.
+        """
+        paused = 0.0
+        while True:
+            try:
+                self.batch_upsert(
+                    params=params,
+                    response_limit=response_limit,
+                    proxy_list=proxy_list,
+                    upsert_batch_size=upsert_batch_size,
+                    resume=resume,
+                    incremental=incremental,
+                    pipelined=pipelined,
+                    **kwargs,
+                )
+                return
+            except CircuitOpenError as e:
+                if not self.resumable or paused + e.retry_after > max_circuit_pause:
+                    _logger.error(f'Stopping {type(self).__name__}: {e}')
+                    raise
+
+                _logger.warning(f'Pausing {type(self).__name__} for {e.retry_after:.0f}s: {e}')
+                time.sleep(e.retry_after)
+                paused += e.retry_after
+                resume = True
@@ -0,0 +1,154 @@
+"""Benchmark runner for importers, measuring imported objects per second.
+
+Run against recorded responses to get repeatable numbers without network access::
+
+    # record once with network access
+    python -m backend.app.importer.benchmark drucksache --mode record
+    # replay offline, optionally with synthetic latency
+    python -m backend.app.importer.benchmark drucksache --mode replay --latency-ms 50
+
+The transport mode is passed to the facades via the environment, see ``HTTP_TRANSPORT_MODE``.
+"""
+
+import argparse
+import dataclasses
+import datetime
+import logging
+import os
+import time
+import typing as t
+
+import pytz
+
+from backend.app.core.logging import configure_logging
+from backend.app.importer.base import HttpImporter
+
+_logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class BenchmarkResult:
+    """Result of benchmarking an importer."""
+
+    name: str
+    objects: int
+    seconds: float
+    persisted: bool
+
+    @property
+    def objects_per_second(self) -> float:
+        return self.objects / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        mode = 'fetch+persist' if self.persisted else 'fetch'
+        return (
+            f'{self.name} ({mode}): {self.objects} objects in {self.seconds:.2f}s '
+            f'= {self.objects_per_second:.2f} objects/s'
+        )
+
+
+def benchmark_importer(
+    name: str,
+    importer: HttpImporter,
+    params: t.Any,
+    response_limit: int = 1000,
+    persist: bool = False,
+    upsert_batch_size: int = 100,
+) -> BenchmarkResult:
+    """Benchmark an importer.
+
+    Args:
+        name: Name of the benchmark in the result.
+        importer: Importer to benchmark.
+        params: Parameters passed to the importer.
+        response_limit: Maximal number of pages to fetch.
+        persist: If the objects are written to the database (``import_data``) or only fetched and
+            transformed (``fetch_data``).
+        upsert_batch_size: Batch size when persisting.
+    """
+    start = time.perf_counter()
+
+    if persist:
+        importer.import_data(
+            params=params, response_limit=response_limit, upsert_batch_size=upsert_batch_size
+        )
+        objects = importer.get_imported_count()
+    else:
+        objects = sum(1 for _ in importer.fetch_data(params=params, response_limit=response_limit))
+
+    result = BenchmarkResult(
+        name=name, objects=objects, seconds=time.perf_counter() - start, persisted=persist
+    )
+    _logger.info(str(result))
+    return result
+
+
+def benchmark_drucksache(
+    date_start: datetime.date, date_end: datetime.date, response_limit: int, persist: bool
+) -> BenchmarkResult:
+    from backend.app.facades.deutscher_bundestag.parameter_model import DrucksacheParameter
+    from backend.app.importer.dip_importer.dip_drucksache_importer import (
+        DIPBundestagDrucksacheImporter,
+    )
+
+    importer = DIPBundestagDrucksacheImporter(
+        import_vorgaenge=True, import_vorgangspositionen=False
+    )
+    params = DrucksacheParameter(
+        aktualisiert_start=datetime.datetime.combine(date_start, datetime.time(), pytz.UTC),
+        aktualisiert_end=datetime.datetime.combine(date_end, datetime.time(), pytz.UTC),
+    )
+    return benchmark_importer('drucksache', importer, params, response_limit, persist)
+
+
+def benchmark_bt_abstimmungen(
+    date_start: datetime.date, date_end: datetime.date, response_limit: int, persist: bool
+) -> BenchmarkResult:
+    from backend.app.facades.bundestag.parameter_model import BundestagAbstimmungenPointerParameter
+    from backend.app.importer.bundestag_importer.bt_abstimmungen_importer import (
+        BTAbstimmungenImporter,
+    )
+
+    importer = BTAbstimmungenImporter()
+    params = BundestagAbstimmungenPointerParameter(date_start=date_start, date_end=date_end)
+    return benchmark_importer(
+        'bt_abstimmungen', importer, params, response_limit, persist, upsert_batch_size=1
+    )
+
+
+BENCHMARKS: dict[
+    str, t.Callable[[datetime.date, datetime.date, int, bool], BenchmarkResult]
+] = {
+    'drucksache': benchmark_drucksache,
+    'bt_abstimmungen': benchmark_bt_abstimmungen,
+}
+"""Available benchmarks by name."""
+
+
+def main(argv: t.Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--mode', choices=('live', 'record', 'replay'), default='replay')
+    parser.add_argument('--archive-dir', help='Directory of recorded responses.')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--start', type=datetime.date.fromisoformat, default='2023-01-01')
+    parser.add_argument('--end', type=datetime.date.fromisoformat, default='2023-02-01')
+    parser.add_argument('--response-limit', type=int, default=10)
+    parser.add_argument('--persist', action='store_true', help='Also write to the database.')
+    args = parser.parse_args(argv)
+
+    # facades read their settings when the importers are created
+    os.environ['HTTP_TRANSPORT_MODE'] = args.mode
+    os.environ['HTTP_REPLAY_LATENCY_MS'] = str(args.latency_ms)
+    os.environ['HTTP_REPLAY_JITTER_MS'] = str(args.jitter_ms)
+    if args.archive_dir:
+        os.environ['HTTP_TRANSPORT_ARCHIVE_DIR'] = args.archive_dir
+
+    result = BENCHMARKS[args.benchmark](args.start, args.end, args.response_limit, args.persist)
+    print(result)
+
+
+if __name__ == '__main__':
+    configure_logging()
+    main()
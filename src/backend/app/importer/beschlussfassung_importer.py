@@ -1,3 +1,4 @@
+import asyncio
 from datetime import date, datetime, timedelta
 from enum import Enum
 from logging import getLogger
@@ -5,12 +6,19 @@ from sqlite3 import Date
 
 from pydantic import BaseModel, Field
 
+from backend.app.core.config import Settings
 from backend.app.core.logging import configure_logging
 from backend.app.crud.CRUDApi.crud_beschlussfassung import CRUD_Beschlussfassung
-from backend.app.crud.CRUDDIPBundestag.crud_drucksache import CRUD_DIP_DRUCKSACHE, CountsPerWeek
+from backend.app.crud.CRUDDIPBundestag.crud_drucksache import CRUD_DIP_DRUCKSACHE
+from backend.app.facades.deutscher_bundestag.async_facade import AsyncDIPBundestagFacade
 from backend.app.facades.deutscher_bundestag.model import DrucksacheTextListResponse, Zuordnung
 from backend.app.facades.deutscher_bundestag.parameter_model import DrucksacheParameter
 from backend.app.importer.dip_importer.dip_drucksache_importer import DIPBundestagDrucksacheImporter
+from backend.app.importer.dip_importer.reconciliation import (
+    DateRange,
+    find_missing_ranges,
+    reconcile_ids,
+)
 
 _logger = getLogger(__name__)
 
@@ -19,6 +27,7 @@ class FetchTypes(str, Enum):
     FULL = "full"
     NEW = "new"
     MISSING = "missing"
+    RECONCILE = "reconcile"
 
 
 def _create_drucksache_parameter_list(
@@ -70,6 +79,7 @@ def _import_relevant_beschlussfassungen(
             _create_drucksache_parameter_list(
                 drucksachetyp_list=drucksachetyp_filter,
                 vorgangstypen=vorgangstyp_filter,
+                # only used by the first run, later runs start at their watermark
                 aktualisiert_start=datetime.now() - timedelta(minutes=30),
             )
         )
@@ -87,56 +97,77 @@ def _import_relevant_beschlussfassungen(
             raise ValueError("date_start must be set if fetch is set to 'missing'")
         if date_end is None:
             raise ValueError("date_end must be set if fetch is set to 'missing'")
-        db_counts_per_week: list[CountsPerWeek] = CRUD_DIP_DRUCKSACHE.read_count_per_week(
-            date_start,
-            date_end,
-            drucksachetyp_filter,
-            vorgangstyp_filter,
+        drucksache_param_list = _create_drucksache_parameter_list(
+            drucksachetyp_list=drucksachetyp_filter,
+            vorgangstypen=vorgangstyp_filter,
         )
 
-        _logger.info("Comparing Drucksachen counts per week with API counts per week")
-
-        total_missing = 0
+        _logger.info("Comparing Drucksachen counts with API counts by bisecting the date range")
+
+        async def find_missing() -> list[DateRange]:
+            async with AsyncDIPBundestagFacade.get_instance(Settings()) as facade:
+                return await find_missing_ranges(
+                    facade,
+                    '/api/v1/drucksache',
+                    drucksache_param_list,
+                    lambda date_ranges: asyncio.to_thread(
+                        CRUD_DIP_DRUCKSACHE.read_counts,
+                        date_ranges,
+                        drucksachetyp_filter,
+                        vorgangstyp_filter,
+                    ),
+                    date_start,
+                    date_end,
+                )
 
-        for count_per_week in db_counts_per_week:
-            count_param_list = _create_drucksache_parameter_list(
-                drucksachetyp_list=drucksachetyp_filter,
-                datum_start=count_per_week.week_start_date,
-                datum_end=count_per_week.week_end_date,
-                vorgangstypen=vorgangstyp_filter,
+        missing_ranges = asyncio.run(find_missing())
+        for missing_range in missing_ranges:
+            _logger.debug(
+                "Found %s unimported Drucksachen from %s to %s",
+                missing_range.missing,
+                missing_range.start,
+                missing_range.end,
+            )
+            param_list.extend(
+                missing_range.apply(param)
+                for param, count in zip(drucksache_param_list, missing_range.api_counts)
+                if count > 0
             )
-
-            api_drucksache_count = 0
-            params_with_at_least_one_drucksache = []
-
-            for drucksachetyp_count_param in count_param_list:
-                count_drucksache = drucksache_importer.fetch_count(params=drucksachetyp_count_param)
-                if count_drucksache > 0:
-                    params_with_at_least_one_drucksache.append(drucksachetyp_count_param)
-                api_drucksache_count += count_drucksache
-
-            if api_drucksache_count > count_per_week.drucksache_count:
-                _logger.debug(
-                    "Found %s (imported: %s) unimported Drucksachen in year-week %s-%s",
-                    api_drucksache_count - count_per_week.drucksache_count,
-                    count_per_week.drucksache_count,
-                    count_per_week.year,
-                    count_per_week.week,
-                )
-                total_missing += api_drucksache_count - count_per_week.drucksache_count
-                param_list.extend(params_with_at_least_one_drucksache)
 
         _logger.info(
-            "Comparing Drucksachen counts per week with API counts per week finished. Found %s Drucksachen-Parameters to import (Total missing: %s)",
+            "Comparing Drucksachen counts with API counts finished. Found %s Drucksachen-Parameters to import (Total missing: %s)",
             len(param_list),
-            total_missing,
+            sum(missing_range.missing for missing_range in missing_ranges),
+        )
+
+    elif fetch == FetchTypes.RECONCILE:
+        if date_start is None:
+            raise ValueError("date_start must be set if fetch is set to 'reconcile'")
+        if date_end is None:
+            raise ValueError("date_end must be set if fetch is set to 'reconcile'")
+
+        # inserted and updated Drucksachen are imported by reconcile_ids, param_list stays empty
+        reconcile_ids(
+            drucksache_importer,
+            '/api/v1/drucksache',
+            _create_drucksache_parameter_list(
+                drucksachetyp_list=drucksachetyp_filter,
+                datum_start=date_start,
+                datum_end=date_end,
+                vorgangstypen=vorgangstyp_filter,
+            ),
+            CRUD_DIP_DRUCKSACHE.read_versions(
+                date_start, date_end, drucksachetyp_filter, vorgangstyp_filter
+            ),
+            delete=True,
         )
 
     _logger.info("Start import of data")
 
     for param in param_list:
         _logger.debug("Importing Drucksachen with parameter %s", param)
-        drucksache_importer.import_data(param)
+        # new Drucksachen are imported from the watermark of the previous run
+        drucksache_importer.import_data(param, incremental=fetch == FetchTypes.NEW)
         _logger.debug("Importing Drucksachen with parameter %s finished", param)
 
     _logger.info("Imported %s new Drucksachen.", drucksache_importer.get_imported_count())
@@ -1,11 +1,18 @@
+import asyncio
+import collections
+import dataclasses
 import datetime
 import logging
 from datetime import date
-from typing import Iterator
-from backend.app.core.config import settings
+from backend.app.core.config import Settings, settings
 from backend.app.core.logging import configure_logging
-from backend.app.crud.CRUDBundestag.crud_abstimmung import CRUD_BUNDESTAG_ABSTIMMUNG
+from backend.app.crud.CRUDBundestag.crud_abstimmung import (
+    CRUD_BUNDESTAG_ABSTIMMUNG,
+    AbstimmungIndexEntry,
+    CRUDBundestagAbstimmung,
+)
 from backend.app.crud.CRUDDIPBundestag.crud_drucksache import CRUD_DIP_DRUCKSACHE
+from backend.app.facades.async_facade import AsyncHttpFacade, iterate_blocking
 from backend.app.facades.bundestag.model import (
     BundestagAbstimmung,
     BundestagAbstimmungUrl,
@@ -32,58 +39,83 @@ from backend.app.models.bundestag.abstimmung_model import (
     BTRede,
     BTFraktionAbstimmung,
 )
-from typing import Any, Generic, Iterator, MutableMapping, Optional, TypeVar
+from typing import Any, AsyncIterator, Generic, Iterator, MutableMapping, Optional, TypeVar
 
 from backend.app.models.dip.drucksache_model import DIPDrucksache, DIPDrucksacheText
 
 _logger = logging.getLogger(__name__)
 
 
+ABSTIMMUNGEN_IN_FLIGHT = 8
+"""Default number of Abstimmungen fetched concurrently by :class:`BTAbstimmungenImporter`."""
+
+
+@dataclasses.dataclass(frozen=True)
+class RefreshPolicy:
+    """Decides which already imported Abstimmungen are imported again, to pick up corrections.
+
+    An Abstimmung is refreshed if any of the enabled conditions holds. By default, no Abstimmung is
+    refreshed.
+    """
+
+    newer_than_days: int | None = None
+    """Refresh Abstimmungen which took place in the last days, while corrections are likely."""
+
+    without_redner: bool = False
+    """Refresh Abstimmungen without Redner, e.g. because the Reden were published later."""
+
+    not_updated_for: datetime.timedelta | None = None
+    """Refresh Abstimmungen whose rows were not updated for this time."""
+
+    def should_refresh(self, entry: AbstimmungIndexEntry, today: datetime.date) -> bool:
+        if (
+            self.newer_than_days is not None
+            and (today - entry.abstimmung_date).days <= self.newer_than_days
+        ):
+            return True
+        if self.without_redner and not entry.has_redner:
+            return True
+        if self.not_updated_for is not None:
+            # updated_at is stored without time zone by the database server
+            return datetime.datetime.now() - entry.updated_at > self.not_updated_for
+        return False
+
+
 class BTAbstimmungenImporter(
     BTImporter[BundestagAbstimmung, BundestagAbstimmungenPointerParameter, BTAbstimmung]
 ):
+    crud: CRUDBundestagAbstimmung
+
     def __init__(self, import_rede: bool = True, import_drucksache: bool = True):
         super().__init__(crud=CRUD_BUNDESTAG_ABSTIMMUNG)
 
+        self.drucksache_import: DIPBundestagDrucksacheTextImporter | None = None
         if import_drucksache:
             self.drucksache_import = DIPBundestagDrucksacheTextImporter(
-                import_vorgaenge=True, import_vorgangspositionen=False
+                import_vorgaenge=True, import_vorgangspositionen=False, copy_texts=False
             )
 
         self.import_rede = import_rede
 
-    def batch_upsert(
-        self,
-        params: Optional[BundestagAbstimmungenPointerParameter] = None,
-        response_limit: int = 1000,
-        proxy_list: ProxyList | None = None,
-        upsert_batch_size: int = 100,
-        **kwargs: Any,
-    ):
-        batch: list[BTAbstimmung] = []
-        batch_number = 0
-        for db_model in self.fetch_data(
-            params=params, response_limit=response_limit, proxy_list=proxy_list, **kwargs
-        ):
-            batch.append(db_model)
-
-            if len(batch) >= upsert_batch_size:
-                _logger.debug(
-                    f'Upserting batch {batch_number} into {db_model.__tablename__}-Table.'
-                )
-                self.crud.upsert_many(batch)
-                batch = []
-                batch_number += 1
-                self.imported_count += upsert_batch_size
-
-        if batch:
-            _logger.debug(
-                f'Upserting final batch ({batch_number}) into {batch[0].__tablename__}-Table.'
+    def persist_batch(self, batch: list[BTAbstimmung]):
+        if self.identity_map is not None:
+            # one instance per person for all Abstimmungen of the import, mapped on the persisting
+            # thread, as the identity map modifies the shared instances
+            for abstimmung in batch:
+                for vote in abstimmung.individual_votes:
+                    vote.person = self.identity_map.add(vote.person)
+
+            # known persons are not written again, unless they changed
+            self.identity_map.preload(
+                self.crud.db,
+                BTPerson,
+                {
+                    vote.person.biography_url
+                    for abstimmung in batch
+                    for vote in abstimmung.individual_votes
+                },
             )
-            self.crud.create_or_update_multi(batch)
-            self.imported_count += len(batch)
-
-        _logger.debug(f'Imported {self.imported_count} {self.crud.model.__tablename__}.')
+        super().persist_batch(batch)
 
     def transform_model(
         self, data: BundestagAbstimmung, dip_drucksachen: list[DIPDrucksache] = []
@@ -104,7 +136,6 @@ class BTAbstimmungenImporter(
                 if einzelabstimmung.image_url
                 else None,
             )
-
             bt_einzelabstimmungen.append(
                 BTEinzelpersonAbstimmung(
                     vote=einzelabstimmung.vote,
@@ -204,6 +235,12 @@ class BTAbstimmungenImporter(
         proxy_list: ProxyList | None = None,
         **kwargs: Any,
     ) -> Iterator[BTAbstimmung]:
+        """Fetch data.
+
+        Up to ``max_in_flight`` Abstimmungen (default :data:`ABSTIMMUNGEN_IN_FLIGHT`) are fetched
+        concurrently, see :meth:`_fetch_abstimmungen`. They are still yielded in the order of their
+        pointers.
+        """
         existing_ids: set[int] | None = None
         if 'existing_ids' in kwargs:
             existing_ids = kwargs['existing_ids']
@@ -211,61 +248,163 @@ class BTAbstimmungenImporter(
             if not isinstance(existing_ids, set):
                 raise ValueError('existing_ids must be a set')
 
-        for abstimmung_pointer in self.facade.get_bundestag_abstimmung_pointers(
-            params=params, response_limit=response_limit
+        max_in_flight: int = kwargs.get('max_in_flight', ABSTIMMUNGEN_IN_FLIGHT)
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1.')
+
+        for bt_abstimmung, dip_drucksachen in iterate_blocking(
+            lambda: self._fetch_abstimmungen(params, response_limit, existing_ids, max_in_flight),
+            buffer_size=max_in_flight,
         ):
-            if existing_ids is not None and abstimmung_pointer.abstimmung_id in existing_ids:
-                _logger.debug(
-                    f'Abstimmung with id {abstimmung_pointer.abstimmung_id} already exists in database. Skipping.'
-                )
-                continue
-            individual_abstimmung_params = BundestagAbstimmungParameter(
-                abstimmung_id=abstimmung_pointer.abstimmung_id
-            )
+            yield self.transform_model(bt_abstimmung, dip_drucksachen=dip_drucksachen)
 
-            bt_abstimmung = self.facade.get_bundestag_abstimmung(
-                params=individual_abstimmung_params
-            )
+    async def _fetch_abstimmungen(
+        self,
+        params: BundestagAbstimmungenPointerParameter | None,
+        response_limit: int,
+        existing_ids: set[int] | None,
+        max_in_flight: int,
+    ) -> AsyncIterator[tuple[BundestagAbstimmung, list[DIPDrucksache]]]:
+        """Fetch Abstimmungen of the pointers of params concurrently, in the order of the pointers.
+
+        Requests are bounded per host: ``BUNDESTAG_MAX_CONCURRENT_REQUESTS`` each to the
+        Abstimmungen pages and to the subtitles of the Reden. DIP Drucksachen are looked up one at a
+        time, as the Drucksache importer keeps the pagination state of its facade.
+        """
+        max_concurrency = Settings().BUNDESTAG_MAX_CONCURRENT_REQUESTS
+        abstimmungen = AsyncHttpFacade(self.facade, max_concurrency)
+        reden = AsyncHttpFacade(self.facade, max_concurrency)
+        drucksachen = (
+            AsyncHttpFacade(self.drucksache_import.facade, max_concurrency=1)
+            if self.drucksache_import
+            else None
+        )
 
-            for bt_einzelabstimmung in self.facade.get_bundestag_abstimmung_individual_votes(
-                params=individual_abstimmung_params
-            ):
-                bt_abstimmung.individual_votes.append(bt_einzelabstimmung)
+        pointers = self.facade.get_bundestag_abstimmung_pointers(
+            params=params, response_limit=response_limit
+        )
+
+        def next_pointer() -> BundestagAbstimmungUrl | None:
+            return next(pointers, None)
 
-            if self.import_rede:
-                for redner in bt_abstimmung.redner:
-                    rede_params = BundestagRedeParameter(video_id=redner.video_id)
-                    bt_abstimmung_rede_text = self.facade.get_bundestag_rede_text(
-                        params=rede_params
+        pending: collections.deque[asyncio.Future] = collections.deque()
+        try:
+            while (pointer := await abstimmungen.run_blocking(next_pointer)) is not None:
+                if existing_ids is not None and pointer.abstimmung_id in existing_ids:
+                    _logger.debug(
+                        f'Abstimmung with id {pointer.abstimmung_id} already exists in database. Skipping.'
                     )
-                    redner.text = bt_abstimmung_rede_text
-
-            dip_drucksachen = []
-            if self.drucksache_import and len(bt_abstimmung.drucksachen) > 0:
-                drucksache_params = DrucksacheParameter(
-                    dokumentnummer=[
-                        drucksache.drucksache_name for drucksache in bt_abstimmung.drucksachen
-                    ]
+                    continue
+
+                abstimmung = self._fetch_abstimmung(
+                    pointer.abstimmung_id, abstimmungen, reden, drucksachen
                 )
-                dip_drucksachen = [
-                    dip_drucksache
-                    for dip_drucksache in self.drucksache_import.fetch_data(
-                        params=drucksache_params
-                    )
-                ]
+                pending.append(asyncio.ensure_future(abstimmung))
+                if len(pending) >= max_in_flight:
+                    yield await pending.popleft()
+
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for future in pending:
+                future.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+            for async_facade in (abstimmungen, reden, drucksachen):
+                if async_facade is not None:
+                    async_facade.close()
+
+    async def _fetch_abstimmung(
+        self,
+        abstimmung_id: int,
+        abstimmungen: AsyncHttpFacade,
+        reden: AsyncHttpFacade,
+        drucksachen: AsyncHttpFacade | None,
+    ) -> tuple[BundestagAbstimmung, list[DIPDrucksache]]:
+        """Fetch an Abstimmung with its individual votes, Reden and DIP Drucksachen.
+
+        The Abstimmung and its individual votes are fetched concurrently, followed by the Reden and
+        Drucksachen referenced by the Abstimmung.
+        """
+        individual_abstimmung_params = BundestagAbstimmungParameter(abstimmung_id=abstimmung_id)
+
+        bt_abstimmung, individual_votes = await asyncio.gather(
+            abstimmungen.run_blocking(
+                self.facade.get_bundestag_abstimmung, params=individual_abstimmung_params
+            ),
+            abstimmungen.run_blocking(self._fetch_individual_votes, individual_abstimmung_params),
+        )
+        bt_abstimmung.individual_votes.extend(individual_votes)
 
-            yield self.transform_model(bt_abstimmung, dip_drucksachen=dip_drucksachen)
+        rede_texts = (
+            [
+                reden.run_blocking(
+                    self.facade.get_bundestag_rede_text,
+                    params=BundestagRedeParameter(video_id=redner.video_id),
+                )
+                for redner in bt_abstimmung.redner
+            ]
+            if self.import_rede
+            else []
+        )
 
+        async def fetch_dip_drucksachen() -> list[DIPDrucksache]:
+            if drucksachen is None or len(bt_abstimmung.drucksachen) == 0:
+                return []
+            return await drucksachen.run_blocking(
+                self._fetch_dip_drucksachen,
+                [drucksache.drucksache_name for drucksache in bt_abstimmung.drucksachen],
+            )
+
+        texts, dip_drucksachen = await asyncio.gather(
+            asyncio.gather(*rede_texts), fetch_dip_drucksachen()
+        )
+        for redner, text in zip(bt_abstimmung.redner, texts):
+            redner.text = text
+
+        return bt_abstimmung, dip_drucksachen
 
-def import_bt_abstimmungen(date_start: datetime.date, date_end: datetime.date, full: bool = False):
+    def _fetch_individual_votes(
+        self, params: BundestagAbstimmungParameter
+    ) -> list[BundestagEinzelpersonAbstimmung]:
+        return list(self.facade.get_bundestag_abstimmung_individual_votes(params=params))
+
+    def _fetch_dip_drucksachen(self, dokumentnummern: list[str]) -> list[DIPDrucksache]:
+        return list(
+            self.drucksache_import.fetch_data(  # type: ignore[union-attr]
+                params=DrucksacheParameter(dokumentnummer=dokumentnummern)
+            )
+        )
+
+
+def import_bt_abstimmungen(
+    date_start: datetime.date,
+    date_end: datetime.date,
+    full: bool = False,
+    refresh_policy: RefreshPolicy = RefreshPolicy(),
+):
+    """Import Abstimmungen of a date range.
+
+    Unless ``full`` is set, Abstimmungen which were imported before are skipped, except the ones
+    to refresh according to ``refresh_policy``. They are looked up in an index of the imported
+    Abstimmungen, see :meth:`CRUDBundestagAbstimmung.read_index`.
+    """
     _logger.info(f'Importing Abstimmungen from {date_start} to {date_end}.')
     importer = BTAbstimmungenImporter()
     params = BundestagAbstimmungenPointerParameter(date_start=date_start, date_end=date_end)
 
     if not full:
-        existing_abstimmungen = importer.crud.read_all()
-
-        existing_abstimmungen_ids = set(abstimmung.id for abstimmung in existing_abstimmungen)
+        index = importer.crud.read_index()
+        today = datetime.date.today()
+        existing_abstimmungen_ids = {
+            abstimmung_id
+            for abstimmung_id, entry in index.items()
+            if not refresh_policy.should_refresh(entry, today)
+        }
+        _logger.info(
+            f'Skipping {len(existing_abstimmungen_ids)} of {len(index)} imported Abstimmungen, '
+            f'refreshing {len(index) - len(existing_abstimmungen_ids)}.'
+        )
 
         importer.import_data(
             params=params,
@@ -23,8 +23,6 @@ SQLModelType = TypeVar("SQLModelType", bound=Base)  # pylint: disable=invalid-na
 
 ParamMapping = MutableMapping
 
-DELAY_BETWEEN_REQUESTS = 0.5
-
 
 class BTImporter(
     HttpImporter[BundestagFacade, PydanticDataModelType, PydanticParameterModelType, SQLModelType]
@@ -34,7 +32,6 @@ class BTImporter(
     def __init__(
         self,
         crud: CRUDBase[SQLModelType],
-        delay_between_requests: float = DELAY_BETWEEN_REQUESTS,
     ):
         """
         Initialize DIPImporter.
@@ -42,5 +39,4 @@ class BTImporter(
         super().__init__(
             crud=crud,
             facade=BundestagFacade.get_instance(Settings()),
-            delay_between_requests=delay_between_requests,
         )
@@ -1,6 +1,5 @@
 """Class for DIP Bundestag Drucksache Importer."""
 
-import time
 from datetime import datetime
 from logging import getLogger
 from tokenize import endpats
@@ -12,13 +11,11 @@ from backend.app.core.config import Settings
 from backend.app.core.logging import configure_logging
 from backend.app.crud.CRUDDIPBundestag.crud_drucksache import CRUD_DIP_DRUCKSACHE
 from backend.app.facades.deutscher_bundestag.model import Drucksache, Vorgang, Zuordnung
-from backend.app.facades.deutscher_bundestag.parameter_model import (
-    DrucksacheParameter,
-    VorgangParameter,
-)
+from backend.app.facades.deutscher_bundestag.parameter_model import DrucksacheParameter
 from backend.app.facades.util import ProxyList
 from backend.app.importer.dip_importer.dip_importer import DIPImporter
 from backend.app.importer.dip_importer.dip_vorgang_importer import DIPBundestagVorgangImporter
+from backend.app.importer.dip_importer.dip_vorgang_resolver import DIPVorgangResolver
 
 # import from all models to ensure they are registered
 from backend.app.models.dip.models import (
@@ -35,6 +32,8 @@ from backend.app.models.dip.models import (
 class DIPBundestagDrucksacheImporter(DIPImporter[Drucksache, DrucksacheParameter, DIPDrucksache]):
     """Class for DIP Bundestag Drucksache Importer."""
 
+    entity_type = 'drucksache'
+
     def __init__(
         self,
         import_vorgaenge: bool = True,
@@ -52,6 +51,12 @@ class DIPBundestagDrucksacheImporter(DIPImporter[Drucksache, DrucksacheParameter
             self.vorgang_importer = DIPBundestagVorgangImporter(
                 import_vorgangspositionen=import_vorgangspositionen, raise_on_error=raise_on_error
             )
+            self.vorgang_resolver = DIPVorgangResolver(self.vorgang_importer)
+
+    def close(self):
+        super().close()
+        if self.import_vorgaenge:
+            self.vorgang_resolver.close()
 
     def transform_model(self, data: Drucksache) -> DIPDrucksache:
         """Transform data."""
@@ -106,7 +111,6 @@ class DIPBundestagDrucksacheImporter(DIPImporter[Drucksache, DrucksacheParameter
         proxy_list: ProxyList | None = None,
     ) -> int:
         """Fetch count."""
-        time.sleep(self.delay_between_requests)
         return self.facade.get_count(
             endpoint='/api/v1/drucksache',
             params=params,
@@ -120,29 +124,45 @@ class DIPBundestagDrucksacheImporter(DIPImporter[Drucksache, DrucksacheParameter
         proxy_list: ProxyList | None = None,
         **kwargs: Any,
     ) -> Iterator[DIPDrucksache]:
-        """Fetch data."""
+        """Fetch data.
 
-        for model in self.facade.get_drucksachen(
-            params=params,
-            response_limit=response_limit,
-            proxy_list=proxy_list,
-            raise_on_error=self.raise_on_error,
-        ):
-            # if model.id == 271560:
-            #     print('debug')
-            db_model = self.transform_model(model)
-
-            if self.import_vorgaenge:
-                time.sleep(self.delay_between_requests)
-                for vorgang_pydantic in self.vorgang_importer.fetch_data(
-                    params=VorgangParameter(
-                        drucksache=db_model.id,
-                    ),
-                    proxy_list=proxy_list,
-                ):
-                    db_model.vorgaenge.append(vorgang_pydantic)
-
-            yield db_model
+        If ``window_count`` is given, the Drucksachen are fetched in this number of concurrent date
+        windows, see :meth:`fetch_sharded`. ``response_limit`` is ignored in this case. If
+        ``skip_unchanged`` is set, Drucksachen unchanged since their last import are skipped, see
+        :meth:`skip_unchanged`.
+        """
+
+        window_count: int | None = kwargs.get('window_count')
+        models = (
+            self.fetch_sharded(
+                'get_drucksachen_sharded', params, window_count, proxy_list, self.raise_on_error
+            )
+            if window_count
+            else self.facade.get_drucksachen(
+                params=params,
+                response_limit=response_limit,
+                proxy_list=proxy_list,
+                raise_on_error=self.raise_on_error,
+            )
+        )
+
+        for page in self.iter_pages(models):
+            if kwargs.get('skip_unchanged'):
+                page = self.skip_unchanged(page)
+
+            vorgaenge = (
+                self.vorgang_resolver.resolve_drucksachen(page, proxy_list=proxy_list)
+                if self.import_vorgaenge
+                else {}
+            )
+
+            for model in page:
+                db_model = self.transform_model(model)
+                # an untouched association keeps the stored Vorgaenge, see BulkUpserter
+                if model.id in vorgaenge:
+                    db_model.vorgaenge.extend(vorgaenge[model.id])
+
+                yield db_model
 
 
 def import_dip_bundestag():
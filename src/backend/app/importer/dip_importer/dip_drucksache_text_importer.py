@@ -1,20 +1,18 @@
 """Class for DIP Bundestag Drucksache-Text Importer."""
 
-import time
 from datetime import date, datetime, timezone
 from typing import Any, Iterator, Optional
 
 from backend.app.core.config import Settings
 from backend.app.core.logging import configure_logging
+from backend.app.crud.base import Base
 from backend.app.crud.CRUDDIPBundestag.crud_drucksache import CRUD_DIP_DRUCKSACHE
 from backend.app.facades.deutscher_bundestag.model import DrucksacheText
-from backend.app.facades.deutscher_bundestag.parameter_model import (
-    DrucksacheParameter,
-    VorgangParameter,
-)
+from backend.app.facades.deutscher_bundestag.parameter_model import DrucksacheParameter
 from backend.app.facades.util import ProxyList
 from backend.app.importer.dip_importer.dip_importer import DIPImporter
 from backend.app.importer.dip_importer.dip_vorgang_importer import DIPBundestagVorgangImporter
+from backend.app.importer.dip_importer.dip_vorgang_resolver import DIPVorgangResolver
 
 # import from all models to ensure they are registered
 from backend.app.models.dip.models import (
@@ -33,17 +31,37 @@ class DIPBundestagDrucksacheTextImporter(
 ):
     """Class for DIP Bundestag Drucksache-Text Importer."""
 
-    def __init__(self, import_vorgaenge: bool = True, import_vorgangspositionen: bool = True):
+    entity_type = 'drucksache_text'
+    text_model: type[Base] | None = DIPDrucksacheText
+    text_parent_key = 'drucksache_id'
+
+    def __init__(
+        self,
+        import_vorgaenge: bool = True,
+        import_vorgangspositionen: bool = True,
+        copy_texts: bool = True,
+    ):
         """
         Initialize DIPImporter.
+
+        If ``copy_texts`` is not set, texts are part of the fetched Drucksachen instead of being
+        loaded with ``COPY``, e.g. if the Drucksachen are persisted by another importer.
         """
         super().__init__(CRUD_DIP_DRUCKSACHE)
+        if not copy_texts:
+            self.text_model = None
 
         self.import_vorgaenge = import_vorgaenge
         if import_vorgaenge:
             self.vorgang_importer = DIPBundestagVorgangImporter(
                 import_vorgangspositionen=import_vorgangspositionen
             )
+            self.vorgang_resolver = DIPVorgangResolver(self.vorgang_importer)
+
+    def close(self):
+        super().close()
+        if self.import_vorgaenge:
+            self.vorgang_resolver.close()
 
     def transform_model(self, data: DrucksacheText) -> DIPDrucksache:
         """Transform data."""
@@ -75,12 +93,6 @@ class DIPBundestagDrucksacheTextImporter(
             [DIPRessort(**ressort.model_dump()) for ressort in data.ressort] if data.ressort else []
         )
 
-        dip_drucksache_text = (
-            DIPDrucksacheText(drucksache_id=data.id, text=data.text.replace('\x00', ''))
-            if data.text
-            else None
-        )
-
         return DIPDrucksache(
             **data.model_dump(
                 exclude={
@@ -97,7 +109,6 @@ class DIPBundestagDrucksacheTextImporter(
             urheber=dip_urheber,
             vorgangsbezug=dip_vorgangsbezug,
             ressort=dip_ressort,
-            drucksache_text=dip_drucksache_text,
         )
 
     def fetch_data(
@@ -107,26 +118,43 @@ class DIPBundestagDrucksacheTextImporter(
         proxy_list: ProxyList | None = None,
         **kwargs: Any,
     ) -> Iterator[DIPDrucksache]:
-        """Fetch data."""
+        """Fetch data.
 
-        for model in self.facade.get_drucksachen_text(
+        If ``skip_unchanged`` is set, Drucksachen unchanged since their last import are skipped,
+        see :meth:`skip_unchanged`. If ``stream`` is set, Drucksachen are parsed one by one while a
+        page is read, see :meth:`DIPBundestagFacade.get_drucksachen_text`.
+        """
+
+        models = self.facade.get_drucksachen_text(
             params=params,
             response_limit=response_limit,
             proxy_list=proxy_list,
-        ):
-            db_model = self.transform_model(model)
-
-            if self.import_vorgaenge:
-                time.sleep(self.delay_between_requests)
-                for vorgang_pydantic in self.vorgang_importer.fetch_data(
-                    params=VorgangParameter(
-                        drucksache=db_model.id,
-                    ),
-                    proxy_list=proxy_list,
-                ):
-                    db_model.vorgaenge.append(vorgang_pydantic)
-
-            yield db_model
+            stream=kwargs.get('stream', False),
+        )
+
+        for page in self.iter_pages(models):
+            if kwargs.get('skip_unchanged'):
+                page = self.skip_unchanged(page)
+
+            vorgaenge = (
+                self.vorgang_resolver.resolve_drucksachen(page, proxy_list=proxy_list)
+                if self.import_vorgaenge
+                else {}
+            )
+
+            for model in page:
+                db_model = self.transform_model(model)
+                # an untouched association keeps the stored Vorgaenge, see BulkUpserter
+                if model.id in vorgaenge:
+                    db_model.vorgaenge.extend(vorgaenge[model.id])
+                if self.text_model is not None:
+                    self.defer_text(model.id, model.text or None)
+                elif model.text:
+                    db_model.drucksache_text = DIPDrucksacheText(
+                        drucksache_id=model.id, text=model.text.replace('\x00', '')
+                    )
+
+                yield db_model
 
 
 def import_dip_bundestag():
@@ -1,13 +1,22 @@
 """Class for DIP Bundestag Plenarprotokoll Importer."""
 
+import asyncio
+import datetime
+import hashlib
+import json
 import logging
+import typing as t
 from typing import Any, Generic, Iterator, MutableMapping, Optional, TypeVar
 
 from pydantic import BaseModel
 
 from backend.app.core.config import Settings
 from backend.app.crud.base import Base, CRUDBase
-from backend.app.facades.deutscher_bundestag.facade import DIPBundestagFacade
+from backend.app.crud.CRUDImporter.crud_fingerprint import CRUD_IMPORT_FINGERPRINT
+from backend.app.facades.async_facade import iterate_blocking
+from backend.app.facades.deutscher_bundestag.async_facade import AsyncDIPBundestagFacade
+from backend.app.facades.deutscher_bundestag.facade import PAGE_SIZE, DIPBundestagFacade
+from backend.app.facades.deutscher_bundestag.parameter_model import CommonParameter
 from backend.app.facades.util import ProxyList
 from backend.app.importer.base import HttpImporter
 
@@ -21,9 +30,34 @@ PydanticParameterModelType = TypeVar(
 SQLModelType = TypeVar("SQLModelType", bound=Base)  # pylint: disable=invalid-name
 
 
+class IdentifiedDocument(t.Protocol):
+    """DIP document with an id, e.g. a Drucksache or a Vorgang."""
+
+    id: int
+
+    def model_dump(self, *, mode: str = ...) -> dict[str, Any]:
+        ...
+
+
+DocumentType = TypeVar("DocumentType", bound=IdentifiedDocument)  # pylint: disable=invalid-name
+
+
 ParamMapping = MutableMapping
 
-DELAY_BETWEEN_REQUESTS = 0.5
+_logger = logging.getLogger(__name__)
+
+
+ID_FILTER_BATCH_SIZE = 50
+"""Number of ids requested with a single multi-valued ``f.id`` filter."""
+
+
+def content_fingerprint(model: IdentifiedDocument) -> str:
+    """Get hash of the canonical JSON of a DIP document."""
+    return hashlib.sha256(
+        json.dumps(
+            model.model_dump(mode='json'), sort_keys=True, separators=(',', ':'), ensure_ascii=False
+        ).encode()
+    ).hexdigest()
 
 
 class DIPImporter(
@@ -33,10 +67,17 @@ class DIPImporter(
 ):
     """Class for DIP Bundestag Importer."""
 
+    resumable = True
+
+    text_model: type[Base] | None = None
+    """Model of texts loaded with ``COPY`` after each persisted batch, see :meth:`defer_text`."""
+
+    text_parent_key: str = ''
+    """Column of ``text_model`` referencing the imported objects."""
+
     def __init__(
         self,
         crud: CRUDBase[SQLModelType],
-        delay_between_requests: float = DELAY_BETWEEN_REQUESTS,
     ):
         """
         Initialize DIPImporter.
@@ -44,5 +85,202 @@ class DIPImporter(
         super().__init__(
             crud=crud,
             facade=DIPBundestagFacade.get_instance(Settings()),
-            delay_between_requests=delay_between_requests,
         )
+        self._page_cursor: str | None = None
+        self._iterating_pages = False
+        self._sharded = False
+        self._async_facade: AsyncDIPBundestagFacade | None = None
+        self._event_loop: asyncio.AbstractEventLoop | None = None
+        self._deferred_texts: dict[int, str | None] = {}
+        self._pending_fingerprints: dict[int, str] = {}
+
+    def defer_text(self, object_id: int, text: str | None):
+        """Load the text of an imported object with ``COPY`` once its batch is persisted.
+
+        Texts are not part of the transformed objects, so that large texts bypass the ORM. Texts
+        are only kept until their batch is persisted. ``None`` deletes a previous text.
+        """
+        self._deferred_texts[object_id] = text
+
+    def persist_batch(self, batch: list[SQLModelType]):
+        persisted = self.write_batch(batch)
+        # texts and fingerprints of rejected objects are dropped, they are fetched again on retry
+        texts = {obj.id: self._deferred_texts.pop(obj.id, None) for obj in batch}
+        fingerprints = {
+            obj.id: self._pending_fingerprints.pop(obj.id)
+            for obj in batch
+            if obj.id in self._pending_fingerprints
+        }
+        if self.text_model is not None:
+            self.crud.copy_texts(
+                self.text_model,
+                self.text_parent_key,
+                ((obj.id, texts[obj.id]) for obj in persisted),
+            )
+        fingerprints = {obj.id: fingerprints[obj.id] for obj in persisted if obj.id in fingerprints}
+        if fingerprints:
+            # fingerprints are only computed with an entity type, see skip_unchanged
+            assert self.entity_type is not None
+            CRUD_IMPORT_FINGERPRINT.save_fingerprints(self.entity_type, fingerprints)
+
+    def skip_unchanged(self, page: list[DocumentType]) -> list[DocumentType]:
+        """Get the documents of a page which changed since they were last imported.
+
+        The fingerprints of the documents (see :func:`content_fingerprint`) are compared with the
+        stored ones in one query, so unchanged documents can be skipped before they are transformed
+        and their references are fetched. The fingerprints of the changed documents are stored once
+        their batch is persisted. Only importers with an ``entity_type`` can skip documents.
+        """
+        assert self.entity_type is not None, f'{type(self).__name__} has no entity_type.'
+        fingerprints = {model.id: content_fingerprint(model) for model in page}
+        stored = CRUD_IMPORT_FINGERPRINT.read_fingerprints(self.entity_type, fingerprints)
+
+        changed = [model for model in page if stored.get(model.id) != fingerprints[model.id]]
+        for model in changed:
+            self._pending_fingerprints[model.id] = fingerprints[model.id]
+
+        if len(changed) < len(page):
+            _logger.debug(f'Skipping {len(page) - len(changed)} unchanged {self.entity_type}.')
+        return changed
+
+    def is_resumable(self, **kwargs: Any) -> bool:
+        """Sharded runs cannot be resumed, see :meth:`fetch_sharded`."""
+        return self.resumable and not kwargs.get('window_count')
+
+    def get_resume_cursor(self) -> str | None:
+        if self._sharded:
+            return None
+        if self._iterating_pages:
+            return self._page_cursor
+        return self.facade.get_page_cursor()
+
+    def get_next_cursor(self) -> str | None:
+        return self.facade.get_cursor()
+
+    def iter_pages(
+        self, models: t.Iterable[PydanticDataModelType], page_size: int = PAGE_SIZE
+    ) -> Iterator[list[PydanticDataModelType]]:
+        """Group fetched documents into pages, e.g. to resolve their references in bulk.
+
+        As documents of a page are yielded after the facade moved on to later DIP pages, the
+        cursor to resume from is the one of the first document of the page being processed.
+        """
+        self._iterating_pages = True
+        try:
+            page: list[PydanticDataModelType] = []
+            for model in models:
+                if not page:
+                    page_cursor = self.facade.get_page_cursor()
+                page.append(model)
+
+                if len(page) >= page_size:
+                    self._page_cursor = page_cursor
+                    yield page
+                    page = []
+
+            if page:
+                self._page_cursor = page_cursor
+                yield page
+        finally:
+            self._iterating_pages = False
+
+    def with_cursor(
+        self, params: Optional[PydanticParameterModelType], cursor: str
+    ) -> PydanticParameterModelType:
+        if params is None:
+            return CommonParameter(cursor=cursor)  # type: ignore[return-value]
+        return params.model_copy(update={'cursor': cursor})
+
+    def params_for_ids(self, object_ids: list[str]) -> Iterator[PydanticParameterModelType]:
+        for start in range(0, len(object_ids), ID_FILTER_BATCH_SIZE):
+            ids = [int(object_id) for object_id in object_ids[start : start + ID_FILTER_BATCH_SIZE]]
+            yield CommonParameter(id=ids)  # type: ignore[misc]
+
+    def with_watermark(
+        self, params: Optional[PydanticParameterModelType], watermark: datetime.datetime
+    ) -> PydanticParameterModelType:
+        if params is None:
+            return CommonParameter(aktualisiert_start=watermark)  # type: ignore[return-value]
+        return params.model_copy(update={'aktualisiert_start': watermark, 'cursor': None})
+
+    def fetch_sharded(
+        self,
+        method_name: str,
+        params: Optional[PydanticParameterModelType],
+        window_count: int,
+        proxy_list: ProxyList | None = None,
+        raise_on_error: bool = False,
+    ) -> Iterator[PydanticDataModelType]:
+        """Fetch documents with a sharded method of :class:`AsyncDIPBundestagFacade`.
+
+        The ``aktualisiert`` range of params is split into ``window_count`` windows of roughly equal
+        size, which are fetched concurrently. Documents are returned in arbitrary order and the
+        run cannot be resumed from a cursor, so no checkpoints are saved, see :meth:`is_resumable`.
+        """
+
+        async def documents() -> t.AsyncIterator[PydanticDataModelType]:
+            async with AsyncDIPBundestagFacade.get_instance(
+                Settings(), max_concurrency=window_count
+            ) as facade:
+                async for document in getattr(facade, method_name)(
+                    params, window_count, proxy_list, raise_on_error
+                ):
+                    yield document
+
+        # the cursor of the blocking facade does not belong to the sharded query
+        self._sharded = True
+        try:
+            yield from iterate_blocking(documents)
+        finally:
+            self._sharded = False
+
+    def fetch_concurrently(
+        self,
+        method_name: str,
+        params_list: t.Sequence[BaseModel],
+        proxy_list: ProxyList | None = None,
+        raise_on_error: bool = False,
+    ) -> list[list[t.Any]]:
+        """Fetch all documents of many independent queries with a method of
+        :class:`AsyncDIPBundestagFacade`, e.g. the Vorgangspositionen of all Vorgaenge of a page.
+
+        The queries run concurrently and share one rate budget. The documents are returned per
+        query, in the order of ``params_list``. The async facade and its event loop are created on
+        the first call and reused by later calls of the importer, e.g. for every page.
+        """
+        if not params_list:
+            return []
+
+        if self._async_facade is None or self._event_loop is None:
+            self._event_loop = asyncio.new_event_loop()
+            self._async_facade = AsyncDIPBundestagFacade.get_instance(Settings())
+        facade, event_loop = self._async_facade, self._event_loop
+
+        async def fetch(params: BaseModel) -> list[t.Any]:
+            return [
+                document
+                async for document in getattr(facade, method_name)(
+                    params=params, proxy_list=proxy_list, raise_on_error=raise_on_error
+                )
+            ]
+
+        async def fetch_all() -> list[list[t.Any]]:
+            return list(await asyncio.gather(*(fetch(params) for params in params_list)))
+
+        return event_loop.run_until_complete(fetch_all())
+
+    def close(self):
+        """Shut down the async facade and event loop of :meth:`fetch_concurrently`, if created."""
+        if self._async_facade is not None:
+            self._async_facade.close()
+            self._async_facade = None
+        if self._event_loop is not None:
+            self._event_loop.close()
+            self._event_loop = None
+
+    def import_data(self, *args: Any, **kwargs: Any):
+        """Import data, see :meth:`HttpImporter.import_data`, and :meth:`close` afterwards."""
+        try:
+            super().import_data(*args, **kwargs)
+        finally:
+            self.close()
@@ -1,20 +1,17 @@
 """Class for DIP Bundestag Plenarprotokoll Importer."""
 
 import datetime
-import time
 from typing import Any, Iterator
 
 from backend.app.core.config import Settings
 from backend.app.core.logging import configure_logging
 from backend.app.crud.CRUDDIPBundestag.crud_plenarprotokoll import CRUD_DIP_PLENARPROTOKOLL
 from backend.app.facades.deutscher_bundestag.model import Plenarprotokoll
-from backend.app.facades.deutscher_bundestag.parameter_model import (
-    PlenarprotokollParameter,
-    VorgangParameter,
-)
+from backend.app.facades.deutscher_bundestag.parameter_model import PlenarprotokollParameter
 from backend.app.facades.util import ProxyList
 from backend.app.importer.dip_importer.dip_importer import DIPImporter
 from backend.app.importer.dip_importer.dip_vorgang_importer import DIPBundestagVorgangImporter
+from backend.app.importer.dip_importer.dip_vorgang_resolver import DIPVorgangResolver
 
 # import from all models to ensure they are registered
 from backend.app.models.dip.models import (
@@ -30,6 +27,8 @@ class DIPBundestagPlenarprotokollImporter(
 ):
     """Class for DIP Bundestag Plenarprotokoll Importer."""
 
+    entity_type = 'plenarprotokoll'
+
     def __init__(self, import_vorgaenge: bool = True, import_vorgangspositionen: bool = True):
         """
         Initialize DIPImporter.
@@ -43,6 +42,12 @@ class DIPBundestagPlenarprotokollImporter(
             self.vorgang_importer = DIPBundestagVorgangImporter(
                 import_vorgangspositionen=import_vorgangspositionen
             )
+            self.vorgang_resolver = DIPVorgangResolver(self.vorgang_importer)
+
+    def close(self):
+        super().close()
+        if self.import_vorgaenge:
+            self.vorgang_resolver.close()
 
     def transform_model(self, data: Plenarprotokoll) -> DIPPlenarprotokoll:
         """Transform data."""
@@ -75,24 +80,26 @@ class DIPBundestagPlenarprotokollImporter(
     ) -> Iterator[DIPPlenarprotokoll]:
         """Fetch data."""
 
-        for model in self.facade.get_plenarprotokolle(
+        models = self.facade.get_plenarprotokolle(
             params=params,
             response_limit=response_limit,
             proxy_list=proxy_list,
-        ):
-            db_model = self.transform_model(model)
-
-            if self.import_vorgaenge:
-                time.sleep(self.delay_between_requests)
-                for vorgang in self.vorgang_importer.fetch_data(
-                    params=VorgangParameter(
-                        plenarprotokoll=db_model.id,
-                    ),
-                    proxy_list=proxy_list,
-                ):
-                    db_model.vorgaenge.append(vorgang)
-
-            yield db_model
+        )
+
+        for page in self.iter_pages(models):
+            vorgaenge = (
+                self.vorgang_resolver.resolve_plenarprotokolle(page, proxy_list=proxy_list)
+                if self.import_vorgaenge
+                else {}
+            )
+
+            for model in page:
+                db_model = self.transform_model(model)
+                # an untouched association keeps the stored Vorgaenge, see BulkUpserter
+                if model.id in vorgaenge:
+                    db_model.vorgaenge.extend(vorgaenge[model.id])
+
+                yield db_model
 
 
 def import_dip_bundestag():
@@ -1,20 +1,17 @@
 """Class for DIP Bundestag Plenarprotokoll Importer."""
 
 import datetime
-import time
 from typing import Any, Iterator
 
 from backend.app.core.config import Settings
 from backend.app.core.logging import configure_logging
 from backend.app.crud.CRUDDIPBundestag.crud_plenarprotokoll import CRUD_DIP_PLENARPROTOKOLL
 from backend.app.facades.deutscher_bundestag.model import PlenarprotokollText
-from backend.app.facades.deutscher_bundestag.parameter_model import (
-    PlenarprotokollParameter,
-    VorgangParameter,
-)
+from backend.app.facades.deutscher_bundestag.parameter_model import PlenarprotokollParameter
 from backend.app.facades.util import ProxyList
 from backend.app.importer.dip_importer.dip_importer import DIPImporter
 from backend.app.importer.dip_importer.dip_vorgang_importer import DIPBundestagVorgangImporter
+from backend.app.importer.dip_importer.dip_vorgang_resolver import DIPVorgangResolver
 
 # import from all models to ensure they are registered
 from backend.app.models.dip.models import (
@@ -30,6 +27,10 @@ class DIPBundestagPlenarprotokollImporter(
 ):
     """Class for DIP Bundestag Plenarprotokoll Importer."""
 
+    entity_type = 'plenarprotokoll_text'
+    text_model = DIPPlenarprotokollText
+    text_parent_key = 'plenarprotokoll_id'
+
     def __init__(self, import_vorgaenge: bool = True, import_vorgangspositionen: bool = True):
         """
         Initialize DIPImporter.
@@ -42,6 +43,12 @@ class DIPBundestagPlenarprotokollImporter(
             self.vorgang_importer = DIPBundestagVorgangImporter(
                 import_vorgangspositionen=import_vorgangspositionen
             )
+            self.vorgang_resolver = DIPVorgangResolver(self.vorgang_importer)
+
+    def close(self):
+        super().close()
+        if self.import_vorgaenge:
+            self.vorgang_resolver.close()
 
     def transform_model(self, data: PlenarprotokollText) -> DIPPlenarprotokoll:
         """Transform data."""
@@ -59,17 +66,10 @@ class DIPBundestagPlenarprotokollImporter(
             else []
         )
 
-        dip_plenarprotokoll_text = (
-            DIPPlenarprotokollText(plenarprotokoll_id=data.id, text=data.text)
-            if data.text
-            else None
-        )
-
         return DIPPlenarprotokoll(
             **data.model_dump(exclude={'fundstelle', 'vorgangsbezug', 'text'}),
             fundstelle=dip_fundstelle,
             vorgangsbezug=dip_vorgangsbezug,
-            plenarprotokoll_text=dip_plenarprotokoll_text,
         )
 
     def fetch_data(
@@ -79,22 +79,31 @@ class DIPBundestagPlenarprotokollImporter(
         proxy_list: ProxyList | None = None,
         **kwargs: Any,
     ) -> Iterator[DIPPlenarprotokoll]:
-        """Fetch data."""
-
-        for model in self.facade.get_plenarprotokolle_text(params, response_limit, proxy_list):
-            db_model = self.transform_model(model)
-
-            if self.import_vorgaenge:
-                time.sleep(self.delay_between_requests)
-                for vorgang in self.vorgang_importer.fetch_data(
-                    params=VorgangParameter(
-                        plenarprotokoll=db_model.id,
-                    ),
-                    proxy_list=proxy_list,
-                ):
-                    db_model.vorgaenge.append(vorgang)
-
-            yield db_model
+        """Fetch data.
+
+        If ``stream`` is set, Plenarprotokolle are parsed one by one while a page is read, see
+        :meth:`DIPBundestagFacade.get_plenarprotokolle_text`.
+        """
+
+        models = self.facade.get_plenarprotokolle_text(
+            params, response_limit, proxy_list, stream=kwargs.get('stream', False)
+        )
+
+        for page in self.iter_pages(models):
+            vorgaenge = (
+                self.vorgang_resolver.resolve_plenarprotokolle(page, proxy_list=proxy_list)
+                if self.import_vorgaenge
+                else {}
+            )
+
+            for model in page:
+                db_model = self.transform_model(model)
+                self.defer_text(model.id, model.text or None)
+                # an untouched association keeps the stored Vorgaenge, see BulkUpserter
+                if model.id in vorgaenge:
+                    db_model.vorgaenge.extend(vorgaenge[model.id])
+
+                yield db_model
 
 
 def import_dip_bundestag():
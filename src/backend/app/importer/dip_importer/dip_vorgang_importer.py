@@ -1,7 +1,7 @@
 """Class for DIP Bundestag Vorgang Importer."""
 
 import logging
-import time
+import typing as t
 from datetime import datetime
 from typing import Any, Iterator
 
@@ -10,7 +10,7 @@ import pytz
 from backend.app.core.config import Settings
 from backend.app.core.logging import configure_logging
 from backend.app.crud.CRUDDIPBundestag.crud_vorgang import CRUD_DIP_VORGANG
-from backend.app.facades.deutscher_bundestag.model import Vorgang
+from backend.app.facades.deutscher_bundestag.model import Vorgang, Vorgangsposition
 from backend.app.facades.deutscher_bundestag.parameter_model import (
     VorgangParameter,
     VorgangspositionParameter,
@@ -36,6 +36,8 @@ _logger = logging.getLogger(__name__)
 class DIPBundestagVorgangImporter(DIPImporter[Vorgang, VorgangParameter, DIPVorgang]):
     """Class for DIP Bundestag Vorgang Importer."""
 
+    entity_type = 'vorgang'
+
     def __init__(self, import_vorgangspositionen: bool = True, raise_on_error: bool = False):
         """
         Initialize DIPImporter.
@@ -104,27 +106,80 @@ class DIPBundestagVorgangImporter(DIPImporter[Vorgang, VorgangParameter, DIPVorg
         proxy_list: ProxyList | None = None,
         **kwargs: Any,
     ) -> Iterator[DIPVorgang]:
-        """Fetch data."""
-        for model in self.facade.get_vorgange(
-            params=params,
-            response_limit=response_limit,
-            proxy_list=proxy_list,
-            raise_on_error=self.raise_on_error,
-        ):
-            db_model = self.transform_model(model)
-
-            if self.import_vorgangspositionen:
-                time.sleep(self.delay_between_requests)
-                for vorgangsposition in self.vorgangsposition_importer.fetch_data(
-                    params=VorgangspositionParameter(
-                        vorgang=db_model.id,
-                    ),
+        """Fetch data.
+
+        If ``window_count`` is given, the Vorgaenge are fetched in this number of concurrent date
+        windows, see :meth:`fetch_sharded`. ``response_limit`` is ignored in this case. If
+        ``skip_unchanged`` is set, Vorgaenge unchanged since their last import are skipped, see
+        :meth:`skip_unchanged`.
+
+        Vorgaenge are processed page by page: the Vorgangspositionen of all Vorgaenge of a page are
+        fetched together before the page is transformed, see :meth:`fetch_vorgangspositionen`.
+        """
+        window_count: int | None = kwargs.get('window_count')
+        models = (
+            self.fetch_sharded(
+                'get_vorgange_sharded', params, window_count, proxy_list, self.raise_on_error
+            )
+            if window_count
+            else self.facade.get_vorgange(
+                params=params,
+                response_limit=response_limit,
+                proxy_list=proxy_list,
+                raise_on_error=self.raise_on_error,
+            )
+        )
+
+        for page in self.iter_pages(models):
+            if kwargs.get('skip_unchanged'):
+                page = self.skip_unchanged(page)
+
+            vorgangspositionen = self.fetch_vorgangspositionen(
+                [model.id for model in page], proxy_list=proxy_list
+            )
+
+            for model in page:
+                yield self.transform_with_vorgangspositionen(
+                    model, vorgangspositionen.get(model.id, [])
+                )
+
+    def fetch_vorgangspositionen(
+        self, vorgang_ids: t.Iterable[int], proxy_list: ProxyList | None = None
+    ) -> dict[int, list[Vorgangsposition]]:
+        """Fetch all Vorgangspositionen of many Vorgaenge, by id of the Vorgang.
+
+        DIP filters Vorgangspositionen by a single Vorgang only, so the Vorgangspositionen of all
+        unique Vorgaenge are requested concurrently, see :meth:`fetch_concurrently`. Nothing is
+        fetched if Vorgangspositionen are not imported.
+        """
+        if not self.import_vorgangspositionen:
+            return {}
+
+        vorgang_ids = list(dict.fromkeys(vorgang_ids))
+        return dict(
+            zip(
+                vorgang_ids,
+                self.fetch_concurrently(
+                    'get_vorgangspositionen',
+                    [VorgangspositionParameter(vorgang=vorgang_id) for vorgang_id in vorgang_ids],
                     proxy_list=proxy_list,
-                ):
-                    vorgangsposition.vorgang_id = db_model.id
-                    db_model.vorgangsposition.append(vorgangsposition)
+                    raise_on_error=self.raise_on_error,
+                ),
+            )
+        )
+
+    def transform_with_vorgangspositionen(
+        self, data: Vorgang, vorgangspositionen: list[Vorgangsposition]
+    ) -> DIPVorgang:
+        """Transform Vorgang together with its Vorgangspositionen."""
+        db_model = self.transform_model(data)
+
+        for vorgangsposition in vorgangspositionen:
+            db_vorgangsposition = self.vorgangsposition_importer.transform_model(vorgangsposition)
+            db_vorgangsposition.vorgang_id = db_model.id
+            db_model.vorgangsposition.append(db_vorgangsposition)
 
-            yield db_model
+        return db_model
 
 
 def import_dip_bundestag():
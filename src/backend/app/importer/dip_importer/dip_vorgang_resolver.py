@@ -0,0 +1,225 @@
+"""Level-wise resolution of the Vorgaenge referenced by DIP Bundestag documents."""
+
+import collections
+import logging
+import typing as t
+
+from backend.app.facades.deutscher_bundestag.model import (
+    Drucksache,
+    DrucksacheText,
+    Plenarprotokoll,
+    PlenarprotokollText,
+    Vorgang,
+    Vorgangsposition,
+)
+from backend.app.facades.deutscher_bundestag.parameter_model import VorgangParameter
+from backend.app.facades.util import ProxyList
+from backend.app.importer.dip_importer.dip_vorgang_importer import DIPBundestagVorgangImporter
+from backend.app.models.dip.models import DIPVorgang
+
+_logger = logging.getLogger(__name__)
+
+
+VORGANG_ID_BATCH_SIZE = 50
+"""Number of Vorgang ids requested with a single multi-valued ``f.id`` filter."""
+
+VORGANG_CACHE_SIZE = 10000
+"""Maximal number of Vorgaenge kept in the cache of a resolver."""
+
+
+class CachedVorgang(t.NamedTuple):
+    vorgang: Vorgang
+    vorgangspositionen: list[Vorgangsposition]
+    db_vorgang: DIPVorgang
+
+
+DocumentType = t.TypeVar(
+    'DocumentType', Drucksache, DrucksacheText, Plenarprotokoll, PlenarprotokollText
+)
+
+
+class DIPVorgangResolver:
+    """Resolves the Vorgaenge referenced by a page of documents level by level.
+
+    Instead of fetching the Vorgaenge of every document and the Vorgangspositionen of every Vorgang
+    one after another, a page is resolved in two levels:
+
+    1. The ids of all Vorgaenge referenced by the ``vorgangsbezug`` of the page are collected.
+       Vorgaenge not yet known are fetched in bulk with the multi-valued ``f.id`` filter. DIP lists
+       only the first four Vorgaenge in ``vorgangsbezug``, the Vorgaenge of documents with more
+       Vorgaenge are fetched with a filter by document (e.g. ``f.drucksache``). All requests of the
+       level run concurrently.
+    2. The Vorgangspositionen of all unique Vorgaenge fetched in the first level are fetched
+       concurrently, see :meth:`DIPBundestagVorgangImporter.fetch_vorgangspositionen`.
+
+    The graph is assembled afterwards. Vorgaenge are kept in an LRU cache by id, so that Vorgaenge
+    referenced by many documents are fetched and transformed only once. As all documents share the
+    transformed instance, it is written only once per import, see
+    :class:`~backend.app.crud.identity_map.IdentityMap`. The number of requests therefore grows with
+    the number of unique Vorgaenge instead of the number of references.
+    """
+
+    def __init__(
+        self,
+        vorgang_importer: DIPBundestagVorgangImporter,
+        cache_size: int = VORGANG_CACHE_SIZE,
+    ):
+        self.vorgang_importer = vorgang_importer
+        self.cache_size = cache_size
+        self._cache: collections.OrderedDict[int, CachedVorgang] = collections.OrderedDict()
+
+    def close(self):
+        """Shut down the async facade of the Vorgang importer, see :meth:`DIPImporter.close`."""
+        self.vorgang_importer.close()
+
+    def _get_cached(self, vorgang_id: int) -> CachedVorgang | None:
+        cached = self._cache.get(vorgang_id)
+        if cached is not None:
+            self._cache.move_to_end(vorgang_id)
+        return cached
+
+    def _add_to_cache(self, cached: CachedVorgang):
+        self._cache[cached.vorgang.id] = cached
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _fetch_vorgaenge(
+        self, params_list: t.Sequence[VorgangParameter], proxy_list: ProxyList | None
+    ) -> list[list[Vorgang]]:
+        return self.vorgang_importer.fetch_concurrently(
+            'get_vorgange',
+            params_list,
+            proxy_list=proxy_list,
+            raise_on_error=self.vorgang_importer.raise_on_error,
+        )
+
+    def _resolve(
+        self,
+        vorgang_ids: t.Iterable[int],
+        queries: t.Sequence[VorgangParameter],
+        proxy_list: ProxyList | None,
+    ) -> tuple[dict[int, CachedVorgang], list[list[CachedVorgang]]]:
+        """Get Vorgaenge by id and the Vorgaenge matching queries, fetching both levels in bulk."""
+        resolved: dict[int, CachedVorgang] = {}
+        missing_ids: list[int] = []
+
+        for vorgang_id in dict.fromkeys(vorgang_ids):
+            if (cached := self._get_cached(vorgang_id)) is not None:
+                resolved[vorgang_id] = cached
+            else:
+                missing_ids.append(vorgang_id)
+
+        # first level: Vorgaenge
+        id_queries = [
+            VorgangParameter(id=missing_ids[start : start + VORGANG_ID_BATCH_SIZE])
+            for start in range(0, len(missing_ids), VORGANG_ID_BATCH_SIZE)
+        ]
+        results = self._fetch_vorgaenge([*id_queries, *queries], proxy_list)
+
+        new_vorgaenge: dict[int, Vorgang] = {}
+        for vorgang in (vorgang for result in results for vorgang in result):
+            if vorgang.id in resolved or vorgang.id in new_vorgaenge:
+                continue
+            if (cached := self._get_cached(vorgang.id)) is not None:
+                resolved[vorgang.id] = cached
+            else:
+                new_vorgaenge[vorgang.id] = vorgang
+
+        # second level: Vorgangspositionen of all new Vorgaenge
+        vorgangspositionen = self.vorgang_importer.fetch_vorgangspositionen(
+            list(new_vorgaenge), proxy_list=proxy_list
+        )
+
+        for vorgang_id, vorgang in new_vorgaenge.items():
+            cached = CachedVorgang(
+                vorgang,
+                vorgangspositionen.get(vorgang_id, []),
+                self.vorgang_importer.transform_with_vorgangspositionen(
+                    vorgang, vorgangspositionen.get(vorgang_id, [])
+                ),
+            )
+            self._add_to_cache(cached)
+            resolved[vorgang_id] = cached
+
+        if not_found := set(missing_ids) - resolved.keys():
+            _logger.warning(f'Referenced Vorgaenge {sorted(not_found)} were not found.')
+
+        return resolved, [
+            [resolved[vorgang.id] for vorgang in result] for result in results[len(id_queries) :]
+        ]
+
+    def get_vorgaenge(
+        self, vorgang_ids: t.Iterable[int], proxy_list: ProxyList | None = None
+    ) -> dict[int, CachedVorgang]:
+        """Get Vorgaenge by id, fetching the ones not in the cache in bulk."""
+        resolved, _ = self._resolve(vorgang_ids, [], proxy_list)
+        return resolved
+
+    def resolve(
+        self,
+        documents: t.Sequence[DocumentType],
+        query: t.Callable[[DocumentType], VorgangParameter],
+        proxy_list: ProxyList | None = None,
+    ) -> dict[int, list[DIPVorgang]]:
+        """Get Vorgaenge of a page of documents, by id of the document.
+
+        Vorgaenge of documents with an incomplete ``vorgangsbezug`` are fetched with ``query``. All
+        documents referencing a Vorgang share its instance, see :class:`CachedVorgang`.
+        """
+        complete: list[DocumentType] = []
+        incomplete: list[DocumentType] = []
+        for document in documents:
+            if len(document.vorgangsbezug or []) >= document.vorgangsbezug_anzahl:
+                complete.append(document)
+            else:
+                incomplete.append(document)
+
+        resolved, queried = self._resolve(
+            (
+                vorgangsbezug.id
+                for document in complete
+                for vorgangsbezug in document.vorgangsbezug or []
+            ),
+            [query(document) for document in incomplete],
+            proxy_list,
+        )
+
+        vorgaenge_by_document = {
+            document.id: [
+                resolved[vorgangsbezug.id]
+                for vorgangsbezug in document.vorgangsbezug or []
+                if vorgangsbezug.id in resolved
+            ]
+            for document in complete
+        }
+        vorgaenge_by_document.update(
+            (document.id, cached_vorgaenge)
+            for document, cached_vorgaenge in zip(incomplete, queried)
+        )
+
+        return {
+            document_id: [cached.db_vorgang for cached in cached_vorgaenge]
+            for document_id, cached_vorgaenge in vorgaenge_by_document.items()
+        }
+
+    def resolve_drucksachen(
+        self,
+        drucksachen: t.Sequence[Drucksache | DrucksacheText],
+        proxy_list: ProxyList | None = None,
+    ) -> dict[int, list[DIPVorgang]]:
+        """Get Vorgaenge of a page of Drucksachen, by id of the Drucksache."""
+        return self.resolve(
+            drucksachen, lambda drucksache: VorgangParameter(drucksache=drucksache.id), proxy_list
+        )
+
+    def resolve_plenarprotokolle(
+        self,
+        plenarprotokolle: t.Sequence[Plenarprotokoll | PlenarprotokollText],
+        proxy_list: ProxyList | None = None,
+    ) -> dict[int, list[DIPVorgang]]:
+        """Get Vorgaenge of a page of Plenarprotokolle, by id of the Plenarprotokoll."""
+        return self.resolve(
+            plenarprotokolle,
+            lambda plenarprotokoll: VorgangParameter(plenarprotokoll=plenarprotokoll.id),
+            proxy_list,
+        )
@@ -33,6 +33,8 @@ class DIPBundestagVorgangspositionImporter(
 ):
     """Class for DIP Bundestag Vorgangsposition Importer."""
 
+    entity_type = 'vorgangsposition'
+
     def __init__(self, raise_on_error: bool = False):
         """
         Initialize DIPImporter.
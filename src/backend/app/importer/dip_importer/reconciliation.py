@@ -0,0 +1,284 @@
+"""Reconciliation of imported DIP documents with DIP.
+
+* :func:`find_missing_ranges` bisects date ranges with count queries. Instead of comparing counts
+  for every week of a long range, the counts of the database and of DIP are compared for the whole
+  range first. Only ranges with missing documents are bisected further, so the number of count
+  requests grows with the number of gaps times the logarithm of the range length.
+* :func:`reconcile_ids` compares the ids and update times of all documents of a range, which
+  finds exactly the documents to insert, update and delete.
+"""
+import array
+import asyncio
+import dataclasses
+import datetime
+import logging
+import typing as t
+
+from backend.app.crud.CRUDImporter.crud_fingerprint import CRUD_IMPORT_FINGERPRINT
+from backend.app.facades.deutscher_bundestag.async_facade import AsyncDIPBundestagFacade
+from backend.app.facades.deutscher_bundestag.parameter_model import CommonParameter
+from backend.app.facades.util import ProxyList
+from backend.app.importer.dip_importer.dip_importer import ID_FILTER_BATCH_SIZE, DIPImporter
+
+_logger = logging.getLogger(__name__)
+
+
+MIN_RANGE_DAYS = 1
+"""Ranges with missing documents are bisected down to this number of days."""
+
+ParameterType = t.TypeVar('ParameterType', bound=CommonParameter)
+
+CountRanges = t.Callable[[list[tuple[datetime.date, datetime.date]]], t.Awaitable[list[int]]]
+"""Counts imported documents for many ``(start, end)`` ranges (both inclusive) at once, e.g. with
+a blocking query run by :func:`asyncio.to_thread`."""
+
+
+@dataclasses.dataclass(frozen=True)
+class DateRange:
+    """Range of ``datum`` dates (both inclusive) with the DIP counts (per params) and the database
+    count of its documents."""
+
+    start: datetime.date
+    end: datetime.date
+    api_counts: tuple[int, ...]
+    db_count: int
+
+    @property
+    def days(self) -> int:
+        return (self.end - self.start).days + 1
+
+    @property
+    def missing(self) -> int:
+        """Number of documents of DIP not imported (net of documents not in DIP anymore)."""
+        return sum(self.api_counts) - self.db_count
+
+    def apply(self, params: ParameterType) -> ParameterType:
+        """Get copy of params restricted to this range."""
+        return params.model_copy(
+            update={'datum_start': self.start, 'datum_end': self.end, 'cursor': None}
+        )
+
+
+async def find_missing_ranges(
+    facade: AsyncDIPBundestagFacade,
+    endpoint: str,
+    params_list: t.Sequence[ParameterType],
+    count_db: CountRanges,
+    start: datetime.date,
+    end: datetime.date,
+    min_days: int = MIN_RANGE_DAYS,
+) -> list[DateRange]:
+    """Find the minimal ranges holding documents of DIP which are not in the database.
+
+    The DIP count of a range is the sum of the counts of ``params_list`` (e.g. one params per
+    Drucksachetyp), which must select the same documents as ``count_db``. Ranges with missing
+    documents are bisected level by level: the DIP counts of the first halves of a level are
+    requested concurrently and the database counts with a single call while they are requested,
+    the counts of the second halves are the differences to their parent range.
+
+    A range is only bisected if DIP has more documents than the database. Documents missing in a
+    range which also holds the same number of documents deleted in DIP are therefore not found.
+    Adjacent ranges with missing documents are merged, so that they are imported together.
+    """
+    if min_days < 1:
+        raise ValueError('min_days must be at least 1.')
+
+    async def count_api(ranges: list[tuple[datetime.date, datetime.date]]) -> list[tuple[int, ...]]:
+        counts = await asyncio.gather(
+            *(
+                facade.get_count(
+                    endpoint,
+                    params.model_copy(update={'datum_start': range_start, 'datum_end': range_end}),
+                )
+                for range_start, range_end in ranges
+                for params in params_list
+            )
+        )
+        return [
+            tuple(counts[number * len(params_list) : (number + 1) * len(params_list)])
+            for number in range(len(ranges))
+        ]
+
+    ((api_counts,), (db_count,)) = await asyncio.gather(
+        count_api([(start, end)]), count_db([(start, end)])
+    )
+    level = [DateRange(start, end, api_counts, db_count)]
+    requests = len(params_list)
+
+    missing: list[DateRange] = []
+    while level:
+        to_split = []
+        for date_range in level:
+            if date_range.missing <= 0:
+                continue
+            if date_range.days <= min_days:
+                missing.append(date_range)
+            else:
+                to_split.append(date_range)
+
+        if not to_split:
+            break
+
+        first_halves = [
+            (r.start, r.start + datetime.timedelta(days=r.days // 2 - 1)) for r in to_split
+        ]
+        first_api_counts, first_db_counts = await asyncio.gather(
+            count_api(first_halves), count_db(first_halves)
+        )
+        requests += len(first_halves) * len(params_list)
+
+        level = []
+        for parent, (half_start, half_end), half_api_counts, half_db_count in zip(
+            to_split, first_halves, first_api_counts, first_db_counts
+        ):
+            level.append(DateRange(half_start, half_end, half_api_counts, half_db_count))
+            level.append(
+                DateRange(
+                    half_end + datetime.timedelta(days=1),
+                    parent.end,
+                    tuple(
+                        parent_count - half_count
+                        for parent_count, half_count in zip(parent.api_counts, half_api_counts)
+                    ),
+                    parent.db_count - half_db_count,
+                )
+            )
+
+    # adjacent ranges are imported together
+    merged: list[DateRange] = []
+    for date_range in sorted(missing, key=lambda r: r.start):
+        previous = merged[-1] if merged else None
+        if previous is not None and previous.end + datetime.timedelta(days=1) == date_range.start:
+            merged[-1] = DateRange(
+                previous.start,
+                date_range.end,
+                tuple(a + b for a, b in zip(previous.api_counts, date_range.api_counts)),
+                previous.db_count + date_range.db_count,
+            )
+        else:
+            merged.append(date_range)
+
+    _logger.info(
+        f'Found {sum(r.missing for r in merged)} missing documents of {endpoint} from {start} to '
+        f'{end} in {len(merged)} ranges with {requests} count requests.'
+    )
+    return merged
+
+
+@dataclasses.dataclass
+class IdDiff:
+    """Ids of documents differing between DIP and the database, sorted."""
+
+    inserted: list[int] = dataclasses.field(default_factory=list)
+    """Documents in DIP, but not in the database."""
+
+    updated: list[int] = dataclasses.field(default_factory=list)
+    """Documents whose ``aktualisiert`` differs."""
+
+    deleted: list[int] = dataclasses.field(default_factory=list)
+    """Documents in the database, but not in DIP."""
+
+    def __str__(self) -> str:
+        return (
+            f'{len(self.inserted)} to insert, {len(self.updated)} to update, '
+            f'{len(self.deleted)} to delete'
+        )
+
+
+def _utc_timestamp(aktualisiert: datetime.datetime) -> float:
+    # ``aktualisiert`` of DIP has an offset, the database stores it converted to UTC
+    if aktualisiert.tzinfo is None:
+        aktualisiert = aktualisiert.replace(tzinfo=datetime.timezone.utc)
+    return aktualisiert.astimezone(datetime.timezone.utc).timestamp()
+
+
+def diff_versions(
+    api_versions: t.Iterable[tuple[int, datetime.datetime]],
+    db_ids: array.array,
+    db_aktualisiert: array.array,
+) -> IdDiff:
+    """Compare ids and ``aktualisiert`` of DIP with the ones of the database, sorted by id.
+
+    The versions of DIP are collected into compact arrays, sorted and merged with the ones of the
+    database in a single pass. ``db_aktualisiert`` holds POSIX timestamps of the values stored in
+    UTC, see ``CRUDDIPDrucksache.read_versions``.
+    """
+    versions = {
+        document_id: _utc_timestamp(aktualisiert) for document_id, aktualisiert in api_versions
+    }
+    api_ids = array.array('q', sorted(versions))
+
+    diff = IdDiff()
+    api_index = db_index = 0
+    while api_index < len(api_ids) or db_index < len(db_ids):
+        if db_index >= len(db_ids) or (
+            api_index < len(api_ids) and api_ids[api_index] < db_ids[db_index]
+        ):
+            diff.inserted.append(api_ids[api_index])
+            api_index += 1
+        elif api_index >= len(api_ids) or db_ids[db_index] < api_ids[api_index]:
+            diff.deleted.append(db_ids[db_index])
+            db_index += 1
+        else:
+            if versions[api_ids[api_index]] != db_aktualisiert[db_index]:
+                diff.updated.append(api_ids[api_index])
+            api_index += 1
+            db_index += 1
+    return diff
+
+
+def reconcile_ids(
+    importer: DIPImporter,
+    endpoint: str,
+    params_list: t.Sequence[CommonParameter],
+    db_versions: tuple[array.array, array.array],
+    delete: bool = False,
+    proxy_list: ProxyList | None = None,
+) -> IdDiff:
+    """Import exactly the documents of a range which are missing or outdated in the database.
+
+    Ids and ``aktualisiert`` of the documents of ``params_list`` (e.g. one params per
+    Drucksachetyp) are streamed from DIP and compared with ``db_versions`` of the same documents,
+    see :func:`diff_versions`. Inserted and updated documents are imported by id.
+
+    Documents may leave the range without being deleted, e.g. if their Vorgang changed. Documents
+    only in the database are therefore requested by id once more and updated if DIP still has them.
+    The remaining ones are deleted (together with their fingerprints) if ``delete`` is set.
+    """
+    api_versions = (
+        version
+        for params in params_list
+        for version in importer.facade.get_document_versions(
+            endpoint, params, proxy_list=proxy_list
+        )
+    )
+    diff = diff_versions(api_versions, *db_versions)
+
+    if diff.deleted:
+        still_in_dip = {
+            document_id
+            for start in range(0, len(diff.deleted), ID_FILTER_BATCH_SIZE)
+            for document_id, _ in importer.facade.get_document_versions(
+                endpoint,
+                CommonParameter(id=diff.deleted[start : start + ID_FILTER_BATCH_SIZE]),
+                proxy_list=proxy_list,
+            )
+        }
+        diff.updated = sorted(diff.updated + list(still_in_dip))
+        diff.deleted = [
+            document_id for document_id in diff.deleted if document_id not in still_in_dip
+        ]
+
+    _logger.info(f'Reconciled {endpoint} with {len(db_versions[0])} imported documents: {diff}.')
+
+    object_ids = [str(document_id) for document_id in diff.inserted + diff.updated]
+    for params in importer.params_for_ids(object_ids):
+        importer.import_data(params, proxy_list=proxy_list, resume=False)
+
+    if delete and diff.deleted:
+        importer.crud.delete_multi(diff.deleted)
+        if importer.entity_type is not None:
+            CRUD_IMPORT_FINGERPRINT.delete_fingerprints(importer.entity_type, diff.deleted)
+        _logger.info(f'Deleted {len(diff.deleted)} documents of {endpoint} deleted in DIP.')
+
+    return diff
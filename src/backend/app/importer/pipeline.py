@@ -0,0 +1,123 @@
+"""Pipelining of import stages on threads connected by bounded queues."""
+
+import dataclasses
+import logging
+import queue
+import threading
+import time
+import typing as t
+
+_logger = logging.getLogger(__name__)
+
+
+PIPELINE_QUEUE_SIZE = 2
+"""Default number of items a stage produces ahead of the next stage."""
+
+_PUT_TIMEOUT_SECS = 0.1
+"""Interval in which a blocked producer checks if the consumer stopped."""
+
+T = t.TypeVar('T')
+
+
+@dataclasses.dataclass
+class StageStats:
+    """Throughput of a pipeline stage.
+
+    ``busy_seconds`` is the time spent working on items, ``blocked_seconds`` the time spent waiting
+    for the neighbouring stage, i.e. a stage with a high share of blocked time is not the
+    bottleneck.
+    """
+
+    name: str
+    items: int = 0
+    busy_seconds: float = 0.0
+    blocked_seconds: float = 0.0
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f'{self.name}: {self.items} items, busy {self.busy_seconds:.2f}s '
+            f'({self.items_per_second:.2f} items/s), blocked {self.blocked_seconds:.2f}s'
+        )
+
+
+class _StageError(t.NamedTuple):
+    exception: BaseException
+
+
+_STAGE_DONE = object()
+
+
+def run_stage(
+    source: t.Iterator[T],
+    stats: StageStats,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+    weight: t.Callable[[T], int] = lambda item: 1,
+) -> t.Iterator[T]:
+    """Produce the items of ``source`` on a separate thread, ahead of the consumer.
+
+    Up to ``queue_size`` items are produced ahead, then the producer blocks until the consumer
+    takes the next item (backpressure). Exceptions of ``source`` are raised to the consumer. If the
+    consumer stops early, the producer stops after its current item and ``source`` is closed on the
+    producer thread.
+
+    Args:
+        source: Iterator whose items are produced, e.g. fetched and transformed objects.
+        stats: Statistics of the producing stage, updated while producing.
+        queue_size: Maximal number of items produced ahead.
+        weight: Number of items counted in ``stats`` for an item, e.g. the size of a batch.
+    """
+    if queue_size < 1:
+        raise ValueError('queue_size must be at least 1.')
+
+    items: queue.Queue = queue.Queue(maxsize=queue_size)
+    stopped = threading.Event()
+
+    def put(item: t.Any):
+        start = time.perf_counter()
+        try:
+            while not stopped.is_set():
+                try:
+                    items.put(item, timeout=_PUT_TIMEOUT_SECS)
+                    return
+                except queue.Full:
+                    continue
+        finally:
+            stats.blocked_seconds += time.perf_counter() - start
+
+    def produce():
+        try:
+            while not stopped.is_set():
+                start = time.perf_counter()
+                try:
+                    item = next(source)
+                except StopIteration:
+                    break
+                finally:
+                    stats.busy_seconds += time.perf_counter() - start
+
+                stats.items += weight(item)
+                put(item)
+        except BaseException as e:  # pylint: disable=broad-except  # re-raised by consumer
+            put(_StageError(e))
+        else:
+            put(_STAGE_DONE)
+        finally:
+            close = getattr(source, 'close', None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, name=f'stage-{stats.name}', daemon=True)
+    thread.start()
+
+    try:
+        while (item := items.get()) is not _STAGE_DONE:
+            if isinstance(item, _StageError):
+                raise item.exception
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
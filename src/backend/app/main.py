@@ -8,9 +8,11 @@ from sched import scheduler
 
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI, middleware
+from fastapi.responses import PlainTextResponse
 from backend.app.api.v1.api import api_router
 from backend.app.core.config import settings
 from backend.app.core.logging import configure_logging
+from backend.app.core.metrics import REGISTRY
 
 from backend.app.scheduler import init_schedules, shutdown_scheduler
 
@@ -56,5 +58,11 @@ app.add_middleware(
 
 app.include_router(api_router, prefix=f"{settings.API_V1_STR}")
 
+
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> PlainTextResponse:
+    """Metrics of the process (e.g. of the HTTP requests of imports) in Prometheus text format."""
+    return PlainTextResponse(REGISTRY.to_prometheus(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,28 @@
+"""Checkpoints of import runs, used to resume interrupted imports."""
+import datetime as dt
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.app.db.database import Base
+from backend.app.models.common import APISchema, TimestampMixin
+
+
+class ImportCheckpoint(Base, APISchema, TimestampMixin):
+    """Table attributes for Model/Relation/Table import_checkpoint.
+
+    A checkpoint stores the cursor of the last page whose objects were committed completely or
+    partially, so that a restarted import with the same parameters continues from there. For
+    incremental imports, it also stores the latest ``aktualisiert`` committed so far, which becomes
+    the watermark once the import completes.
+    """
+
+    __tablename__ = "import_checkpoint"
+
+    id: Mapped[str] = mapped_column(primary_key=True)  # fingerprint of importer and parameters
+    importer: Mapped[str] = mapped_column(nullable=False)
+    params: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    cursor: Mapped[str] = mapped_column(nullable=True)
+    imported_count: Mapped[int] = mapped_column(nullable=False, default=0)
+    aktualisiert: Mapped[dt.datetime] = mapped_column(sa.DateTime(timezone=True), nullable=True)
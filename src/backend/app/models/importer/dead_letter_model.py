@@ -0,0 +1,23 @@
+"""Objects which could not be written by an import."""
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.app.db.database import Base
+from backend.app.models.common import APISchema, TimestampMixin
+
+
+class ImportDeadLetter(Base, APISchema, TimestampMixin):
+    """Table attributes for Model/Relation/Table import_dead_letter.
+
+    A dead letter stores an object rejected by the database (e.g. by a constraint) together with
+    the error, so that it can be inspected and retried later without a full re-import.
+    """
+
+    __tablename__ = "import_dead_letter"
+
+    importer: Mapped[str] = mapped_column(primary_key=True)
+    object_id: Mapped[str] = mapped_column(primary_key=True)  # primary key of the rejected object
+    table_name: Mapped[str] = mapped_column(nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    error: Mapped[str] = mapped_column(nullable=False)
+    attempts: Mapped[int] = mapped_column(nullable=False, default=1)
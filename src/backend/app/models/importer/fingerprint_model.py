@@ -0,0 +1,19 @@
+"""Content fingerprints of imported entities."""
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.app.db.database import Base
+from backend.app.models.common import APISchema, TimestampMixin
+
+
+class ImportFingerprint(Base, APISchema, TimestampMixin):
+    """Table attributes for Model/Relation/Table import_fingerprint.
+
+    A fingerprint is the hash of the payload an entity was last imported from, so that unchanged
+    entities can be skipped by later imports.
+    """
+
+    __tablename__ = "import_fingerprint"
+
+    entity: Mapped[str] = mapped_column(primary_key=True)
+    entity_id: Mapped[int] = mapped_column(primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(nullable=False)
@@ -0,0 +1,25 @@
+"""Watermarks of incremental imports."""
+import datetime as dt
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.app.db.database import Base
+from backend.app.models.common import APISchema, TimestampMixin
+
+
+class ImportWatermark(Base, APISchema, TimestampMixin):
+    """Table attributes for Model/Relation/Table import_watermark.
+
+    A watermark stores the highest ``aktualisiert`` of an entity type, up to which all changes
+    matching the parameters of an import were committed, so that the next incremental import
+    starts from there.
+    """
+
+    __tablename__ = "import_watermark"
+
+    id: Mapped[str] = mapped_column(primary_key=True)  # fingerprint of entity and parameters
+    entity: Mapped[str] = mapped_column(nullable=False)
+    params: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    aktualisiert: Mapped[dt.datetime] = mapped_column(sa.DateTime(timezone=True), nullable=False)
@@ -2,7 +2,10 @@ from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from logging import getLogger
 from backend.app.importer.beschlussfassung_importer import FetchTypes, import_beschlussfassungen
-from backend.app.importer.bundestag_importer.bt_abstimmungen_importer import import_bt_abstimmungen
+from backend.app.importer.bundestag_importer.bt_abstimmungen_importer import (
+    RefreshPolicy,
+    import_bt_abstimmungen,
+)
 from backend.app.importer.mandate_importer import import_mandate
 from datetime import date, datetime, timedelta
 
@@ -16,7 +19,10 @@ def startup_imports_job():
     import_mandate()
 
     import_bt_abstimmungen(
-        date_start=date(2016, 1, 1), date_end=(date.today() + timedelta(weeks=1))
+        date_start=date(2016, 1, 1),
+        date_end=(date.today() + timedelta(weeks=1)),
+        # corrections of recent Abstimmungen are picked up on the next startup
+        refresh_policy=RefreshPolicy(newer_than_days=14),
     )
 
     # import_beschlussfassungen(
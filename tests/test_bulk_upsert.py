@@ -0,0 +1,112 @@
+import types
+
+import pytest
+
+sa = pytest.importorskip('sqlalchemy')
+pytest.importorskip('psycopg2')
+
+# pylint: disable=wrong-import-position
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+
+from backend.app.crud.bulk_upsert import BulkUpserter
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Parent(Base):
+    __tablename__ = 'parent'
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str | None]
+    children: Mapped[list['Child']] = relationship(
+        back_populates='parent', cascade='all, delete-orphan'
+    )
+
+
+class Child(Base):
+    __tablename__ = 'child'
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    parent_id: Mapped[int] = mapped_column(sa.ForeignKey('parent.id'))
+    parent: Mapped[Parent] = relationship(back_populates='children')
+    toys: Mapped[list['Toy']] = relationship(back_populates='child', cascade='all, delete-orphan')
+
+
+class Toy(Base):
+    __tablename__ = 'toy'
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    child_id: Mapped[int] = mapped_column(sa.ForeignKey('child.id'))
+    child: Mapped[Child] = relationship(back_populates='toys')
+
+
+class RecordingSession:
+    """Records executed statements and returns the written rows like ``RETURNING``."""
+
+    def __init__(self):
+        self.statements: list = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def execute(self, statement, parameters=None):
+        self.statements.append(statement)
+        return [
+            types.SimpleNamespace(
+                _mapping={column: row.get(column.key) for column in statement.table.c}
+            )
+            for row in parameters or []
+        ]
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def tables(self, statement_type) -> list[str]:
+        return [s.table.name for s in self.statements if isinstance(s, statement_type)]
+
+    def deletes(self) -> list[str]:
+        return [str(s.compile()) for s in self.statements if isinstance(s, sa.Delete)]
+
+
+def test__upsert__leaves_children_of_unloaded_collection():
+    session = RecordingSession()
+
+    BulkUpserter(session).upsert([Parent(id=1, name='Vorgang')])  # type: ignore[arg-type]
+
+    assert session.tables(sa.Insert) == ['parent']
+    assert session.tables(sa.Delete) == []
+
+
+def test__upsert__replaces_children_of_set_collection():
+    session = RecordingSession()
+    child = Child(id=10)
+
+    BulkUpserter(session).upsert([Parent(id=1, children=[child])])  # type: ignore[arg-type]
+
+    assert session.tables(sa.Insert) == ['parent', 'child']
+    assert child.parent_id == 1
+    # orphans are deleted with their own children first
+    assert session.tables(sa.Delete) == ['toy', 'child']
+    assert 'child.id NOT IN' in session.deletes()[-1]
+
+
+def test__upsert__deletes_all_children_of_emptied_collection():
+    session = RecordingSession()
+
+    BulkUpserter(session).upsert([Parent(id=1, children=[])])  # type: ignore[arg-type]
+
+    assert session.tables(sa.Insert) == ['parent']
+    assert session.tables(sa.Delete) == ['toy', 'child']
+    assert 'NOT IN' not in session.deletes()[-1]
+
+
+def test__delete__deletes_delete_orphan_children_first():
+    session = RecordingSession()
+
+    BulkUpserter(session).delete(Parent, Parent.id.in_([1, 2]))  # type: ignore[arg-type]
+
+    assert session.tables(sa.Delete) == ['toy', 'child', 'parent']
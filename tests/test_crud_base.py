@@ -0,0 +1,70 @@
+import pytest
+
+sa = pytest.importorskip('sqlalchemy')
+pytest.importorskip('psycopg2')
+
+# pylint: disable=wrong-import-position
+from sqlalchemy.exc import IntegrityError
+
+from backend.app.crud.base import CRUDBase
+from tests.test_bulk_upsert import Child, Parent, RecordingSession
+
+
+@pytest.fixture
+def session(monkeypatch) -> RecordingSession:
+    recording_session = RecordingSession()
+    monkeypatch.setattr(CRUDBase, 'db', recording_session)
+    return recording_session
+
+
+def test__bulk_upsert__commits_upserted_objects(session):
+    CRUDBase(Parent).bulk_upsert([Parent(id=1, children=[Child(id=10)])])
+
+    assert session.tables(sa.Insert) == ['parent', 'child']
+    assert session.commits == 1
+
+
+def test__bulk_upsert_isolating__rejects_only_failing_objects(monkeypatch):
+    crud = CRUDBase(Parent)
+    parents = [Parent(id=number) for number in range(8)]
+    committed: list[Parent] = []
+
+    def bulk_upsert(obj_in_list, identity_map=None):
+        if any(parent.id in (2, 5) for parent in obj_in_list):
+            raise IntegrityError('INSERT', {}, Exception('violates constraint'))
+        committed.extend(obj_in_list)
+        return obj_in_list
+
+    monkeypatch.setattr(crud, 'bulk_upsert', bulk_upsert)
+
+    rejected = crud.bulk_upsert_isolating(parents)
+
+    assert [parent.id for parent, _ in rejected] == [2, 5]
+    assert all(isinstance(error, IntegrityError) for _, error in rejected)
+    assert sorted(parent.id for parent in committed) == [0, 1, 3, 4, 6, 7]
+
+
+def test__bulk_upsert_isolating__raises_other_errors(monkeypatch):
+    crud = CRUDBase(Parent)
+
+    def bulk_upsert(obj_in_list, identity_map=None):
+        raise RuntimeError('connection lost')
+
+    monkeypatch.setattr(crud, 'bulk_upsert', bulk_upsert)
+
+    with pytest.raises(RuntimeError):
+        crud.bulk_upsert_isolating([Parent(id=1), Parent(id=2)])
+
+
+def test__delete_multi__deletes_objects_with_children(session):
+    CRUDBase(Parent).delete_multi([1, 2])
+
+    assert session.tables(sa.Delete) == ['toy', 'child', 'parent']
+    assert session.commits == 1
+
+
+def test__delete_multi__ignores_empty_ids(session):
+    CRUDBase(Parent).delete_multi([])
+
+    assert not session.statements
+    assert session.commits == 0
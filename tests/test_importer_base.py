@@ -0,0 +1,171 @@
+import dataclasses
+import datetime
+import types
+
+import pytest
+
+pytest.importorskip('pydantic')
+pytest.importorskip('requests')
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('psycopg2')
+
+# pylint: disable=wrong-import-position
+from pydantic import BaseModel
+
+from backend.app.importer import base
+from backend.app.importer.base import HttpImporter
+
+NOW = datetime.datetime(2023, 6, 1, tzinfo=datetime.timezone.utc)
+
+
+@dataclasses.dataclass
+class Document:
+    __tablename__ = 'document'
+
+    id: int
+    aktualisiert: datetime.datetime
+
+
+class Parameter(BaseModel):
+    cursor: str | None = None
+    aktualisiert_start: datetime.datetime | None = None
+    aktualisiert_end: datetime.datetime | None = None
+
+
+class FakeFacade:
+    """Returns pages of documents, the cursor of a page is its index."""
+
+    def __init__(self, pages: list[list[Document]]):
+        self.pages = pages
+        self.cursor: str | None = None
+        self.response_limit_reached = False
+        self.requested: list[int] = []
+
+    def fetch(self, params: Parameter | None, response_limit: int) -> list[Document]:
+        start = int(params.cursor) if params and params.cursor else 0
+        end = min(start + response_limit, len(self.pages))
+        self.requested.extend(range(start, end))
+        self.cursor = str(end)
+        self.response_limit_reached = end < len(self.pages)
+        return [document for page in self.pages[start:end] for document in page]
+
+
+class FakeCRUD:
+    model = Document
+
+    def __init__(self):
+        self.upserted: list[int] = []
+
+    def bulk_upsert_isolating(self, batch, identity_map=None):
+        self.upserted.extend(document.id for document in batch)
+        return []
+
+
+class FakeCheckpoints:
+    def __init__(self):
+        self.checkpoints: dict[str, types.SimpleNamespace] = {}
+
+    def read(self, checkpoint_id):
+        return self.checkpoints.get(checkpoint_id)
+
+    def save_checkpoint(self, fingerprint, importer, params, cursor, imported_count, aktualisiert):
+        created_at = NOW.replace(tzinfo=None)
+        if fingerprint in self.checkpoints:
+            created_at = self.checkpoints[fingerprint].created_at
+        self.checkpoints[fingerprint] = types.SimpleNamespace(
+            cursor=cursor,
+            imported_count=imported_count,
+            aktualisiert=aktualisiert,
+            created_at=created_at,
+        )
+
+    def delete(self, checkpoint_id):
+        self.checkpoints.pop(checkpoint_id, None)
+
+
+class FakeWatermarks:
+    def __init__(self):
+        self.watermarks: dict[str, types.SimpleNamespace] = {}
+
+    def read(self, watermark_id):
+        return self.watermarks.get(watermark_id)
+
+    def save_watermark(self, fingerprint, entity, params, aktualisiert):
+        self.watermarks[fingerprint] = types.SimpleNamespace(aktualisiert=aktualisiert)
+
+
+class PagedImporter(HttpImporter):
+    resumable = True
+    entity_type = 'document'
+
+    def fetch_data(self, params=None, response_limit=1000, proxy_list=None, **kwargs):
+        yield from self.facade.fetch(params, response_limit)
+
+    def get_resume_cursor(self):
+        return None
+
+    def get_next_cursor(self):
+        return self.facade.cursor
+
+    def with_cursor(self, params, cursor):
+        return (params or Parameter()).model_copy(update={'cursor': cursor})
+
+    def with_watermark(self, params, watermark):
+        return (params or Parameter()).model_copy(
+            update={'aktualisiert_start': watermark, 'cursor': None}
+        )
+
+
+@pytest.fixture
+def checkpoints(monkeypatch) -> FakeCheckpoints:
+    fake_checkpoints = FakeCheckpoints()
+    monkeypatch.setattr(base, 'CRUD_IMPORT_CHECKPOINT', fake_checkpoints)
+    return fake_checkpoints
+
+
+@pytest.fixture
+def watermarks(monkeypatch) -> FakeWatermarks:
+    fake_watermarks = FakeWatermarks()
+    monkeypatch.setattr(base, 'CRUD_IMPORT_WATERMARK', fake_watermarks)
+    return fake_watermarks
+
+
+def pages(count: int) -> list[list[Document]]:
+    return [
+        [Document(2 * number + offset, NOW - datetime.timedelta(days=number)) for offset in (0, 1)]
+        for number in range(count)
+    ]
+
+
+def test__batch_upsert__truncated_incremental_run_continues_in_next_run(checkpoints, watermarks):
+    facade = FakeFacade(pages(5))
+    crud = FakeCRUD()
+    importer = PagedImporter(crud, facade)  # type: ignore[arg-type]
+
+    importer.batch_upsert(response_limit=2, upsert_batch_size=2, incremental=True)
+
+    assert facade.requested == [0, 1]
+    assert not watermarks.watermarks
+    (checkpoint,) = checkpoints.checkpoints.values()
+    assert (checkpoint.cursor, checkpoint.aktualisiert) == ('2', NOW)
+
+    importer.batch_upsert(response_limit=2, upsert_batch_size=2, incremental=True)
+    importer.batch_upsert(response_limit=2, upsert_batch_size=2, incremental=True)
+
+    assert facade.requested == [0, 1, 2, 3, 4]
+    assert crud.upserted == list(range(10))
+    assert not checkpoints.checkpoints
+    # latest aktualisiert of the first run, which started when its checkpoint was created
+    (watermark,) = watermarks.watermarks.values()
+    assert watermark.aktualisiert == NOW
+
+
+def test__batch_upsert__complete_incremental_run_advances_watermark(checkpoints, watermarks):
+    facade = FakeFacade(pages(2))
+    importer = PagedImporter(FakeCRUD(), facade)  # type: ignore[arg-type]
+
+    importer.batch_upsert(response_limit=2, upsert_batch_size=2, incremental=True)
+
+    assert not checkpoints.checkpoints
+    (watermark,) = watermarks.watermarks.values()
+    assert watermark.aktualisiert == NOW
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from backend.app.facades.json_stream import JsonObjectStream
+
+PAGE = {
+    'numFound': 2,
+    'documents': [
+        {'id': 1, 'titel': 'Änderung des Grundgesetzes', 'text': 'a "quoted" \\ text — €'},
+        {'id': 22, 'anzahl': 12345, 'quote': 0.125, 'tags': [], 'nested': {'empty': {}}},
+    ],
+    'cursor': 'AoE/abc==',
+}
+
+
+def chunked(data: bytes, size: int) -> list[bytes]:
+    return [data[start : start + size] for start in range(0, len(data), size)]
+
+
+def parse(data: bytes, size: int, array_key: str = 'documents') -> tuple[list, dict]:
+    stream = JsonObjectStream(chunked(data, size), array_key)
+    return list(stream), stream.fields
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 7, 64, 100000])
+def test__json_object_stream__yields_items_for_any_chunk_size(size):
+    data = json.dumps(PAGE, ensure_ascii=False, indent=1).encode('utf-8')
+
+    documents, fields = parse(data, size)
+
+    assert documents == PAGE['documents']
+    assert fields == {'numFound': 2, 'cursor': 'AoE/abc=='}
+
+
+def test__json_object_stream__decodes_multi_byte_characters_split_by_chunks():
+    data = '{"documents": ["€€€", "\U0001f600"]}'.encode('utf-8')
+
+    for size in range(1, len(data) + 1):
+        assert parse(data, size)[0] == ['€€€', '\U0001f600']
+
+
+def test__json_object_stream__decodes_strings_split_by_chunks():
+    data = b'{"documents": ["a,b]}", "x\\"y", "\\u00e4"], "cursor": "c"}'
+
+    for size in range(1, len(data) + 1):
+        assert parse(data, size) == (['a,b]}', 'x"y', 'ä'], {'cursor': 'c'})
+
+
+def test__json_object_stream__decodes_numbers_split_by_chunks():
+    data = b'{"documents": [12345, -6.25e3, 7], "numFound": 98765}'
+
+    for size in range(1, len(data) + 1):
+        assert parse(data, size) == ([12345, -6250.0, 7], {'numFound': 98765})
+
+
+@pytest.mark.parametrize(
+    'data, documents, fields',
+    [
+        (b'{}', [], {}),
+        (b' { } ', [], {}),
+        (b'{"documents": []}', [], {}),
+        (b'{"numFound": 0, "documents": [ ], "cursor": "c"}', [], {'numFound': 0, 'cursor': 'c'}),
+        (b'{"cursor": "c"}', [], {'cursor': 'c'}),
+    ],
+)
+def test__json_object_stream__handles_empty_object_and_array(data, documents, fields):
+    for size in (1, len(data)):
+        assert parse(data, size) == (documents, fields)
+
+
+@pytest.mark.parametrize(
+    'data', [b'', b'[]', b'{"documents": [1, 2', b'{"documents": [1 2]}', b'{"cursor": "c"']
+)
+def test__json_object_stream__raises_on_invalid_json(data):
+    with pytest.raises(json.JSONDecodeError):
+        parse(data, 3)
@@ -0,0 +1,102 @@
+import pytest
+
+from backend.app.core.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+def test__counter__exports_totals_by_labels():
+    registry = MetricsRegistry()
+    requests = registry.counter('http_requests', 'HTTP requests sent.', ['host', 'status'])
+
+    requests.inc(host='dip.bundestag.de', status='200')
+    requests.inc(2, host='dip.bundestag.de', status='200')
+    requests.inc(host='dip.bundestag.de', status='503')
+
+    assert registry.to_prometheus() == (
+        '# HELP http_requests HTTP requests sent.\n'
+        '# TYPE http_requests counter\n'
+        'http_requests_total{host="dip.bundestag.de",status="200"} 3.0\n'
+        'http_requests_total{host="dip.bundestag.de",status="503"} 1.0\n'
+    )
+
+
+def test__counter__rejects_decrease_and_wrong_labels():
+    requests = Counter('http_requests', 'HTTP requests sent.', ['host'])
+
+    with pytest.raises(ValueError):
+        requests.inc(-1, host='dip.bundestag.de')
+    with pytest.raises(ValueError):
+        requests.inc(status='200')
+
+
+def test__gauge__exports_set_and_callback_values():
+    limit = Gauge(
+        'concurrency_limit',
+        'Concurrency limit.',
+        ['host'],
+        callback=lambda: {('dip.bundestag.de',): 2.5},
+    )
+    limit.set(4, host='www.bundestag.de')
+
+    assert limit.snapshot() == {('www.bundestag.de',): 4, ('dip.bundestag.de',): 2.5}
+    assert limit.to_prometheus().splitlines()[2:] == [
+        'concurrency_limit{host="www.bundestag.de"} 4.0',
+        'concurrency_limit{host="dip.bundestag.de"} 2.5',
+    ]
+
+
+def test__histogram__exports_cumulative_buckets():
+    duration = Histogram('request_duration_seconds', 'Request duration.', buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.1, 0.5, 2.0):
+        duration.observe(value)
+
+    assert duration.snapshot() == {
+        (): {'count': 4, 'sum': pytest.approx(2.65), 'buckets': {0.1: 2, 1.0: 1}}
+    }
+    assert duration.to_prometheus().splitlines()[2:] == [
+        'request_duration_seconds_bucket{le="0.1"} 2.0',
+        'request_duration_seconds_bucket{le="1.0"} 3.0',
+        'request_duration_seconds_bucket{le="+Inf"} 4.0',
+        'request_duration_seconds_sum 2.65',
+        'request_duration_seconds_count 4.0',
+    ]
+
+
+def test__metrics__escape_label_values_and_documentation():
+    registry = MetricsRegistry()
+    errors = registry.counter('errors', 'Errors "by" path\\name.', ['path'])
+    errors.inc(path='a "b"\nc')
+
+    assert registry.to_prometheus().splitlines() == [
+        '# HELP errors Errors \\"by\\" path\\\\name.',
+        '# TYPE errors counter',
+        'errors_total{path="a \\"b\\"\\nc"} 1.0',
+    ]
+
+
+def test__registry__returns_registered_metric():
+    registry = MetricsRegistry()
+    requests = registry.counter('http_requests', 'HTTP requests sent.')
+
+    assert registry.counter('http_requests', 'HTTP requests sent.') is requests
+    with pytest.raises(ValueError):
+        registry.gauge('http_requests', 'HTTP requests sent.')
+
+
+def test__registry__exports_metrics_sorted_by_name():
+    registry = MetricsRegistry()
+    registry.counter('b', 'B.').inc()
+    registry.gauge('a', 'A.').set(1)
+
+    lines = registry.to_prometheus().splitlines()
+
+    assert [line for line in lines if not line.startswith('#')] == ['a 1.0', 'b_total 1.0']
+    assert registry.snapshot() == {'a': {(): 1}, 'b': {(): 1.0}}
+
+
+def test__metrics__take_value_and_label_named_like_the_value():
+    registry = MetricsRegistry()
+    transfers = registry.counter('transfers', 'Transfers.', ['amount'])
+    transfers.inc(2, amount='large')
+
+    assert transfers.snapshot() == {('large',): 2.0}
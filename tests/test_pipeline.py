@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from backend.app.importer.pipeline import StageStats, run_stage
+
+
+def test__run_stage__yields_items_in_order():
+    stats = StageStats('fetch')
+
+    items = list(run_stage(iter([[1, 2], [3], [4, 5, 6]]), stats, weight=len))
+
+    assert items == [[1, 2], [3], [4, 5, 6]]
+    assert stats.items == 6
+
+
+def test__run_stage__raises_error_of_source():
+    def source():
+        yield 1
+        raise RuntimeError('fetch failed')
+
+    stage = run_stage(source(), StageStats('fetch'))
+
+    assert next(stage) == 1
+    with pytest.raises(RuntimeError, match='fetch failed'):
+        next(stage)
+
+
+def test__run_stage__limits_items_produced_ahead():
+    produced: list[int] = []
+    more_than_ahead = threading.Event()
+
+    def source():
+        for item in range(10):
+            produced.append(item)
+            if len(produced) > 4:
+                more_than_ahead.set()
+            yield item
+
+    stage = run_stage(source(), StageStats('fetch'), queue_size=2)
+    assert next(stage) == 0
+
+    # one item consumed, two queued and one blocked in put
+    assert not more_than_ahead.wait(0.3)
+    stage.close()
+
+
+def test__run_stage__closes_source_if_consumer_stops():
+    closed = threading.Event()
+
+    def source():
+        try:
+            yield from range(100)
+        finally:
+            closed.set()
+
+    stage = run_stage(source(), StageStats('fetch'))
+    assert next(stage) == 0
+    stage.close()
+
+    assert closed.is_set()
+
+
+def test__run_stage__rejects_invalid_queue_size():
+    with pytest.raises(ValueError):
+        next(run_stage(iter([1]), StageStats('fetch'), queue_size=0))
+
+
+def test__stage_stats__items_per_second():
+    assert StageStats('persist', items=10, busy_seconds=2.0).items_per_second == 5.0
+    assert StageStats('persist').items_per_second == 0.0
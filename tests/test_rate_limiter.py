@@ -0,0 +1,129 @@
+import pytest
+
+from backend.app.facades import rate_limiter
+from backend.app.facades.rate_limiter import (
+    MULTIPLICATIVE_DECREASE,
+    AdaptiveConcurrencyLimiter,
+    FileTokenBucket,
+    TokenBucket,
+)
+
+
+class FakeClock:
+    """Replaces the ``time`` module of the rate limiter, sleeping advances the clock."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake_clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, 'time', fake_clock)
+    return fake_clock
+
+
+def test__token_bucket__allows_burst_then_rate(clock):
+    bucket = TokenBucket(rate=2.0, capacity=2)
+
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert clock.now == pytest.approx(1001.0)
+
+
+def test__token_bucket__refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+
+    clock.sleep(100.0)
+
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(1.0)
+
+
+def test__token_bucket__serves_waiting_callers_in_order(clock):
+    bucket = TokenBucket(rate=1.0, capacity=1)
+    bucket.acquire()
+
+    # reservations without sleeping, as by concurrent callers
+    assert bucket._reserve(1.0) == pytest.approx(1.0)
+    assert bucket._reserve(1.0) == pytest.approx(2.0)
+
+
+@pytest.mark.parametrize('rate, capacity', [(0.0, 1), (-1.0, 1), (1.0, 0.5)])
+def test__token_bucket__rejects_invalid_configuration(rate, capacity):
+    with pytest.raises(ValueError):
+        TokenBucket(rate=rate, capacity=capacity)
+
+
+def test__file_token_bucket__shares_tokens_by_state_file(clock, tmp_path):
+    state_file = str(tmp_path / 'state' / 'host.bucket')
+    first = FileTokenBucket(rate=1.0, state_file=state_file, capacity=1)
+    second = FileTokenBucket(rate=1.0, state_file=state_file, capacity=1)
+
+    assert first.acquire() == 0.0
+    assert second.acquire() == pytest.approx(1.0)
+
+
+def test__adaptive_concurrency_limiter__increases_limit_additively(clock):
+    limiter = AdaptiveConcurrencyLimiter(max_limit=3)
+    assert limiter.limit == 1.0
+
+    limiter.acquire()
+    assert limiter.in_flight == 1
+    limiter.release(latency=0.1, status_code=200)
+    assert limiter.in_flight == 0
+    assert limiter.limit == pytest.approx(2.0)
+
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release(latency=0.1, status_code=200)
+    assert limiter.limit == 3.0
+
+
+@pytest.mark.parametrize('status_code', [None, 429, 503])
+def test__adaptive_concurrency_limiter__decreases_limit_on_overload(clock, status_code):
+    limiter = AdaptiveConcurrencyLimiter(max_limit=8, initial_limit=8)
+
+    limiter.acquire()
+    limiter.release(latency=1.0, status_code=status_code)
+
+    assert limiter.limit == pytest.approx(8 * MULTIPLICATIVE_DECREASE)
+
+
+def test__adaptive_concurrency_limiter__decreases_once_per_burst_of_failures(clock):
+    limiter = AdaptiveConcurrencyLimiter(max_limit=8, initial_limit=8)
+    limiter.acquire()
+    limiter.acquire()
+
+    limiter.release(latency=1.0, status_code=503)
+    # started before the decrease
+    limiter.release(latency=1.0, status_code=503)
+    assert limiter.limit == pytest.approx(8 * MULTIPLICATIVE_DECREASE)
+
+    clock.sleep(2.0)
+    limiter.acquire()
+    limiter.release(latency=1.0, status_code=503)
+    assert limiter.limit == pytest.approx(8 * MULTIPLICATIVE_DECREASE**2)
+
+
+def test__adaptive_concurrency_limiter__keeps_min_limit(clock):
+    limiter = AdaptiveConcurrencyLimiter(max_limit=4, min_limit=2, initial_limit=2)
+
+    limiter.acquire()
+    limiter.release(latency=1.0, status_code=500)
+
+    assert limiter.limit == 2.0
@@ -0,0 +1,225 @@
+import array
+import asyncio
+import datetime
+import types
+
+import pytest
+
+pytest.importorskip('pydantic')
+pytest.importorskip('requests')
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('psycopg2')
+
+# pylint: disable=wrong-import-position
+from backend.app.facades.deutscher_bundestag.parameter_model import CommonParameter
+from backend.app.importer.dip_importer import reconciliation
+from backend.app.importer.dip_importer.reconciliation import (
+    diff_versions,
+    find_missing_ranges,
+    reconcile_ids,
+)
+
+START = datetime.date(2023, 1, 1)
+END = datetime.date(2023, 12, 31)
+
+
+def day(number: int) -> datetime.date:
+    return START + datetime.timedelta(days=number)
+
+
+def in_range(dates: list[datetime.date], start: datetime.date, end: datetime.date) -> int:
+    return sum(start <= date <= end for date in dates)
+
+
+class FakeCountFacade:
+    """Counts documents by ``datum`` like the DIP count of an endpoint."""
+
+    def __init__(self, dates: list[datetime.date]):
+        self.dates = dates
+        self.requests = 0
+
+    async def get_count(self, endpoint: str, params: CommonParameter) -> int:
+        self.requests += 1
+        return in_range(self.dates, params.datum_start, params.datum_end)
+
+
+def find(api_dates: list[datetime.date], db_dates: list[datetime.date], **kwargs):
+    facade = FakeCountFacade(api_dates)
+
+    async def count_db(ranges):
+        return [in_range(db_dates, start, end) for start, end in ranges]
+
+    ranges = asyncio.run(
+        find_missing_ranges(
+            facade,  # type: ignore[arg-type]
+            'drucksache',
+            [CommonParameter()],
+            count_db,
+            START,
+            END,
+            **kwargs,
+        )
+    )
+    return ranges, facade.requests
+
+
+def test__find_missing_ranges__finds_nothing_if_counts_match():
+    dates = [day(number) for number in range(0, 365, 3)]
+
+    ranges, requests = find(dates, dates)
+
+    assert ranges == []
+    assert requests == 1
+
+
+def test__find_missing_ranges__bisects_to_missing_days():
+    db_dates = [day(number) for number in range(365)]
+    api_dates = db_dates + [day(40), day(200), day(200)]
+
+    ranges, requests = find(api_dates, db_dates)
+
+    assert [(r.start, r.end, r.missing) for r in ranges] == [
+        (day(40), day(40), 1),
+        (day(200), day(200), 2),
+    ]
+    # two paths of about log2(365) levels instead of a request per day
+    assert requests <= 2 * 10 + 1
+
+
+def test__find_missing_ranges__merges_adjacent_ranges():
+    db_dates = [day(number) for number in range(365)]
+    api_dates = db_dates + [day(100), day(101)]
+
+    ranges, _ = find(api_dates, db_dates)
+
+    assert [(r.start, r.end, r.missing) for r in ranges] == [(day(100), day(101), 2)]
+
+
+def test__find_missing_ranges__stops_at_min_days():
+    api_dates = [day(100)]
+
+    ranges, _ = find(api_dates, [], min_days=30)
+
+    assert len(ranges) == 1
+    assert ranges[0].start <= day(100) <= ranges[0].end
+    assert 15 <= ranges[0].days <= 30
+
+
+def test__find_missing_ranges__rejects_invalid_min_days():
+    with pytest.raises(ValueError):
+        find([], [], min_days=0)
+
+
+def versions(*items: tuple[int, datetime.datetime]) -> tuple[array.array, array.array]:
+    """Versions as read from the database, which stores ``aktualisiert`` in UTC."""
+    return (
+        array.array('q', [document_id for document_id, _ in items]),
+        array.array(
+            'd',
+            [
+                aktualisiert.replace(tzinfo=datetime.timezone.utc).timestamp()
+                for _, aktualisiert in items
+            ],
+        ),
+    )
+
+
+def test__diff_versions__finds_inserted_updated_and_deleted_ids():
+    old = datetime.datetime(2023, 5, 1, 12, 0)
+    new = datetime.datetime(2023, 5, 2, 12, 0)
+
+    diff = diff_versions(
+        [(5, new), (1, old), (3, old), (4, new)],
+        *versions((2, old), (3, old), (4, old), (6, old)),
+    )
+
+    assert diff.inserted == [1, 5]
+    assert diff.updated == [4]
+    assert diff.deleted == [2, 6]
+
+
+def test__diff_versions__compares_offset_of_dip_with_utc_of_database():
+    stored = datetime.datetime(2023, 5, 1, 10, 0)
+    summer_time = datetime.timezone(datetime.timedelta(hours=2))
+    aktualisiert = datetime.datetime(2023, 5, 1, 12, 0, tzinfo=summer_time)
+
+    diff = diff_versions(
+        [(1, aktualisiert), (2, aktualisiert)], *versions((1, stored), (2, stored.replace(hour=12)))
+    )
+
+    assert not diff.inserted and not diff.deleted
+    assert diff.updated == [2]
+
+
+def test__diff_versions__handles_empty_sides():
+    aktualisiert = datetime.datetime(2023, 5, 1, 12, 0)
+
+    assert diff_versions([], *versions((1, aktualisiert))).deleted == [1]
+    assert diff_versions([(1, aktualisiert)], *versions()).inserted == [1]
+
+
+class FakeReconciledImporter:
+    """Importer whose facade lists the versions of ``api_ids`` for ranges and ``moved_ids``
+    (documents which left the range) only when requested by id."""
+
+    entity_type = None
+
+    def __init__(self, api_ids: list[int], moved_ids: list[int], aktualisiert: datetime.datetime):
+        self.imported_ids: list[str] = []
+        self.deleted_ids: list[int] = []
+        self.crud = types.SimpleNamespace(delete_multi=self.deleted_ids.extend)
+
+        def get_document_versions(endpoint, params, proxy_list=None):
+            ids = api_ids if params.id is None else [i for i in params.id if i in moved_ids]
+            return [(document_id, aktualisiert) for document_id in ids]
+
+        self.facade = types.SimpleNamespace(get_document_versions=get_document_versions)
+
+    def params_for_ids(self, object_ids: list[str]):
+        yield object_ids
+
+    def import_data(self, params, proxy_list=None, resume=True):
+        self.imported_ids.extend(params)
+
+
+@pytest.mark.parametrize('delete', [True, False])
+def test__reconcile_ids__imports_moved_and_deletes_removed_documents(delete):
+    aktualisiert = datetime.datetime(2023, 5, 1, 12, 0)
+    importer = FakeReconciledImporter(api_ids=[1, 2], moved_ids=[3], aktualisiert=aktualisiert)
+
+    diff = reconcile_ids(
+        importer,  # type: ignore[arg-type]
+        'drucksache',
+        [CommonParameter()],
+        versions((2, aktualisiert), (3, aktualisiert), (4, aktualisiert)),
+        delete=delete,
+    )
+
+    assert (diff.inserted, diff.updated, diff.deleted) == ([1], [3], [4])
+    assert importer.imported_ids == ['1', '3']
+    assert importer.deleted_ids == ([4] if delete else [])
+
+
+def test__reconcile_ids__deletes_fingerprints_of_deleted_documents(monkeypatch):
+    aktualisiert = datetime.datetime(2023, 5, 1, 12, 0)
+    importer = FakeReconciledImporter(api_ids=[], moved_ids=[], aktualisiert=aktualisiert)
+    importer.entity_type = 'drucksache'  # type: ignore[assignment]
+    deleted_fingerprints = []
+    monkeypatch.setattr(
+        reconciliation,
+        'CRUD_IMPORT_FINGERPRINT',
+        types.SimpleNamespace(
+            delete_fingerprints=lambda entity, ids: deleted_fingerprints.append((entity, ids))
+        ),
+    )
+
+    reconcile_ids(
+        importer,  # type: ignore[arg-type]
+        'drucksache',
+        [CommonParameter()],
+        versions((1, aktualisiert)),
+        delete=True,
+    )
+
+    assert importer.deleted_ids == [1]
+    assert deleted_fingerprints == [('drucksache', [1])]
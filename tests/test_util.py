@@ -0,0 +1,254 @@
+import datetime
+import email.utils
+import types
+
+import pytest
+
+pytest.importorskip('pydantic')
+pytest.importorskip('requests')
+
+# pylint: disable=wrong-import-position
+from backend.app.facades import util
+from backend.app.facades.util import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    Proxy,
+    ProxyList,
+    ProxyListEmptyError,
+    ProxyStats,
+    RetryBudget,
+    call_with_retries,
+    get_retry_after,
+)
+
+
+class FakeClock:
+    """Replaces the ``time`` module of the facade utils, sleeping advances the clock."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake_clock = FakeClock()
+    monkeypatch.setattr(util, 'time', fake_clock)
+    return fake_clock
+
+
+def open_circuit(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test__circuit_breaker__opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker('dip.bundestag.de', failure_threshold=3, open_seconds=30.0)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state is CircuitState.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == pytest.approx(30.0)
+
+
+def test__circuit_breaker__lets_single_probe_through_when_half_open(clock):
+    breaker = CircuitBreaker('dip.bundestag.de', failure_threshold=1, open_seconds=30.0)
+    open_circuit(breaker)
+
+    clock.sleep(30.0)
+    assert breaker.state is CircuitState.HALF_OPEN
+
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED
+    breaker.before_call()
+
+
+def test__circuit_breaker__doubles_open_time_after_failed_probe(clock):
+    breaker = CircuitBreaker(
+        'dip.bundestag.de', failure_threshold=1, open_seconds=30.0, max_open_seconds=100.0
+    )
+    open_circuit(breaker)
+
+    for open_seconds in (60.0, 100.0, 100.0):
+        clock.sleep(breaker._current_open_seconds)
+        breaker.before_call()
+        breaker.record_failure()
+
+        assert breaker.state is CircuitState.OPEN
+        with pytest.raises(CircuitOpenError) as error:
+            breaker.before_call()
+        assert error.value.retry_after == pytest.approx(open_seconds)
+
+    clock.sleep(100.0)
+    breaker.before_call()
+    breaker.record_success()
+    open_circuit(breaker)
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == pytest.approx(30.0)
+
+
+def test__circuit_breaker__release_lets_another_probe_through(clock):
+    breaker = CircuitBreaker('dip.bundestag.de', failure_threshold=1, open_seconds=30.0)
+    open_circuit(breaker)
+    clock.sleep(30.0)
+
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+
+
+def test__retry_budget__limits_retries_to_share_of_requests():
+    budget = RetryBudget(ratio=0.5, min_retries=2)
+
+    assert budget.withdraw()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+def test__retry_budget__caps_saved_retries():
+    budget = RetryBudget(ratio=1.0, min_retries=1)
+
+    for _ in range(100):
+        budget.deposit()
+
+    assert sum(budget.withdraw() for _ in range(100)) == 10
+
+
+def test__call_with_retries__stops_when_budget_is_exhausted(clock):
+    calls = []
+
+    def fail():
+        calls.append(clock.now)
+        raise ValueError('unavailable')
+
+    with pytest.raises(ValueError):
+        call_with_retries(fail, retry_budget=RetryBudget(ratio=0.0, min_retries=1))
+
+    assert len(calls) == 2
+
+
+def test__call_with_retries__fails_fast_while_circuit_is_open(clock):
+    breaker = CircuitBreaker('dip.bundestag.de', failure_threshold=1, open_seconds=30.0)
+    calls = []
+
+    def fail():
+        calls.append(clock.now)
+        raise ValueError('unavailable')
+
+    with pytest.raises(CircuitOpenError):
+        call_with_retries(fail, circuit_breaker=breaker, retry_budget=None)
+
+    assert len(calls) == 1
+    assert breaker.state is CircuitState.OPEN
+
+
+@pytest.mark.parametrize(
+    'headers, expected',
+    [
+        ({}, None),
+        ({'Retry-After': '120'}, 120.0),
+        ({'Retry-After': '-5'}, 0.0),
+        ({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}, 0.0),
+        ({'Retry-After': 'soon'}, None),
+    ],
+)
+def test__get_retry_after(headers, expected):
+    assert get_retry_after(types.SimpleNamespace(headers=headers)) == expected
+
+
+def test__get_retry_after__http_date():
+    retry_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=60)
+    headers = {'Retry-After': email.utils.format_datetime(retry_at, usegmt=True)}
+
+    assert get_retry_after(types.SimpleNamespace(headers=headers)) == pytest.approx(60, abs=2)
+
+
+def proxy_list(healthy: set[str], **kwargs) -> ProxyList:
+    """Proxy list of proxies ``a`` to ``d``, whose checks succeed for ``healthy`` ones."""
+    proxies = ProxyList([Proxy(ip=ip) for ip in 'abcd'], **kwargs)
+    proxies.test_sample_domains = lambda proxy: proxy.ip in healthy  # type: ignore[assignment]
+    return proxies
+
+
+def test__proxy_list__selects_checked_healthy_proxy():
+    proxies = proxy_list(healthy={'c'})
+
+    assert proxies.get_proxy().ip == 'c'
+    assert proxies.get_stats(Proxy(ip='c')).checked_at is not None
+    assert proxies._probing_thread is None
+
+
+def test__proxy_list__drops_failed_proxy():
+    proxies = proxy_list(healthy={'b', 'c'})
+    first = proxies.get_proxy()
+
+    proxies.set_random_proxy()
+
+    assert proxies.get_proxy() != first
+    assert proxies.get_proxy().ip in {'b', 'c'}
+
+
+def test__proxy_list__raises_without_healthy_proxy():
+    with pytest.raises(ProxyListEmptyError):
+        proxy_list(healthy=set()).get_proxy()
+
+
+def test__proxy_list__rotates_unhealthy_and_slow_current_proxy():
+    proxies = proxy_list(healthy={'a', 'b', 'c', 'd'})
+    proxies.check_proxies(proxies.proxies)
+    current = proxies.get_proxy()
+
+    for _ in range(2):
+        proxies.record_result(current, latency=1.0, success=False)
+    assert proxies.get_proxy() != current
+
+    current = proxies.get_proxy()
+    for _ in range(5):
+        proxies.record_result(current, latency=1000.0, success=True)
+    assert proxies.get_proxy() != current
+
+
+def test__proxy_stats__score_favours_reliable_fast_proxies():
+    fast, slow, failing = ProxyStats(), ProxyStats(), ProxyStats()
+    fast.record(True, 0.1)
+    slow.record(True, 1.0)
+    failing.record(True, 0.1)
+    failing.record(False)
+
+    assert fast.score > slow.score
+    assert fast.score > failing.score
+
+
+def test__proxy_list__stops_probing_on_exit():
+    with proxy_list(healthy={'a'}, reprobe_interval=60.0) as proxies:
+        proxies.get_proxy()
+        thread = proxies._probing_thread
+        assert thread is not None and thread.is_alive()
+
+    thread.join(timeout=5)
+    assert not thread.is_alive()